@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark of the decoding of a synthetic Jenkins test report into a BuildResults document with a growing number of
+decoding processes.
+
+Usage: python benchmarks/bench_decode.py [--tests 200000] [--workers 1 2 4 8]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+from ebr_connector.hooks.jenkins.store_results import decode_suites
+from ebr_connector.schema.build_results import BuildResults
+
+
+def create_report(test_count, suite_size=500):
+    """Creates a Jenkins test report with `test_count` test cases spread over suites of `suite_size` test cases."""
+    suites = []
+    for first in range(0, test_count, suite_size):
+        cases = []
+        for index in range(first, min(first + suite_size, test_count)):
+            status = ("PASSED", "FAILED", "SKIPPED", "FIXED")[index % 4]
+            cases.append(
+                {
+                    "className": "org.acme.MyTest_%d" % (index // 10),
+                    "name": "test_case_%d/%d (16-byte object <60-A5 DE-03>)" % (index, index % 7),
+                    "status": status,
+                    "errorDetails": "Expected %d but was %d" % (index, index + 1) if status == "FAILED" else None,
+                    "duration": float(index % 1000) / 10,
+                }
+            )
+        suites.append({"name": "MySuite_%d (param)" % (first // suite_size), "duration": 1234.5, "cases": cases})
+    return {"suites": suites}
+
+
+def decode(report, workers):
+    """Stores the decoded test report in a new BuildResults document."""
+    build_results = BuildResults.create(
+        job_name="my_jobname",
+        job_link="my_joburl",
+        build_date_time="2019-02-19T09:14:59",
+        build_id="1234",
+        platform="Linux-x86_64",
+    )
+    build_results.store_tests(decode_suites, report["suites"], workers)
+    return build_results
+
+
+def main():
+    """Runs the benchmark and prints the timings."""
+    parser = argparse.ArgumentParser(description="Benchmark for the parallel decoding of Jenkins test reports.")
+    parser.add_argument("--tests", type=int, default=200000, help="Number of test cases (default: 200000)")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Numbers of processes (default: 1 2 4 8)"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs, the best one is reported (default: 3)")
+    args = parser.parse_args()
+
+    report = create_report(args.tests)
+    expected = decode(report, 1).to_dict()
+
+    baseline = None
+    print("Decoding a report with %d test cases on %d CPU(s) (best of %d):" % (args.tests, os.cpu_count(), args.repeat))
+    for workers in args.workers:
+        assert decode(report, workers).to_dict() == expected
+        best = min(timeit.repeat(lambda workers=workers: decode(report, workers), number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print("  %2d worker(s) %8.3f s  %5.1fx" % (workers, best, baseline / best))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark of the import time of the CLI entry points, based on `python -X importtime`.
+
+Every module is imported in a fresh interpreter. The cumulative import time of the module and the slowest modules it
+imports are reported.
+
+Usage: python benchmarks/bench_import.py [--repeat 5] [--top 5]
+"""
+
+import argparse
+import sys
+
+from ebr_connector.hooks.common.import_time import ENTRY_POINTS, import_times
+
+
+def main():
+    """Runs the benchmark and prints the timings."""
+    parser = argparse.ArgumentParser(description="Benchmark for the import time of the CLI entry points.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs, the best one is reported (default: 5)")
+    parser.add_argument("--top", type=int, default=5, help="Number of slowest imported modules shown (default: 5)")
+    args = parser.parse_args()
+
+    for module in ENTRY_POINTS:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda times: times[module])
+        print("%-45s %8.1f ms" % (module, best[module] * 1000))
+        slowest = sorted((name for name in best if name != module), key=best.get, reverse=True)[: args.top]
+        for name in slowest:
+            print("    %-41s %8.1f ms" % (name, best[name] * 1000))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
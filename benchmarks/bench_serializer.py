@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark comparing `json.dumps(BuildResults.to_dict())` with the precompiled serializer.
+
+Usage: python benchmarks/bench_serializer.py [--tests 100000]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+
+from ebr_connector.schema.build_results import BuildResults, Test
+from ebr_connector.schema.serializer import available_backends
+
+
+def create_build(test_count):
+    """Creates a build with `test_count` test cases spread over suites of 100 test cases each."""
+
+    def retrieve():
+        results = {"tests": [], "suites": []}
+        for index in range(test_count):
+            result = (Test.Result.PASSED, Test.Result.FAILED, Test.Result.SKIPPED)[index % 3]
+            results["tests"].append(
+                {
+                    "suite": "MySuite_%d" % (index // 100),
+                    "classname": "org.acme.MyTest_%d" % (index // 10),
+                    "test": "test_case_%d" % index,
+                    "result": result.name,
+                    "message": "Some failure message" if result == Test.Result.FAILED else "",
+                    "duration": float(index % 1000) / 10,
+                }
+            )
+        for index in range(0, test_count, 100):
+            results["suites"].append(
+                {
+                    "name": "MySuite_%d" % (index // 100),
+                    "failures_count": 33,
+                    "skipped_count": 33,
+                    "passed_count": 34,
+                    "total_count": 100,
+                    "duration": 1234.5,
+                }
+            )
+        return results
+
+    build_results = BuildResults.create(
+        job_name="my_jobname",
+        job_link="my_joburl",
+        build_date_time="2019-02-19T09:14:59",
+        build_id="1234",
+        platform="Linux-x86_64",
+    )
+    build_results.store_tests(retrieve)
+    return build_results
+
+
+def main():
+    """Runs the benchmark and prints the timings."""
+    parser = argparse.ArgumentParser(description="Benchmark for the BuildResults JSON serialization.")
+    parser.add_argument("--tests", type=int, default=100000, help="Number of test cases (default: 100000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs, the best one is reported (default: 3)")
+    args = parser.parse_args()
+
+    build_results = create_build(args.tests)
+    assert build_results.to_json() == json.dumps(build_results.to_dict()).encode()
+
+    # Same build with all test cases turned into `Test` objects, as they are after accessing the test fields
+    materialized = create_build(args.tests)
+    for name in materialized.br_tests_object.TEST_RESULT_FIELDS:
+        getattr(materialized.br_tests_object, name)
+
+    candidates = []
+    for label, build in (("Test objects", materialized), ("test store", build_results)):
+        candidates.append(
+            ("%s: json.dumps(to_dict())" % label, lambda build=build: json.dumps(build.to_dict()).encode())
+        )
+        for backend in available_backends():
+            candidates.append(
+                (
+                    "%s: to_json(backend=%r)" % (label, backend),
+                    lambda build=build, backend=backend: build.to_json(backend),
+                )
+            )
+
+    baseline = None
+    print("Serializing a build with %d test cases (best of %d):" % (args.tests, args.repeat))
+    for name, function in candidates:
+        best = min(timeit.repeat(function, number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print("  %-42s %8.3f s  %5.1fx" % (name, best, baseline / best))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
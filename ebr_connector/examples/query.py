@@ -11,7 +11,8 @@ import json
 import sys
 import urllib
 from elasticsearch_dsl import connections
-from ebr_connector.prepacked_queries.multi_jobs import successful_jobs, failed_tests
+from ebr_connector.prepacked_queries.batch import QueryBatch
+from ebr_connector.prepacked_queries.multi_jobs import successful_jobs_query, failed_tests_query
 
 
 def main():
@@ -55,32 +56,58 @@ def main():
         ]
     )
 
-    query_failed_tests(args.index)
-    query_for_successful_job(args.index)
+    query_in_batch(args.index)
 
 
-def query_for_successful_job(index):
-    """Queries for successful tests"""
-    response = successful_jobs(index, "cpp-reflection-tests-BB.*PR-.*", size=5)
+def query_in_batch(index):
+    """Queries for failed tests and successful jobs in a single round trip"""
+    return _execute_batch(_failed_tests_query(index), _successful_jobs_query(index))
 
-    # Iterate over the search results
-    for hit in response:
-        dump_formatted(hit)
-    print("Hits: %d" % len(response))
 
-    return response
+def query_for_successful_job(index):
+    """Queries for successful jobs"""
+    return _single_result(_execute_batch(_successful_jobs_query(index)))
 
 
 def query_failed_tests(index):
     """Queries for failed tests"""
-    response = failed_tests(index, job_name="cpp-reflection-tests-BB-baseline", size=5)
+    return _single_result(_execute_batch(_failed_tests_query(index)))
+
+
+def _successful_jobs_query(index):
+    return successful_jobs_query(index, "cpp-reflection-tests-BB.*PR-.*", size=5)
+
+
+def _failed_tests_query(index):
+    return failed_tests_query(index, job_name="cpp-reflection-tests-BB-baseline", size=5)
+
+
+def _execute_batch(*queries):
+    """Executes the queries in a single round trip and prints their hits."""
+    batch = QueryBatch()
+    for query in queries:
+        batch.add(query)
+
+    results = batch.execute()
+    for result in results:
+        if not result.success:
+            print("Query failed: %s" % result.error)
+            continue
+
+        # Iterate over the search results
+        for hit in result.results:
+            dump_formatted(hit)
+        print("Hits: %d" % len(result.results))
+
+    return results
 
-    # Iterate over the response and print only the hits
-    for hit in response:
-        dump_formatted(hit)
-    print("Hits: %d" % len(response))
 
-    return response
+def _single_result(results):
+    """Returns the hits of the only query of a batch, raises its error if it failed."""
+    [result] = results
+    if not result.success:
+        raise result.error
+    return result.results
 
 
 def dump_formatted(json_value):
@@ -6,6 +6,10 @@ Module with common argparser configuration for hooks
 
 import sys
 import ebr_connector
+from ebr_connector.logcollector.compression import available_compressions
+
+LOGCOLLECTOR_BACKEND = "logcollector"
+ELASTICSEARCH_BACKEND = "elasticsearch"
 
 
 def add_common_args(parser):
@@ -22,11 +26,57 @@ def add_common_args(parser):
     )
     parser.add_argument("-v", "--productversion", type=str, help="Product version")
 
-    parser.add_argument("--logcollectaddr", type=str, required=True, help="Address of LogCollector to send to")
-    parser.add_argument("--logcollectport", type=int, required=True, help="Port on the LogCollector to send to")
+    add_backend_args(parser)
+    parser.add_argument("--version", action="version", version=ebr_connector.__version__)
+
+
+def add_backend_args(parser):
+    """
+    Arguments selecting and configuring the backend the build results are sent to
+
+    Args:
+        parser: Args parser object
+    """
+    parser.add_argument(
+        "--backend",
+        choices=[LOGCOLLECTOR_BACKEND, ELASTICSEARCH_BACKEND],
+        default=LOGCOLLECTOR_BACKEND,
+        help="Where to send the build results to (default: logcollector)",
+    )
+    add_logcollector_args(parser)
+    add_elasticsearch_args(parser)
+
+
+def add_logcollector_args(parser):
+    """
+    Arguments for connecting to a LogCollector instance
+
+    Args:
+        parser: Args parser object
+    """
+    parser.add_argument(
+        "--logcollectaddr",
+        type=str,
+        nargs="+",
+        help="Address of LogCollector to send to. Several addresses (optionally as 'host:port') can be given, "
+        "the documents are sent to the healthiest one and fail over to the others.",
+    )
+    parser.add_argument("--logcollectport", type=int, help="Port on the LogCollector to send to")
+    parser.add_argument(
+        "--fanout",
+        type=int,
+        default=1,
+        help="Number of LogCollectors each document is sent to concurrently (default: 1)",
+    )
     parser.add_argument(
         "--sockettimeout", type=int, default=10, help="Socket timeout in seconds for the write operation (default: 10)"
     )
+    parser.add_argument(
+        "--compression",
+        choices=available_compressions(),
+        default=None,
+        help="Compress the data sent to the LogCollector with the given method (default: no compression)",
+    )
     parser.add_argument("--cacert", default=None, help="Location of CA cert to verify against.")
     parser.add_argument("--clientcert", default=None, help="Client certificate file. Must also provide client key.")
     parser.add_argument("--clientkey", default=None, help="Client key file. Must also provide client certificate.")
@@ -35,7 +85,38 @@ def add_common_args(parser):
         default="",
         help="Client key file's password. Only use if there is a password on the keyfile.",
     )
-    parser.add_argument("--version", action="version", version=ebr_connector.__version__)
+    parser.add_argument(
+        "--spooldir",
+        default=None,
+        help="Directory of a spool keeping documents until they are delivered. Documents which cannot be sent are "
+        "kept there and sent on the next run or with 'ebr-replay-spool' (default: no spool, fail if unreachable)",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=5,
+        help="Number of attempts to deliver a spooled document before giving up for this run (default: 5)",
+    )
+
+
+def add_elasticsearch_args(parser):
+    """
+    Arguments for indexing directly into Elasticsearch (`--backend elasticsearch`)
+
+    Args:
+        parser: Args parser object
+    """
+    parser.add_argument("--eshosts", nargs="+", default=None, help="URLs of the Elasticsearch nodes to index into")
+    parser.add_argument("--esindex", default=None, help="Name of the Elasticsearch index (or alias) to write to")
+    parser.add_argument("--esuser", default=None, help="User name for Elasticsearch")
+    parser.add_argument("--espassword", default="", help="Password of the Elasticsearch user")
+    parser.add_argument("--escacert", default=None, help="Location of CA cert to verify Elasticsearch against.")
+    parser.add_argument(
+        "--eschunksize", type=int, default=100, help="Number of documents sent in one bulk request (default: 100)"
+    )
+    parser.add_argument(
+        "--esthreads", type=int, default=1, help="Number of threads sending bulk requests in parallel (default: 1)"
+    )
 
 
 def add_build_args(parser):
@@ -46,16 +127,71 @@ def add_build_args(parser):
         parser: Args parser object
     """
     parser.add_argument("--buildurl", required=True, help="URL of build to send")
+    add_http_args(parser)
+
+
+def add_http_args(parser):
+    """
+    Arguments for the requests to the CI server
+
+    Args:
+        parser: Args parser object
+    """
+    parser.add_argument(
+        "--httpconnecttimeout",
+        type=float,
+        default=10,
+        help="Timeout in seconds for connecting to the CI server (default: 10)",
+    )
+    parser.add_argument(
+        "--httptimeout",
+        type=float,
+        default=60,
+        help="Timeout in seconds for waiting for data from the CI server (default: 60)",
+    )
+    parser.add_argument(
+        "--httpretries",
+        type=int,
+        default=3,
+        help="Number of retries of failing requests to the CI server, with exponential backoff (default: 3)",
+    )
+    parser.add_argument(
+        "--httpcachedir",
+        default=None,
+        help="Directory keeping responses of the CI server across runs, e.g. details of jobs and completed builds "
+        "(default: responses are only cached in memory)",
+    )
 
 
 def validate_args(args):
     """
     Performs validation of common arguments provided to hooks.
-    Currently only checks if key and certificate are both provided if either are.
+    Checks that the arguments of the selected backend are set (a port for every LogCollector address) and that
+    key and certificate are both provided if either are.
 
     Args:
         args: arguments parsed from argparser object
     """
+    if getattr(args, "backend", LOGCOLLECTOR_BACKEND) == ELASTICSEARCH_BACKEND:
+        if not (args.eshosts and args.esindex):
+            print("'--eshosts' and '--esindex' must be set for the elasticsearch backend.")
+            sys.exit(1)
+    else:
+        from ebr_connector.logcollector.failover import parse_endpoints  # pylint: disable=import-outside-toplevel
+
+        try:
+            if not parse_endpoints(args.logcollectaddr or [], args.logcollectport):
+                raise ValueError("No LogCollector address given.")
+        except ValueError:
+            print(
+                "'--logcollectaddr' and '--logcollectport' (or a port per address) must be set for the "
+                "logcollector backend."
+            )
+            sys.exit(1)
+        if args.fanout < 1:
+            print("'--fanout' must be at least 1.")
+            sys.exit(1)
+
     if (args.clientcert or args.clientkey) and not (args.clientcert and args.clientkey):
         print("Either both '--clientcert' and '--clientkey' must be set or neither should be set.")
         sys.exit(1)
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cache of JSON responses of the CI server, used by :class:`ebr_connector.hooks.common.jenkins_client.JenkinsClient`.
+
+Entries are kept in memory, the least recently used ones are dropped once `max_entries` is reached. With a
+directory given they are also written to disk, so they survive the process (e.g. across the runs of a hook). The
+on-disk store is not limited in size; expired entries which cannot be revalidated are removed once they are looked
+up again. Errors of the on-disk store (e.g. a full disk) are ignored, the entry is only kept in memory then.
+
+An entry is fresh until it expires and is returned without asking the server. Expired entries with an `ETag` or
+`Last-Modified` header are revalidated with a conditional request: if the server answers `304 Not Modified` the
+cached data is used again.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheEntry:
+    """
+    Cached JSON response.
+
+    Args:
+        data: The decoded JSON data
+        expires: Time stamp (seconds since the epoch) until which the entry is fresh
+        etag: (optional) `ETag` header of the response
+        last_modified: (optional) `Last-Modified` header of the response
+    """
+
+    def __init__(self, data, expires, etag=None, last_modified=None):
+        self.data = data
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self, now=None):
+        """`True` if the entry can be used without revalidation."""
+        return (time.time() if now is None else now) < self.expires
+
+    def validators(self):
+        """Returns the headers of a conditional request revalidating the entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_dict(self):
+        """Returns the entry as dictionary, as stored on disk."""
+        return {"data": self.data, "expires": self.expires, "etag": self.etag, "last_modified": self.last_modified}
+
+
+class ResponseCache:
+    """
+    In-memory LRU cache of JSON responses with optional on-disk store. The cache can be shared between threads.
+
+    Args:
+        max_entries: (optional) maximum number of entries kept in memory (256 if unset)
+        directory: (optional) directory of the on-disk store, created if missing. Nothing is stored on disk if unset.
+        max_entry_size: (optional) responses larger than this number of bytes are not cached (1 MB if unset)
+    """
+
+    def __init__(self, max_entries=256, directory=None, max_entry_size=1024 * 1024):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_entry_size = max_entry_size
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "ResponseCache(entries=%d, hits=%d, revalidations=%d, misses=%d)" % (
+            len(self._entries),
+            self.hits,
+            self.revalidations,
+            self.misses,
+        )
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, key):
+        """Returns the :class:`CacheEntry` of `key` (fresh or not), `None` if there is none."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path) as entry_file:
+                entry = CacheEntry(**json.load(entry_file))
+        except (OSError, ValueError, TypeError):
+            return None
+        if not entry.is_fresh() and not entry.validators():
+            _remove(path)
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry, size=0):
+        """
+        Stores an entry.
+
+        Args:
+            key: Key of the entry, e.g. the requested URL
+            entry: :class:`CacheEntry` to store
+            size: (optional) size in bytes of the response, larger responses than `max_entry_size` are not stored
+        """
+        if size > self.max_entry_size:
+            return
+        self._remember(key, entry)
+        if self.directory:
+            path = self._path(key)
+            temporary_path = "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+            try:
+                with open(temporary_path, "w") as entry_file:
+                    json.dump(entry.to_dict(), entry_file)
+                os.replace(temporary_path, path)
+            except OSError:
+                _remove(temporary_path)
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record(self, hit=False, revalidated=False):
+        """Counts a lookup, a miss unless `hit` or `revalidated` is set."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            elif revalidated:
+                self.revalidations += 1
+            else:
+                self.misses += 1
+
+
+def _remove(path):
+    """Removes a file of the on-disk store, ignoring errors."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+"""
+Measurement of the import time of the CLI entry points, based on `python -X importtime`. Used by the import time
+tests and `benchmarks/bench_import.py`.
+"""
+
+import re
+import subprocess
+import sys
+
+ENTRY_POINTS = (
+    "ebr_connector.hooks.jenkins.store_results",
+    "ebr_connector.hooks.jenkins.backfill",
+    "ebr_connector.hooks.jenkins.poller",
+    "ebr_connector.hooks.junit.store_results",
+    "ebr_connector.hooks.common.replay_spool",
+    "ebr_connector.index.generate_template",
+)
+"""Modules of the CLI entry points, see the `console_scripts` in `setup.py`."""
+
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def import_times(*modules):
+    """
+    Imports the modules in a new interpreter and returns the cumulative import times in seconds of all imported
+    modules as dictionary.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    ).stderr
+    times = {}
+    for line in output.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2)) / 1e6
+    return times
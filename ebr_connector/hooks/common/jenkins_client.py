@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+"""
+HTTP client for the JSON API of Jenkins.
+
+All requests of a :class:`JenkinsClient` share one `requests.Session`, so connections to Jenkins are kept alive
+and reused. Requests time out instead of waiting forever for an overloaded Jenkins and failing requests (connection
+errors and the HTTP status codes in :data:`RETRY_STATUSES`) are retried with exponential backoff. Requests which
+still fail after the last retry raise an error, they are not mistaken for a missing resource.
+
+Responses of :meth:`JenkinsClient.get_json` can be cached, see :mod:`ebr_connector.hooks.common.http_cache`. Details of
+completed builds never change and are cached for :data:`COMPLETED_BUILD_MAX_AGE`, other responses for the `max_age`
+passed by the caller; expired responses are revalidated with conditional requests.
+"""
+
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ebr_connector.hooks.common.http_cache import CacheEntry
+
+DEFAULT_POOL_SIZE = 3
+"""Default number of connections per host kept open, matches the concurrent requests of a hook."""
+
+DEFAULT_STREAM_CHUNK_SIZE = 64 * 1024
+"""Default size in bytes of the chunks returned by :meth:`JenkinsClient.stream_json`."""
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+"""HTTP status codes of responses which are retried."""
+
+COMPLETED_BUILD_MAX_AGE = 7 * 24 * 3600
+"""Seconds the details of a completed build are cached."""
+
+
+class JenkinsClient:
+    """
+    Fetches JSON details of jobs, builds, test reports, etc. from Jenkins.
+
+    The client can be shared between threads. Use it as context manager or call :meth:`close` to close the pooled
+    connections.
+
+    Args:
+        connect_timeout: (optional) timeout in seconds for connecting to Jenkins (10 seconds if unset)
+        read_timeout: (optional) timeout in seconds for waiting for data from Jenkins (60 seconds if unset)
+        retries: (optional) number of retries of a failing request (3 if unset)
+        backoff_factor: (optional) the n-th retry is delayed by `backoff_factor * 2 ** (n - 1)` seconds
+        pool_size: (optional) number of connections per host kept open
+        cache: (optional) :class:`ebr_connector.hooks.common.http_cache.ResponseCache` for the responses of
+        :meth:`get_json`, nothing is cached if unset
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        connect_timeout=10,
+        read_timeout=60,
+        retries=3,
+        backoff_factor=0.5,
+        pool_size=DEFAULT_POOL_SIZE,
+        cache=None,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.cache = cache
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            raise_on_status=True,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get_json(self, url, tree=None, max_age=0):
+        """
+        Returns detailed information in JSON about a job/build/etc. depending on the passed URL.
+
+        Args:
+            url: URL of the job/build/etc., without the `/api/json` suffix
+            tree: (optional) fields to return in the format of the `tree` parameter of the Jenkins API, e.g.
+            `fullName,builds[number,url]`. All fields are returned if unset.
+            max_age: (optional) seconds a cached response is used without asking Jenkins (e.g. for job details which
+            rarely change). Completed builds are cached for :data:`COMPLETED_BUILD_MAX_AGE` regardless.
+
+        Raises:
+            requests.exceptions.RequestException: if Jenkins could not be reached or answered with one of the
+            :data:`RETRY_STATUSES` within the retries
+            json.decoder.JSONDecodeError: if the response is not JSON (e.g. the error page of a missing build)
+        """
+        params = {"tree": tree} if tree else None
+        if self.cache is None:
+            return self.session.get(url + "/api/json", params=params, timeout=self.timeout).json()
+
+        key = url + "/api/json" + ("?tree=" + tree if tree else "")
+        entry = self.cache.get(key)
+        if entry is not None and entry.is_fresh():
+            self.cache.record(hit=True)
+            return entry.data
+
+        headers = entry.validators() if entry is not None else None
+        response = self.session.get(url + "/api/json", params=params, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and entry is not None:
+            self.cache.record(revalidated=True)
+            entry.expires = time.time() + max(max_age, _max_age(entry.data))
+            self.cache.put(key, entry)
+            return entry.data
+
+        data = response.json()
+        self.cache.record()
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        age = max(max_age, _max_age(data))
+        # Responses which would be expired immediately are only kept if they can be revalidated
+        if response.status_code == 200 and (age > 0 or etag or last_modified):
+            self.cache.put(key, CacheEntry(data, time.time() + age, etag, last_modified), len(response.content))
+        return data
+
+    def stream_json(self, url, tree=None, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+        """
+        Requests detailed information in JSON about a job/build/etc. and returns its body as it is received.
+        The request is sent when calling this method, the body is read while iterating.
+
+        Args:
+            url: URL of the job/build/etc., without the `/api/json` suffix
+            tree: (optional) fields to return, see :meth:`get_json`
+            chunk_size: (optional) size in bytes of the returned chunks
+
+        Returns:
+            Generator over the (decompressed) byte chunks of the JSON document, see
+            :func:`ebr_connector.hooks.common.json_stream.iter_items`
+
+        Raises:
+            requests.exceptions.RequestException: see :meth:`get_json`
+        """
+        params = {"tree": tree} if tree else None
+        response = self.session.get(url + "/api/json", params=params, timeout=self.timeout, stream=True)
+        return _iter_content(response, chunk_size)
+
+    def close(self):
+        """Closes the pooled connections."""
+        self.session.close()
+
+
+def _max_age(data):
+    """Returns the seconds the data can be cached regardless of the requested maximum age."""
+    if isinstance(data, dict) and data.get("result") is not None and data.get("building") is not True:
+        return COMPLETED_BUILD_MAX_AGE
+    return 0
+
+
+def _iter_content(response, chunk_size):
+    with response:
+        yield from response.iter_content(chunk_size)
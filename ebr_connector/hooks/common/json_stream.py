@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+
+"""
+Incremental parsing of large JSON documents.
+
+:func:`iter_items` yields the items of an array of a JSON document one at a time while the document is read, so
+neither the raw document nor the complete parsed object tree are held in memory, only one item at a time.
+:func:`iter_nested_items` goes one level deeper for arrays of objects which hold large arrays themselves (e.g. the
+test cases of the suites of a test report) and yields the items of the inner arrays one at a time.
+
+Two parsers are supported:
+
+* `ijson`: Uses `ijson <https://github.com/ICRAR/ijson>`_ if it is installed (C backend if available).
+* `python`: A pure-Python parser based on :meth:`json.JSONDecoder.raw_decode`, used if ijson is not installed.
+"""
+
+import codecs
+import json
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_WHITESPACE = " \t\n\r"
+
+NESTED_ITEM = "nested_item"
+"""Kind of the parts yielded by :func:`iter_nested_items` for each item of an inner array."""
+
+ITEM_END = "item_end"
+"""Kind of the parts yielded by :func:`iter_nested_items` at the end of each item of the outer array."""
+
+_SCALAR_EVENTS = ("null", "boolean", "integer", "double", "number", "string")
+_DEPTH_CHANGES = {"start_map": 1, "start_array": 1, "end_map": -1, "end_array": -1}
+
+
+class JSONStreamError(ValueError):
+    """Raised by :func:`iter_items` if the document is not valid JSON or the key does not hold an array."""
+
+
+def iter_items(chunks, key):
+    """
+    Generator over the items of the array stored under `key` in the top-level object of a JSON document.
+
+    Args:
+        chunks: Iterable of byte chunks of the UTF-8 encoded JSON document
+        key: Key of the array in the top-level object
+
+    Raises:
+        JSONStreamError: if the document is not valid JSON or `key` does not hold an array
+    """
+    if ijson is not None:
+        return _iter_items_ijson(chunks, key)
+    return _iter_items_python(chunks, key)
+
+
+def iter_nested_items(chunks, key, nested_key):
+    """
+    Generator over the items of the arrays stored under `nested_key` in the objects of the array stored under `key`
+    in the top-level object of a JSON document.
+
+    Yields `(NESTED_ITEM, item, nested_item)` for each item of an inner array and `(ITEM_END, item, None)` after
+    each object of the outer array. `item` holds the fields of the object read so far, without the inner array; it
+    is complete at the end of the object.
+
+    Args:
+        chunks: Iterable of byte chunks of the UTF-8 encoded JSON document
+        key: Key of the array of objects in the top-level object
+        nested_key: Key of the inner arrays in the objects
+
+    Raises:
+        JSONStreamError: if the document is not valid JSON, `key` does not hold an array of objects or `nested_key`
+        does not hold an array
+    """
+    if ijson is not None:
+        return _iter_nested_items_ijson(chunks, key, nested_key)
+    return _iter_nested_items_python(chunks, key, nested_key)
+
+
+def _iter_items_ijson(chunks, key):
+    try:
+        yield from ijson.items(_ChunkReader(chunks), key + ".item", use_float=True)
+    except ijson.JSONError as error:
+        raise JSONStreamError("Invalid JSON document: %s" % error) from error
+
+
+def _iter_nested_items_ijson(chunks, key, nested_key):
+    """Builds the items from the parser events of ijson, the values of the fields with its `ObjectBuilder`."""
+    item_prefix = key + ".item"
+    nested_prefix = item_prefix + "." + nested_key
+    item = builder = target = None
+    depth = 0
+    try:
+        for prefix, event, value in ijson.parse(_ChunkReader(chunks), use_float=True):
+            if builder is None:
+                if prefix == item_prefix:
+                    if event == "start_map":
+                        item = {}
+                    elif event == "end_map":
+                        yield ITEM_END, item, None
+                    elif event != "map_key":
+                        raise JSONStreamError("Expected an object in '%s', got %s" % (key, event))
+                    continue
+                if prefix == nested_prefix:
+                    if event not in ("start_array", "end_array"):
+                        raise JSONStreamError("Expected an array in '%s', got %s" % (nested_key, event))
+                    continue
+                if prefix == nested_prefix + ".item":
+                    target = None
+                elif prefix.startswith(item_prefix + ".") and "." not in prefix[len(item_prefix) + 1 :]:
+                    target = prefix[len(item_prefix) + 1 :]
+                else:
+                    continue
+                builder = ijson.ObjectBuilder()
+                depth = 0
+
+            builder.event(event, value)
+            depth += _DEPTH_CHANGES.get(event, 0)
+            if depth == 0 and (event in _SCALAR_EVENTS or event in ("end_map", "end_array")):
+                if target is None:
+                    yield NESTED_ITEM, item, builder.value
+                else:
+                    item[target] = builder.value
+                builder = None
+    except ijson.JSONError as error:
+        raise JSONStreamError("Invalid JSON document: %s" % error) from error
+
+
+def _iter_items_python(chunks, key):
+    try:
+        yield from _PythonParser(chunks).iter_items(key)
+    except ValueError as error:
+        raise JSONStreamError("Invalid JSON document: %s" % error) from error
+
+
+def _iter_nested_items_python(chunks, key, nested_key):
+    try:
+        yield from _PythonParser(chunks).iter_nested_items(key, nested_key)
+    except ValueError as error:
+        raise JSONStreamError("Invalid JSON document: %s" % error) from error
+
+
+class _ChunkReader:
+    """File-like object reading from an iterable of byte chunks, as expected by ijson."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+
+    def read(self, size=-1):
+        """Returns the next non-empty chunk, an empty chunk at the end."""
+        if size == 0:
+            return b""
+        for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b""
+
+
+class _PythonParser:
+    """
+    Walks a JSON document read from byte chunks. Values are decoded with `raw_decode` once the buffer holds them
+    completely; the buffer is at least doubled before a failed decode is attempted again, so large values are not
+    decoded over and over.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._raw_decode = json.JSONDecoder().raw_decode
+        self._buffer = ""
+        self._position = 0
+        self._end_of_input = False
+
+    def _fill(self, min_size=None):
+        """Reads chunks until the unread part of the buffer has `min_size` characters, returns `False` at the end."""
+        if self._position:
+            self._buffer = self._buffer[self._position :]
+            self._position = 0
+        min_size = min_size or len(self._buffer) + 1
+        while len(self._buffer) < min_size:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self._buffer += self._decoder.decode(b"", final=True)
+                self._end_of_input = True
+                return False
+            self._buffer += self._decoder.decode(chunk)
+        return True
+
+    def _peek(self):
+        """Returns the next non-whitespace character without consuming it, an empty string at the end."""
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in _WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._fill():
+                return ""
+
+    def _expect(self, characters):
+        character = self._peek()
+        if not character or character not in characters:
+            raise ValueError("Expected one of '%s' at '%s'" % (characters, self._buffer[self._position :][:20]))
+        self._position += 1
+        return character
+
+    def _value(self):
+        """Decodes the next value."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._raw_decode(self._buffer, self._position)
+            except ValueError:
+                if self._end_of_input:
+                    raise
+            else:
+                # A number might continue in the next chunk, so the value must be followed by another character
+                if end < len(self._buffer) or self._end_of_input:
+                    self._position = end
+                    return value
+            self._fill(2 * (len(self._buffer) - self._position) + 1)
+
+    def iter_items(self, key):
+        """Generator over the items of the array stored under `key` in the top-level object."""
+        return self._iter_member(key, self._iter_array)
+
+    def iter_nested_items(self, key, nested_key):
+        """Generator over the parts of the objects of the array stored under `key`, see :func:`iter_nested_items`."""
+        return self._iter_member(key, lambda: self._iter_array(lambda: self._iter_object(nested_key)))
+
+    def _iter_member(self, key, iter_value):
+        """Walks the top-level object, the value of `key` is read by the generator returned by `iter_value`."""
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            name = self._value()
+            self._expect(":")
+            if name == key:
+                yield from iter_value()
+            else:
+                self._value()
+            if self._expect(",}") == "}":
+                return
+
+    def _iter_array(self, iter_item=None):
+        """Yields the items of an array, or what the generators returned by `iter_item` yield for them."""
+        self._expect("[")
+        if self._peek() == "]":
+            self._position += 1
+            return
+        while True:
+            if iter_item is None:
+                yield self._value()
+            else:
+                yield from iter_item()
+            if self._expect(",]") == "]":
+                return
+
+    def _iter_object(self, nested_key):
+        item = {}
+        self._expect("{")
+        if self._peek() == "}":
+            self._position += 1
+        else:
+            while True:
+                name = self._value()
+                self._expect(":")
+                if name == nested_key:
+                    for nested_item in self._iter_array():
+                        yield NESTED_ITEM, item, nested_item
+                else:
+                    item[name] = self._value()
+                if self._expect(",}") == "}":
+                    break
+        yield ITEM_END, item, None
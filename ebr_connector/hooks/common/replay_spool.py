@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Sends the documents kept in a spool directory to a LogCollector instance.
+"""
+
+import argparse
+import sys
+
+from ebr_connector.hooks.common.args import add_logcollector_args, validate_args
+from ebr_connector.hooks.common.store_results import flush_spool
+from ebr_connector.logcollector.spool import Spool
+
+
+def main():
+    """
+    CLI interface to replay the documents of a spool directory, e.g. after a LogCollector outage.
+    """
+    parser = argparse.ArgumentParser(description="Send the documents of a spool directory to a LogCollector instance.")
+    add_logcollector_args(parser)
+    args = parser.parse_args()
+    validate_args(args)
+    if not args.spooldir:
+        parser.error("the following arguments are required: --spooldir")
+
+    result = flush_spool(args, Spool(args.spooldir))
+    return 1 if result.remaining else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,15 +2,35 @@
 
 """
 Library with convience functions for use in hooks
+
+Hooks run once per build, so their start-up time matters. Heavy dependencies (elasticsearch_dsl, the Elasticsearch
+client, requests, ssl) are imported by the functions which need them instead of at module level, so that the
+arguments are parsed (and e.g. `--help` answered) before they are loaded.
 """
 
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-import requests
 
+from ebr_connector.hooks.common.http_cache import ResponseCache
+from ebr_connector.logcollector.spool import Spool
+from ebr_connector.hooks.common.args import ELASTICSEARCH_BACKEND, add_common_args, add_build_args, validate_args
+
+FETCH_WORKERS = 3
+"""Number of requests to the CI server made concurrently by :func:`assemble_build`."""
+
+JOB_TREE = "fullName"
+"""Fields of the job details used by :func:`assemble_build`, see :func:`get_json_job_details`."""
+
+JOB_MAX_AGE = 3600
+"""Seconds the job details used by :func:`assemble_build` are cached, see :func:`create_jenkins_client`."""
+
+BUILD_TREE = "timestamp,url,result"
+"""Fields of the build details used by :func:`assemble_build`, see :func:`get_json_job_details`."""
 
-from ebr_connector.schema.build_results import BuildResults
-from ebr_connector.hooks.common.args import add_common_args, add_build_args, validate_args
+_DEFAULT_JENKINS_CLIENT = None
+_DEFAULT_JENKINS_CLIENT_LOCK = threading.Lock()
 
 
 def parse_args(description, custom_args=None):
@@ -39,23 +59,41 @@ def status_args(build_status):
     Args:
         args: argparse'd arguments that include the build status
     """
+    from ebr_connector.schema.build_results import BuildResults  # pylint: disable=import-outside-toplevel
+
     return BuildResults.BuildStatus.create(build_status).name
 
 
-def assemble_build(args, retrieve_function, retrieve_args):
+def assemble_build(args, retrieve_function, retrieve_args, client=None):
     """
     Provides a CLI interface to send build results to Elasticsearch
     Requires a callback function for retrieving tests, but gets the status from command line arguments.
 
+    The job details, the build details and the tests (by calling `retrieve_function`) are retrieved concurrently,
+    so the time spent waiting for the CI server is that of the slowest request. The callback is called in a worker
+    thread and should fetch its data when called, not when its result is iterated.
+
     Args:
         args: argparse'd arguments
         retrieve_function: call back argument to decode retrieve and decode tests
         retrieve_args: arguments to the retrieve_function callback
+        client: (optional) :class:`ebr_connector.hooks.common.jenkins_client.JenkinsClient` used for the job and
+        build details, see :func:`create_jenkins_client`
     """
-    job_info = get_json_job_details(args.buildurl)
-    job_name = job_info["fullName"]
+    with ThreadPoolExecutor(FETCH_WORKERS) as executor:
+        job_future = executor.submit(get_json_job_details, args.buildurl, client, JOB_TREE, JOB_MAX_AGE)
+        build_future = executor.submit(get_json_job_details, args.buildurl + "/" + args.buildid, client, BUILD_TREE)
+        tests_future = executor.submit(retrieve_function, *retrieve_args)
+
+        # Loads the schema while waiting for the CI server
+        from ebr_connector.schema.build_results import BuildResults  # pylint: disable=import-outside-toplevel
+
+        job_info = job_future.result()
+        build_info = build_future.result()
+        # Waits for the tests only now, errors of the callback are raised (and handled) within store_tests
+        wait([tests_future])
 
-    build_info = get_json_job_details(args.buildurl + "/" + args.buildid)
+    job_name = job_info["fullName"]
     build_date_time = datetime.utcfromtimestamp(int(build_info["timestamp"]) / 1000).isoformat()
     build_job_url = build_info["url"]
 
@@ -67,12 +105,166 @@ def assemble_build(args, retrieve_function, retrieve_args):
         platform=args.platform,
         product_version=args.productversion,
     )
-    build_results.store_tests(retrieve_function, *retrieve_args)
+    build_results.store_tests(tests_future.result)
     build_results.store_status(status_args, build_info["result"])
 
     return build_results
 
 
+def create_logcollector_client(args):
+    """
+    Creates a :class:`ebr_connector.logcollector.client.LogCollectorClient` from the LogCollector arguments, or a
+    :class:`ebr_connector.logcollector.failover.FailoverClient` if several LogCollectors or a fanout are given.
+
+    Args:
+        args: argparse'd arguments, see :func:`ebr_connector.hooks.common.args.add_logcollector_args`
+    """
+    # pylint: disable=import-outside-toplevel
+    from ebr_connector.logcollector.client import LogCollectorClient
+    from ebr_connector.logcollector.failover import FailoverClient, parse_endpoints
+
+    endpoints = parse_endpoints(args.logcollectaddr, args.logcollectport)
+    if len(endpoints) > 1 or args.fanout > 1:
+        return FailoverClient(
+            endpoints,
+            cafile=args.cacert,
+            clientcert=args.clientcert,
+            clientkey=args.clientkey,
+            keypass=args.clientpassword,
+            timeout=args.sockettimeout,
+            fanout=args.fanout,
+            compression=args.compression,
+        )
+    return LogCollectorClient(
+        *endpoints[0],
+        cafile=args.cacert,
+        clientcert=args.clientcert,
+        clientkey=args.clientkey,
+        keypass=args.clientpassword,
+        timeout=args.sockettimeout,
+        compression=args.compression,
+    )
+
+
+def flush_spool(args, spool, max_attempts=None):
+    """
+    Sends the documents of a spool to the LogCollector given by the arguments and reports the outcome.
+
+    Args:
+        args: argparse'd arguments, see :func:`ebr_connector.hooks.common.args.add_logcollector_args`
+        spool: :class:`ebr_connector.logcollector.spool.Spool` to flush
+        max_attempts: (optional) number of attempts per document, `args.retries` if unset
+
+    Returns:
+        :class:`ebr_connector.logcollector.spool.FlushResult`
+    """
+    with create_logcollector_client(args) as client:
+        result = spool.flush(client, max_attempts=max_attempts or args.retries)
+    print("Sent %d spooled document(s) to the LogCollector." % result.sent)
+    if result.remaining:
+        print(
+            "%d document(s) remain in spool '%s' (last error: %s)." % (result.remaining, spool.directory, result.error)
+        )
+    return result
+
+
+def create_bulk_writer(args):
+    """
+    Creates a :class:`ebr_connector.index.bulk.BulkWriter` from the Elasticsearch arguments.
+
+    Args:
+        args: argparse'd arguments, see :func:`ebr_connector.hooks.common.args.add_elasticsearch_args`
+    """
+    from ebr_connector.index.bulk import BulkWriter, create_client  # pylint: disable=import-outside-toplevel
+
+    client = create_client(args.eshosts, user=args.esuser, password=args.espassword, cafile=args.escacert)
+    return BulkWriter(client, args.esindex, chunk_size=args.eschunksize, thread_count=args.esthreads)
+
+
+def index_builds(args, documents):
+    """
+    Indexes build results directly into Elasticsearch with the bulk API.
+
+    Args:
+        args: argparse'd arguments, see :func:`ebr_connector.hooks.common.args.add_elasticsearch_args`
+        documents: Iterable of :class:`ebr_connector.schema.BuildResults` to index
+
+    Returns:
+        :class:`ebr_connector.index.bulk.BulkResult`
+
+    Raises:
+        elasticsearch.helpers.BulkIndexError: if any of the documents could not be indexed
+    """
+    from elasticsearch.helpers import BulkIndexError  # pylint: disable=import-outside-toplevel
+
+    result = create_bulk_writer(args).write(documents)
+    print("Indexed %d document(s) into '%s'." % (result.success, args.esindex))
+    if result.errors:
+        raise BulkIndexError(
+            "%d document(s) failed to index." % len(result.errors), [item for _, item in result.errors]
+        )
+    return result
+
+
+def save_builds(args, documents, sender):
+    """
+    Sends several build results at once to the backend given by the arguments.
+
+    With the logcollector backend the documents are sent as batch, documents which could not be sent are added to
+    the spool if a spool directory is given. Errors are reported by the returned documents instead of being raised.
+
+    Args:
+        args: argparse'd arguments, see :func:`ebr_connector.hooks.common.args.add_backend_args`
+        documents: List of :class:`ebr_connector.schema.BuildResults` to send
+        sender: :class:`ebr_connector.index.bulk.BulkWriter` for the elasticsearch backend (see
+        :func:`create_bulk_writer`), LogCollector client otherwise (see :func:`create_logcollector_client`)
+
+    Returns:
+        List of the documents which were neither sent nor spooled
+    """
+    if args.backend == ELASTICSEARCH_BACKEND:
+        result = sender.write(documents)
+        return [documents[position] for position, _ in result.errors]
+
+    failed = [result.document for result in sender.send_batch(documents) if not result.success]
+    if failed and args.spooldir:
+        spool = Spool(args.spooldir)
+        for document in failed:
+            spool.put(document)
+        return []
+    return failed
+
+
+def save_build(args, build_results):
+    """
+    Sends build results to the backend given by the arguments.
+
+    With the elasticsearch backend the document is indexed directly, see :func:`index_builds`.
+
+    Without spool directory the document is sent directly (failing over between several LogCollectors, see
+    :func:`create_logcollector_client`) and errors are raised. With spool directory the document
+    is added to the spool first and the spool is flushed afterwards with a single attempt per document, so an
+    unreachable LogCollector does not hold up the build. Documents which cannot be delivered stay in the spool for
+    the next run or `ebr-replay-spool`, which retry them with backoff.
+
+    Args:
+        args: argparse'd arguments, see :func:`ebr_connector.hooks.common.args.add_logcollector_args`
+        build_results: :class:`ebr_connector.schema.BuildResults` to send
+    """
+    if args.backend == ELASTICSEARCH_BACKEND:
+        index_builds(args, [build_results])
+        return
+
+    if not args.spooldir:
+        with create_logcollector_client(args) as client:
+            build_results.save_logcollect(client=client)
+        return
+
+    spool = Spool(args.spooldir)
+    spool.put(build_results)
+    flush_spool(args, spool, max_attempts=1)
+
+
 def normalize_string(value):
     """Some parameterized tests encode the parameter objects into the test case name. For classes that have a
     proper output operator << implemented this is not an issue but classes without one produce a large test
@@ -98,6 +290,58 @@ def normalize_string(value):
     return head.strip()
 
 
-def get_json_job_details(buildurl):
-    """Returns detailed information in JSON about a job/build/etc. depending on the passed URL."""
-    return requests.get(buildurl + "/api/json").json()
+def create_jenkins_client(args, concurrent_builds=1):
+    """
+    Creates a :class:`ebr_connector.hooks.common.jenkins_client.JenkinsClient` from the HTTP arguments. Its
+    connection pool allows the concurrent requests of :func:`assemble_build` to share connections to Jenkins.
+    Responses are cached in memory and, if a cache directory is given, on disk.
+
+    Args:
+        args: argparse'd arguments, see :func:`ebr_connector.hooks.common.args.add_http_args`
+        concurrent_builds: (optional) number of builds assembled concurrently with the client
+    """
+    from ebr_connector.hooks.common.jenkins_client import JenkinsClient  # pylint: disable=import-outside-toplevel
+
+    return JenkinsClient(
+        connect_timeout=args.httpconnecttimeout,
+        read_timeout=args.httptimeout,
+        retries=args.httpretries,
+        pool_size=FETCH_WORKERS * concurrent_builds,
+        cache=ResponseCache(directory=args.httpcachedir),
+    )
+
+
+def get_json_job_details(buildurl, client=None, tree=None, max_age=0):
+    """
+    Returns detailed information in JSON about a job/build/etc. depending on the passed URL.
+
+    Args:
+        buildurl: URL of the job/build/etc.
+        client: (optional) :class:`ebr_connector.hooks.common.jenkins_client.JenkinsClient` to send the request
+        with, a client with default settings shared by all calls without client is used if unset
+        tree: (optional) fields to return in the format of the `tree` parameter of the Jenkins API, all fields
+        are returned if unset
+        max_age: (optional) seconds a cached response is used without asking Jenkins
+    """
+    return (client or _default_jenkins_client()).get_json(buildurl, tree, max_age)
+
+
+def stream_json_job_details(buildurl, client=None, tree=None):
+    """
+    Requests detailed information in JSON about a job/build/etc. depending on the passed URL and returns a generator
+    over the byte chunks of the response as they are received, see :func:`get_json_job_details`.
+    """
+    return (client or _default_jenkins_client()).stream_json(buildurl, tree)
+
+
+def _default_jenkins_client():
+    """Returns the client shared by all calls without client, created by the first one (of any thread)."""
+    global _DEFAULT_JENKINS_CLIENT  # pylint: disable=global-statement
+    with _DEFAULT_JENKINS_CLIENT_LOCK:
+        if _DEFAULT_JENKINS_CLIENT is None:
+            from ebr_connector.hooks.common.jenkins_client import (  # pylint: disable=import-outside-toplevel
+                JenkinsClient,
+            )
+
+            _DEFAULT_JENKINS_CLIENT = JenkinsClient(pool_size=FETCH_WORKERS, cache=ResponseCache())
+    return _DEFAULT_JENKINS_CLIENT
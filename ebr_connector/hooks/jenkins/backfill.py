@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Backfills the results of past builds of a Jenkins job, e.g. when onboarding a job or after a LogCollector outage.
+
+The builds are fetched and decoded by a bounded pool of worker threads sharing one pooled
+:class:`ebr_connector.hooks.common.jenkins_client.JenkinsClient`, and sent in batches. The IDs of the sent builds
+are recorded in a checkpoint file after every batch, so a rerun continues where the previous one stopped.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+import ebr_connector
+from ebr_connector.hooks.common.args import (
+    ELASTICSEARCH_BACKEND,
+    add_backend_args,
+    add_build_args,
+    validate_args,
+)
+from ebr_connector.hooks.common.store_results import (
+    create_bulk_writer,
+    create_jenkins_client,
+    create_logcollector_client,
+    get_json_job_details,
+    save_builds,
+)
+from ebr_connector.hooks.jenkins.store_results import add_jenkins_args, assemble_jenkins_build
+
+RETAINED_BUILDS_TREE = "allBuilds[number,building]"
+"""Fields of the job details listing the retained builds, see :func:`retained_builds`."""
+
+
+class Checkpoint:
+    """
+    IDs of the builds which were sent, kept in a JSON file.
+
+    Args:
+        path: (optional) location of the checkpoint file, nothing is persisted if unset
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.build_ids = set()
+        if path and os.path.exists(path):
+            with open(path) as checkpoint_file:
+                self.build_ids = set(json.load(checkpoint_file))
+
+    def __contains__(self, build_id):
+        return build_id in self.build_ids
+
+    def add(self, build_ids):
+        """Records sent builds and writes the checkpoint file."""
+        self.build_ids.update(build_ids)
+        if not self.path:
+            return
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as checkpoint_file:
+            json.dump(sorted(self.build_ids), checkpoint_file)
+        os.replace(temporary_path, self.path)
+
+
+class BackfillResult:
+    """
+    Outcome of a backfill.
+
+    Args:
+        sent: Number of builds sent (or spooled)
+        skipped: Number of builds skipped because they are in the checkpoint already
+        failed: List of `(build_id, error)` tuples of the builds which could not be fetched (with the error) or
+        sent (with `None` as error)
+        seconds: Time in seconds spent on the backfill
+    """
+
+    def __init__(self, sent=0, skipped=0, failed=None, seconds=0.0):
+        self.sent = sent
+        self.skipped = skipped
+        self.failed = failed or []
+        self.seconds = seconds
+
+    @property
+    def throughput(self):
+        """Throughput in builds per second."""
+        if not self.seconds:
+            return 0.0
+        return self.sent / self.seconds
+
+    def __repr__(self):
+        return "BackfillResult(sent=%d, skipped=%d, failed=%d, seconds=%.3f, throughput=%.2f builds/s)" % (
+            self.sent,
+            self.skipped,
+            len(self.failed),
+            self.seconds,
+            self.throughput,
+        )
+
+
+def retained_builds(job_url, client=None):
+    """
+    Returns the numbers of the completed builds Jenkins retains for a job, oldest first.
+
+    Args:
+        job_url: URL of the Jenkins job
+        client: (optional) :class:`ebr_connector.hooks.common.jenkins_client.JenkinsClient` to fetch them with
+    """
+    job_info = get_json_job_details(job_url, client, RETAINED_BUILDS_TREE)
+    return sorted(build["number"] for build in job_info["allBuilds"] if not build.get("building"))
+
+
+def _assemble_builds(args, client, build_ids, workers):
+    """
+    Generator assembling builds in a pool of `workers` threads, yields `(build_id, build_results, error)` tuples in
+    the order of `build_ids`. At most twice as many builds as workers are in flight.
+    """
+    with ThreadPoolExecutor(workers) as executor:
+        pending = deque()
+        for build_id in build_ids:
+            build_args = argparse.Namespace(**dict(vars(args), buildid=str(build_id)))
+            pending.append((build_id, executor.submit(assemble_jenkins_build, build_args, client)))
+            if len(pending) >= 2 * workers:
+                yield _assembled(*pending.popleft())
+        while pending:
+            yield _assembled(*pending.popleft())
+
+
+def _assembled(build_id, future):
+    try:
+        return build_id, future.result(), None
+    except Exception as error:  # pylint: disable=broad-except
+        return build_id, None, error
+
+
+def backfill(args):
+    """
+    Fetches, decodes and sends the builds of a Jenkins job given by the arguments.
+
+    Args:
+        args: argparse'd arguments, see :func:`main`
+
+    Returns:
+        :class:`BackfillResult`
+    """
+    result = BackfillResult()
+    start = time.monotonic()
+    checkpoint = Checkpoint(args.checkpoint)
+
+    with ExitStack() as stack:
+        client = stack.enter_context(create_jenkins_client(args, args.workers))
+        if args.backend == ELASTICSEARCH_BACKEND:
+            sender = create_bulk_writer(args)
+        else:
+            sender = stack.enter_context(create_logcollector_client(args))
+
+        build_ids = []
+        for build_id in retained_builds(args.buildurl, client):
+            if (args.first is not None and build_id < args.first) or (args.last is not None and build_id > args.last):
+                continue
+            if build_id in checkpoint:
+                result.skipped += 1
+            else:
+                build_ids.append(build_id)
+        print("Backfilling %d build(s), %d already sent before." % (len(build_ids), result.skipped))
+
+        batch = []
+        for build_id, build_results, error in _assemble_builds(args, client, build_ids, args.workers):
+            if error is not None:
+                print("Failed to fetch build %d: %s" % (build_id, error))
+                result.failed.append((build_id, error))
+                continue
+            batch.append((build_id, build_results))
+            if len(batch) >= args.batchsize:
+                _send_batch(args, sender, batch, checkpoint, result, start)
+                batch = []
+        if batch:
+            _send_batch(args, sender, batch, checkpoint, result, start)
+
+    result.seconds = time.monotonic() - start
+    print(
+        "Sent %d build(s) in %.1f s (%.2f builds/s), %d failed."
+        % (result.sent, result.seconds, result.throughput, len(result.failed))
+    )
+    return result
+
+
+def _send_batch(args, sender, batch, checkpoint, result, start):
+    # pylint: disable=too-many-arguments
+    failed = save_builds(args, [build_results for _, build_results in batch], sender)
+    failed_ids = {id(build_results) for build_results in failed}
+    sent_ids = [build_id for build_id, build_results in batch if id(build_results) not in failed_ids]
+    result.failed.extend((build_id, None) for build_id, build_results in batch if id(build_results) in failed_ids)
+    result.sent += len(sent_ids)
+    checkpoint.add(sent_ids)
+
+    result.seconds = time.monotonic() - start
+    print("Sent %d build(s) so far (%.2f builds/s)." % (result.sent, result.throughput))
+
+
+def main():
+    """
+    Provides a CLI interface to send the results of many past builds of a Jenkins job.
+    """
+    parser = argparse.ArgumentParser(description="Send the results of past builds of a Jenkins job.")
+    add_build_args(parser)
+    parser.add_argument("--first", type=int, default=None, help="Number of the first build to send (default: oldest)")
+    parser.add_argument("--last", type=int, default=None, help="Number of the last build to send (default: newest)")
+    parser.add_argument(
+        "-p", "--platform", type=str, default="Linux-x86_64", help="Platform name (default: Linux-x86_64)"
+    )
+    parser.add_argument("-v", "--productversion", type=str, help="Product version")
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Number of builds fetched and decoded concurrently (default: 4)"
+    )
+    parser.add_argument("--batchsize", type=int, default=50, help="Number of builds sent at once (default: 50)")
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="File recording the sent builds. A rerun with the same file skips them (default: no checkpoint)",
+    )
+    add_backend_args(parser)
+    add_jenkins_args(parser)
+    parser.add_argument("--version", action="version", version=ebr_connector.__version__)
+    args = parser.parse_args()
+    validate_args(args)
+
+    result = backfill(args)
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
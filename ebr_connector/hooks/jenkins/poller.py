@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Long-running daemon sending the results of newly completed Jenkins builds.
+
+Instead of starting a hook process for every finished build, the poller periodically asks Jenkins for the last
+completed build of every job in one or more folders (a single small request per folder thanks to the `tree`
+parameter). Newly completed builds are queued and ingested by a fixed number of worker threads sharing one pooled
+:class:`ebr_connector.hooks.common.jenkins_client.JenkinsClient` and one LogCollector client (or Elasticsearch bulk
+writer), which also limits the load on Jenkins and the LogCollector.
+
+Jobs seen for the first time are not backfilled, only builds completed afterwards are sent. Use
+:mod:`ebr_connector.hooks.jenkins.backfill` for the builds before.
+"""
+
+import argparse
+import json
+import os
+import queue
+import signal
+import sys
+import threading
+from contextlib import ExitStack
+from json.decoder import JSONDecodeError
+
+import ebr_connector
+from ebr_connector.hooks.common.args import ELASTICSEARCH_BACKEND, add_backend_args, add_http_args, validate_args
+from ebr_connector.hooks.common.store_results import (
+    BUILD_TREE,
+    create_bulk_writer,
+    create_jenkins_client,
+    create_logcollector_client,
+    get_json_job_details,
+    save_builds,
+)
+from ebr_connector.hooks.jenkins.store_results import add_jenkins_args, assemble_jenkins_build
+
+_SENT = "sent"
+_RUNNING = "running"
+_MISSING = "missing"
+_FAILED = "failed"
+
+
+def folder_tree(depth=3):
+    """
+    Returns the `tree` parameter listing the jobs of a folder with their last completed build, including the jobs
+    of sub-folders up to `depth` levels.
+    """
+    tree = "url,lastCompletedBuild[number]"
+    for _ in range(depth):
+        tree = "url,lastCompletedBuild[number],jobs[%s]" % tree
+    return "jobs[%s]" % tree
+
+
+def iter_jobs(folder_info):
+    """Generator over `(job_url, last_completed_build_number)` of the jobs of a folder and its sub-folders."""
+    for job in folder_info.get("jobs") or []:
+        if job.get("jobs") is not None:
+            yield from iter_jobs(job)
+        elif job.get("lastCompletedBuild"):
+            yield job["url"].rstrip("/"), job["lastCompletedBuild"]["number"]
+
+
+class JenkinsPoller:
+    """
+    Polls Jenkins folders for newly completed builds and ingests them with a pool of worker threads.
+
+    For every job the poller keeps the last build up to which all builds were ingested, and the builds after it
+    which were ingested already. Both are written to the state file after every ingested build. Builds which are
+    still running (Jenkins reports the last completed build, concurrent builds before it may still run) or failed
+    to be ingested are queued again by the next poll. Builds Jenkins does not have (anymore), e.g. deleted ones,
+    are skipped. Builds which failed to be ingested `maxattempts` times are given up and kept in the state file
+    as failed builds, so they can be backfilled once the cause is fixed.
+
+    Args:
+        args: argparse'd arguments, see :func:`main`
+        client: :class:`ebr_connector.hooks.common.jenkins_client.JenkinsClient` shared by all requests
+        sender: LogCollector client or bulk writer shared by all workers, see
+        :func:`ebr_connector.hooks.common.store_results.save_builds`
+    """
+
+    def __init__(self, args, client, sender):
+        self.args = args
+        self.client = client
+        self.sender = sender
+        self.last_builds = {}
+        self.ingested_builds = {}
+        self.failed_builds = {}
+        if args.statefile and os.path.exists(args.statefile):
+            with open(args.statefile) as state_file:
+                state = json.load(state_file)
+            self.last_builds = state["last_builds"]
+            self.ingested_builds = {job_url: set(builds) for job_url, builds in state["ingested_builds"].items()}
+            self.failed_builds = {job_url: set(builds) for job_url, builds in state.get("failed_builds", {}).items()}
+
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0
+        self._queue = queue.Queue(args.queuesize)
+        self._pending = set()
+        self._attempts = {}
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def poll(self):
+        """
+        Queues the builds completed since the last poll, and the ones which were running or failed to be ingested
+        before. Blocks while the queue is full.
+
+        Returns:
+            List of `(job_url, build_id)` tuples of the queued builds
+        """
+        queued = []
+        tree = folder_tree(self.args.depth)
+        for folder in self.args.folders:
+            try:
+                folder_info = get_json_job_details(folder.rstrip("/"), self.client, tree)
+            except (OSError, ValueError) as error:
+                print("Failed to poll folder '%s': %s" % (folder, error))
+                continue
+
+            with self._lock:
+                for job_url, last_build in iter_jobs(folder_info):
+                    if job_url not in self.last_builds:
+                        # Jobs seen for the first time are not backfilled
+                        self.last_builds[job_url] = last_build
+                        continue
+                    ingested = self.ingested_builds.get(job_url, ())
+                    for build_id in range(self.last_builds[job_url] + 1, last_build + 1):
+                        if build_id not in ingested and (job_url, build_id) not in self._pending:
+                            self._pending.add((job_url, build_id))
+                            queued.append((job_url, build_id))
+                self._save_state()
+
+        for item in queued:
+            self._queue.put(item)
+        return queued
+
+    def _save_state(self):
+        """Writes the state file, must be called with the lock held."""
+        if not self.args.statefile:
+            return
+        state = {
+            "last_builds": self.last_builds,
+            "ingested_builds": {job_url: sorted(builds) for job_url, builds in self.ingested_builds.items()},
+            "failed_builds": {job_url: sorted(builds) for job_url, builds in self.failed_builds.items()},
+        }
+        temporary_path = self.args.statefile + ".tmp"
+        with open(temporary_path, "w") as state_file:
+            json.dump(state, state_file)
+        os.replace(temporary_path, self.args.statefile)
+
+    def _mark_ingested(self, job_url, build_id):
+        """Records an ingested build and moves the last build of the job past all builds ingested in a row."""
+        ingested = self.ingested_builds.setdefault(job_url, set())
+        ingested.add(build_id)
+        while self.last_builds[job_url] + 1 in ingested:
+            self.last_builds[job_url] += 1
+            ingested.remove(self.last_builds[job_url])
+        if not ingested:
+            del self.ingested_builds[job_url]
+        self._save_state()
+
+    def ingest(self, job_url, build_id):
+        """
+        Fetches a build and sends it, errors are reported and do not stop the poller. Builds which are still running
+        are skipped, they are queued again by the next poll, as are builds which failed to be ingested fewer than
+        `maxattempts` times.
+        """
+        try:
+            outcome = self._ingest(job_url, build_id)
+        except Exception as error:  # pylint: disable=broad-except
+            print("Failed to ingest build %d of '%s': %s" % (build_id, job_url, error))
+            outcome = _FAILED
+        with self._lock:
+            self._pending.discard((job_url, build_id))
+            if outcome == _RUNNING:
+                return
+            if outcome == _FAILED:
+                self.failed += 1
+                attempts = self._attempts.get((job_url, build_id), 0) + 1
+                if attempts < self.args.maxattempts:
+                    self._attempts[(job_url, build_id)] = attempts
+                    return
+                print("Giving up build %d of '%s' after %d failed attempts." % (build_id, job_url, attempts))
+                self._attempts.pop((job_url, build_id), None)
+                self.failed_builds.setdefault(job_url, set()).add(build_id)
+            elif outcome == _MISSING:
+                self.skipped += 1
+            else:
+                self.sent += 1
+            self._mark_ingested(job_url, build_id)
+
+    def _ingest(self, job_url, build_id):
+        """Fetches a build and sends it, returns the outcome."""
+        try:
+            # Completed builds are cached by the client, so assembling the build does not fetch them again
+            build_info = get_json_job_details(job_url + "/" + str(build_id), self.client, BUILD_TREE)
+        except JSONDecodeError:
+            # Jenkins answers with an error page instead of JSON for builds it does not have
+            print("Skipping build %d of '%s', Jenkins does not have it." % (build_id, job_url))
+            return _MISSING
+        if build_info.get("result") is None:
+            return _RUNNING
+
+        build_args = argparse.Namespace(**dict(vars(self.args), buildurl=job_url, buildid=str(build_id)))
+        build_results = assemble_jenkins_build(build_args, self.client)
+        return _FAILED if save_builds(self.args, [build_results], self.sender) else _SENT
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self.ingest(*item)
+            finally:
+                self._queue.task_done()
+
+    def run(self):
+        """Polls until :meth:`stop` is called, then ingests the queued builds and returns."""
+        workers = [threading.Thread(target=self._work, daemon=True) for _ in range(self.args.workers)]
+        for worker in workers:
+            worker.start()
+
+        while not self._stopped.is_set():
+            queued = self.poll()
+            if queued:
+                print("Queued %d new build(s)." % len(queued))
+            self._stopped.wait(self.args.interval)
+
+        for _ in workers:
+            self._queue.put(None)
+        for worker in workers:
+            worker.join()
+        print("Sent %d build(s), %d failed, %d skipped." % (self.sent, self.failed, self.skipped))
+
+    def stop(self, *_):
+        """Makes :meth:`run` return after the current poll, can be used as signal handler."""
+        self._stopped.set()
+
+
+def main():
+    """
+    Provides a CLI interface to run the poller until it is interrupted (SIGINT or SIGTERM).
+    """
+    parser = argparse.ArgumentParser(description="Send the results of newly completed Jenkins builds continuously.")
+    parser.add_argument("--folders", nargs="+", required=True, help="URLs of the Jenkins folders (or views) to poll")
+    parser.add_argument(
+        "--depth", type=int, default=3, help="Levels of sub-folders whose jobs are polled as well (default: 3)"
+    )
+    parser.add_argument("--interval", type=float, default=60, help="Seconds between two polls (default: 60)")
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Number of builds fetched and sent concurrently (default: 4)"
+    )
+    parser.add_argument(
+        "--queuesize", type=int, default=1000, help="Maximum number of builds waiting to be ingested (default: 1000)"
+    )
+    parser.add_argument(
+        "--maxattempts",
+        type=int,
+        default=3,
+        help="Number of times ingesting a build is attempted before it is given up and recorded as failed in the "
+        "state file (default: 3)",
+    )
+    parser.add_argument(
+        "--statefile",
+        default=None,
+        help="File keeping the ingested builds of every job, so builds completed during a restart or still queued "
+        "are not missed (default: no state, builds completed while the poller is not running are skipped)",
+    )
+    parser.add_argument(
+        "-p", "--platform", type=str, default="Linux-x86_64", help="Platform name (default: Linux-x86_64)"
+    )
+    parser.add_argument("-v", "--productversion", type=str, help="Product version")
+    add_http_args(parser)
+    add_backend_args(parser)
+    add_jenkins_args(parser)
+    parser.add_argument("--version", action="version", version=ebr_connector.__version__)
+    args = parser.parse_args()
+    validate_args(args)
+
+    with ExitStack() as stack:
+        client = stack.enter_context(create_jenkins_client(args, args.workers))
+        if args.backend == ELASTICSEARCH_BACKEND:
+            sender = create_bulk_writer(args)
+        else:
+            sender = stack.enter_context(create_logcollector_client(args))
+
+        poller = JenkinsPoller(args, client, sender)
+        signal.signal(signal.SIGINT, poller.stop)
+        signal.signal(signal.SIGTERM, poller.stop)
+        poller.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
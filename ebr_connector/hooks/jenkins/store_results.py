@@ -5,12 +5,70 @@
 Library for exporting Jenkins build results (including tests) to Elasticsearch
 """
 
+import multiprocessing
 import sys
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from json.decoder import JSONDecodeError
 
 import ebr_connector
-from ebr_connector.hooks.common.store_results import assemble_build, parse_args, normalize_string
-from ebr_connector.schema.build_results import Test
+from ebr_connector.hooks.common.store_results import (
+    assemble_build,
+    create_jenkins_client,
+    parse_args,
+    normalize_string,
+    save_build,
+)
+
+
+SUITE_FIELDS = ("name", "duration")
+"""Fields of the test suites of a Jenkins test report consumed by :func:`jenkins_json_records`."""
+
+CASE_FIELDS = ("className", "name", "status", "errorDetails", "duration")
+"""Fields of the test cases of a Jenkins test report consumed by :func:`jenkins_json_records`."""
+
+DECODE_CHUNK_CASES = 5000
+"""Minimum number of test cases of the suites sent at once to a decoding process, see :func:`decode_suites`."""
+
+
+def jenkins_report_tree(extra_case_fields=()):
+    """
+    Returns the `tree` parameter limiting the Jenkins test report to the fields consumed by
+    :func:`jenkins_json_records`, leaving out e.g. the output and stack traces of the test cases.
+
+    Args:
+        extra_case_fields: (optional) further fields of the test cases to include
+    """
+    case_fields = list(CASE_FIELDS) + [field for field in extra_case_fields if field not in CASE_FIELDS]
+    return "suites[%s,cases[%s]]" % (",".join(SUITE_FIELDS), ",".join(case_fields))
+
+
+def add_jenkins_args(parser):
+    """
+    Arguments specific to the Jenkins hook
+
+    Args:
+        parser: Args parser object
+    """
+    parser.add_argument(
+        "--streamreport",
+        action="store_true",
+        help="Parse the Jenkins test report while it is received instead of loading it completely into memory first",
+    )
+    parser.add_argument(
+        "--casefields",
+        nargs="+",
+        default=[],
+        help="Further fields of the test cases to request from the Jenkins test report (default: only the fields "
+        "stored in the build results: %s)" % ", ".join(CASE_FIELDS),
+    )
+    parser.add_argument(
+        "--decodeworkers",
+        type=int,
+        default=1,
+        help="Number of processes decoding the test suites of the Jenkins test report in parallel, worthwhile for "
+        "reports with many thousands of test cases (default: 1, decode in the hook process)",
+    )
 
 
 def jenkins_json_decode(url):
@@ -20,66 +78,240 @@ def jenkins_json_decode(url):
     Args:
         url: URL to Jenkins build to record
     """
+    from ebr_connector.schema.build_results import TEST_RECORD  # pylint: disable=import-outside-toplevel
+
     results = {"tests": [], "suites": []}
+    for record_type, record in jenkins_json_records(url):
+        if record_type == TEST_RECORD:
+            results["tests"].append(record)
+        else:
+            results["suites"].append(record)
+    return results
+
+
+def jenkins_json_records(url, client=None, tree=None, workers=1):
+    """
+    Fetches the test results stored by Jenkins and returns a generator transforming them into test and suite
+    records one at a time, as consumed by :meth:`ebr_connector.schema.BuildResults.store_tests`. The records of the
+    test cases of a suite are followed by the record of the suite itself.
+
+    The test results are fetched when this function is called, so that
+    :func:`ebr_connector.hooks.common.store_results.assemble_build` fetches them concurrently to the build details.
+
+    Args:
+        url: URL to Jenkins build to record
+        client: (optional) :class:`ebr_connector.hooks.common.jenkins_client.JenkinsClient` to fetch the test
+        results with
+        tree: (optional) fields of the test report to fetch, see :func:`jenkins_report_tree`. The whole test report
+        is fetched if unset.
+        workers: (optional) number of processes decoding the test suites, see :func:`decode_suites`
+    """
     try:
-        json_results = ebr_connector.hooks.common.store_results.get_json_job_details(url)
+        json_results = ebr_connector.hooks.common.store_results.get_json_job_details(url, client, tree)
     except JSONDecodeError:
         print("Received error when parsing test results, no results will be included in build.")
-        return results
+        return iter(())
+    return decode_suites(json_results["suites"], workers)
+
 
-    for suite in json_results["suites"]:
-        failed_case_no = 0
-        passed_case_no = 0
-        skipped_case_no = 0
+def jenkins_json_stream_records(url, client=None, tree=None, workers=1):
+    """
+    Counterpart of :func:`jenkins_json_records` parsing the test results while they are received, see
+    :func:`ebr_connector.hooks.common.json_stream.iter_nested_items`. The test cases are decoded one at a time as
+    they are read. Their records are yielded right away if the name of their suite was read before them. Jenkins
+    lists it after the cases though, so usually the test records of a suite are held until the end of the suite;
+    only the consumed fields of the cases are kept, the raw suite is never held in memory.
+
+    With more than one worker whole test suites are parsed one at a time and sent to the decoding processes, see
+    :func:`decode_suites`.
+
+    The test results are requested when this function is called and read while the records are consumed.
+    """
+    # pylint: disable=import-outside-toplevel
+    from ebr_connector.hooks.common.json_stream import iter_items, iter_nested_items
+
+    chunks = ebr_connector.hooks.common.store_results.stream_json_job_details(url, client, tree)
+    if workers > 1:
+        return _jenkins_stream_records(decode_suites(iter_items(chunks, "suites"), workers))
+    return _jenkins_stream_records(_jenkins_streamed_suite_records(iter_nested_items(chunks, "suites", "cases")))
+
+
+def _jenkins_stream_records(records):
+    """
+    Passes on the records of a streamed test report. Like :func:`jenkins_json_records` only errors of the JSON
+    document end the results, invalid test data is raised.
+    """
+    from ebr_connector.hooks.common.json_stream import JSONStreamError  # pylint: disable=import-outside-toplevel
+
+    try:
+        yield from records
+    except JSONStreamError:
+        print("Received error when parsing test results, no further results will be included in build.")
+
+
+def decode_suites(suites, workers=1):
+    """
+    Returns a generator transforming the test suites of a Jenkins test report into test and suite records, see
+    :func:`jenkins_json_records`.
+
+    With more than one worker the suites are decoded and counted by a pool of processes. Consecutive suites are sent
+    to the processes in chunks of at least :data:`DECODE_CHUNK_CASES` test cases. The test cases of a chunk are
+    returned as a single :data:`ebr_connector.schema.build_results.TEST_STORE_RECORD`, which is much cheaper to send
+    between processes than the single test records, followed by the suite records. The chunks are yielded in the
+    order of the suites, so the build results are the same as without workers. At most twice as many chunks as
+    workers are in flight, so `suites` can be a generator, e.g. of a streamed test report. The processes are
+    spawned rather than forked, since the hook runs other threads (e.g. fetching the build details) whose locks a
+    forked process could inherit in a locked state.
+
+    Args:
+        suites: Iterable of the test suites of a Jenkins test report
+        workers: (optional) number of processes, the suites are decoded while the records are consumed if 1
+    """
+    if workers <= 1:
+        return _jenkins_suite_records(suites)
+    return _parallel_suite_records(suites, workers)
+
+
+def _parallel_suite_records(suites, workers):
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending = deque()
+        for chunk in _suite_chunks(suites):
+            pending.append(executor.submit(_decode_suite_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _suite_chunks(suites):
+    """Groups consecutive suites into lists with at least :data:`DECODE_CHUNK_CASES` test cases (but the last)."""
+    chunk = []
+    case_count = 0
+    for suite in suites:
+        chunk.append(suite)
+        case_count += len(suite["cases"])
+        if case_count >= DECODE_CHUNK_CASES:
+            yield chunk
+            chunk = []
+            case_count = 0
+    if chunk:
+        yield chunk
+
+
+def _decode_suite_chunk(suites):
+    # pylint: disable=import-outside-toplevel
+    from ebr_connector.schema.build_results import TEST_RECORD, TEST_STORE_RECORD
+    from ebr_connector.schema.test_store import TestStore
+
+    test_store = TestStore()
+    records = [(TEST_STORE_RECORD, test_store)]
+    for record_type, record in _jenkins_suite_records(suites):
+        if record_type == TEST_RECORD:
+            test_store.append(**record)
+        else:
+            records.append((record_type, record))
+    return records
+
+
+def _jenkins_suite_records(suites):
+    # pylint: disable=import-outside-toplevel
+    from ebr_connector.schema.build_results import TEST_RECORD, SUITE_RECORD
+
+    for suite in suites:
+        result_counts = Counter()
+        suite_name = normalize_string(suite["name"])
         for case in suite["cases"]:
-            # Create Test.Result enum based on string
-            test_result = Test.Result.create(normalize_string(case["status"]))
-
-            test = {
-                "suite": normalize_string(suite["name"]),
-                "classname": normalize_string(case["className"]),
-                "test": normalize_string(case["name"]),
-                "result": test_result.name,
-                "message": normalize_string(case["errorDetails"]),
-                "duration": float(case["duration"]),
-            }
-
-            if test_result == Test.Result.FAILED:
-                failed_case_no += 1
-            elif test_result == Test.Result.SKIPPED:
-                skipped_case_no += 1
+            test = _jenkins_test_record(suite_name, case)
+            result_counts[test["result"]] += 1
+            yield TEST_RECORD, test
+        yield SUITE_RECORD, _jenkins_suite_record(suite, result_counts)
+
+
+def _jenkins_streamed_suite_records(parts):
+    """
+    Transforms the parts of a streamed test report (see
+    :func:`ebr_connector.hooks.common.json_stream.iter_nested_items`) into test and suite records. Test records
+    are held until the end of their suite if its name has not been read yet.
+    """
+    # pylint: disable=import-outside-toplevel
+    from ebr_connector.hooks.common.json_stream import NESTED_ITEM
+    from ebr_connector.schema.build_results import TEST_RECORD, SUITE_RECORD
+
+    result_counts = Counter()
+    pending = []
+    for part, suite, case in parts:
+        if part == NESTED_ITEM:
+            test = _jenkins_test_record(normalize_string(suite["name"]) if "name" in suite else None, case)
+            result_counts[test["result"]] += 1
+            if test["suite"] is None:
+                pending.append(test)
             else:
-                passed_case_no += 1
+                yield TEST_RECORD, test
+            continue
 
-            results["tests"].append(test)
-        suite_result = {
-            "failures_count": failed_case_no,
-            "skipped_count": skipped_case_no,
-            "passed_count": passed_case_no,
-            "total_count": len(suite["cases"]),
-            "name": normalize_string(suite["name"]),
-            "duration": float(suite["duration"]),
-        }
+        suite_name = normalize_string(suite["name"])
+        for test in pending:
+            test["suite"] = suite_name
+            yield TEST_RECORD, test
+        yield SUITE_RECORD, _jenkins_suite_record(suite, result_counts)
+        result_counts = Counter()
+        pending = []
 
-        results["suites"].append(suite_result)
 
-    return results
+def _jenkins_test_record(suite_name, case):
+    from ebr_connector.schema.build_results import Test  # pylint: disable=import-outside-toplevel
+
+    # Create Test.Result enum based on string
+    test_result = Test.Result.create(normalize_string(case["status"]))
+    return {
+        "suite": suite_name,
+        "classname": normalize_string(case["className"]),
+        "test": normalize_string(case["name"]),
+        "result": test_result.name,
+        "message": normalize_string(case["errorDetails"]),
+        "duration": float(case["duration"]),
+    }
+
+
+def _jenkins_suite_record(suite, result_counts):
+    """Returns the record of a suite whose test cases had the given counts of result names."""
+    from ebr_connector.schema.build_results import Test  # pylint: disable=import-outside-toplevel
+
+    total_count = sum(result_counts.values())
+    failed_case_no = result_counts[Test.Result.FAILED.name]
+    skipped_case_no = result_counts[Test.Result.SKIPPED.name]
+    return {
+        "failures_count": failed_case_no,
+        "skipped_count": skipped_case_no,
+        "passed_count": total_count - failed_case_no - skipped_case_no,
+        "total_count": total_count,
+        "name": normalize_string(suite["name"]),
+        "duration": float(suite["duration"]),
+    }
+
+
+def assemble_jenkins_build(args, client):
+    """
+    Fetches the details and the test report of the Jenkins build given by the arguments.
+
+    Args:
+        args: argparse'd arguments, see :func:`add_jenkins_args`
+        client: :class:`ebr_connector.hooks.common.jenkins_client.JenkinsClient` to fetch the data with
+
+    Returns:
+        :class:`ebr_connector.schema.BuildResults`
+    """
+    report_url = args.buildurl + "/" + args.buildid + "/testReport/api/json"
+    retrieve_function = jenkins_json_stream_records if args.streamreport else jenkins_json_records
+    retrieve_args = [report_url, client, jenkins_report_tree(args.casefields), args.decodeworkers]
+    return assemble_build(args, retrieve_function, retrieve_args, client)
 
 
 def store(args):
     """Fetches the test report from Jenkins and stores the data into logstash."""
-    jenkins_build = assemble_build(
-        args, jenkins_json_decode, [args.buildurl + "/" + args.buildid + "/testReport/api/json"]
-    )
-    jenkins_build.save_logcollect(
-        args.logcollectaddr,
-        args.logcollectport,
-        cafile=args.cacert,
-        clientcert=args.clientcert,
-        clientkey=args.clientkey,
-        keypass=args.clientpassword,
-        timeout=args.sockettimeout,
-    )
+    with create_jenkins_client(args) as client:
+        jenkins_build = assemble_jenkins_build(args, client)
+    save_build(args, jenkins_build)
     return jenkins_build
 
 
@@ -87,7 +319,7 @@ def main():
     """
     Provides a CLI interface callable on Jenkins to send build results to Elasticsearch.
     """
-    args = parse_args("Send results of a Jenkins build to a LogCollector instance over TCP.")
+    args = parse_args("Send results of a Jenkins build to a LogCollector instance over TCP.", add_jenkins_args)
     store(args)
 
 
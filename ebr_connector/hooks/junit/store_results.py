@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Library for exporting the results of JUnit/xUnit XML test reports written by a build to Elasticsearch.
+
+The reports are read directly from disk instead of from the test report of the Jenkins API, which saves Jenkins from
+parsing, storing and serializing them again. They are parsed incrementally with
+:func:`xml.etree.ElementTree.iterparse`, dropping every test case once it is turned into a record, so even very large
+reports are parsed in constant memory. Several reports can be parsed in parallel by a pool of processes.
+
+The job and build details are still fetched from Jenkins, see
+:func:`ebr_connector.hooks.common.store_results.assemble_build`.
+"""
+
+import glob
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree.ElementTree import ParseError, iterparse
+
+from ebr_connector.hooks.common.store_results import (
+    assemble_build,
+    create_jenkins_client,
+    parse_args,
+    normalize_string,
+    save_build,
+)
+
+FAILED_ELEMENTS = ("failure", "error")
+"""Child elements of a test case marking it as failed."""
+
+SKIPPED_ELEMENTS = ("skipped",)
+"""Child elements of a test case marking it as skipped."""
+
+
+def add_junit_args(parser):
+    """
+    Arguments specific to the JUnit hook
+
+    Args:
+        parser: Args parser object
+    """
+    parser.add_argument(
+        "--reports",
+        nargs="+",
+        required=True,
+        help="Glob patterns of the JUnit XML reports, e.g. 'build/test-results/**/*.xml'",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes parsing reports in parallel, worthwhile for many large reports (default: 1, parse "
+        "in the hook process)",
+    )
+
+
+def find_reports(patterns):
+    """Returns the sorted paths of the files matching the glob patterns, each path once."""
+    paths = set()
+    for pattern in patterns:
+        paths.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(paths)
+
+
+def junit_xml_records(patterns, workers=1):
+    """
+    Returns a generator transforming the test results of JUnit XML reports into test and suite records one at a time,
+    as consumed by :meth:`ebr_connector.schema.BuildResults.store_tests`. The records of the test cases of a suite are
+    followed by the record of the suite itself, the reports are read in the order of their paths.
+
+    With more than one worker the reports are parsed by a pool of processes. The test cases of a report are returned
+    as a single :data:`ebr_connector.schema.build_results.TEST_STORE_RECORD`, which is much cheaper to send between
+    processes than the single test records, followed by the suite records of the report. The reports are yielded in
+    the order of their paths, so the build results are the same as without workers. At most twice as many reports as
+    workers are in flight. The processes are spawned rather than forked, see
+    :func:`ebr_connector.hooks.jenkins.store_results.decode_suites`.
+
+    Args:
+        patterns: Glob patterns of the reports, see :func:`find_reports`
+        workers: (optional) number of processes parsing reports in parallel, the reports are parsed in the calling
+        process while the records are consumed if 1
+    """
+    paths = find_reports(patterns)
+    if not paths:
+        print("No test reports match %s, no results will be included in build." % ", ".join(patterns))
+    if workers <= 1 or len(paths) <= 1:
+        return _serial_records(paths)
+    return _parallel_records(paths, workers)
+
+
+def _serial_records(paths):
+    for path in paths:
+        yield from junit_file_records(path)
+
+
+def _parallel_records(paths, workers):
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending = deque()
+        for path in paths:
+            pending.append(executor.submit(_junit_file_store_records, path))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _junit_file_store_records(path):
+    # pylint: disable=import-outside-toplevel
+    from ebr_connector.schema.build_results import TEST_RECORD, TEST_STORE_RECORD
+    from ebr_connector.schema.test_store import TestStore
+
+    test_store = TestStore()
+    records = [(TEST_STORE_RECORD, test_store)]
+    for record_type, record in junit_file_records(path):
+        if record_type == TEST_RECORD:
+            test_store.append(**record)
+        else:
+            records.append((record_type, record))
+    return records
+
+
+def junit_file_records(path):
+    """
+    Generator over the test and suite records of a single JUnit XML report, see :func:`junit_xml_records`.
+
+    The report can have a `testsuites` or a `testsuite` root element, test suites can be nested. If the report is
+    not well-formed, the error is reported and the records parsed up to the error are kept.
+
+    Args:
+        path: Location of the report
+    """
+    # pylint: disable=import-outside-toplevel
+    from ebr_connector.schema.build_results import Test, TEST_RECORD, SUITE_RECORD
+
+    # Stack of [element, name, failed, passed, skipped, cases duration] of the enclosing test suites
+    suites = []
+    try:
+        for event, element in iterparse(path, events=("start", "end")):
+            if element.tag == "testsuite":
+                if event == "start":
+                    suites.append([element, normalize_string(element.get("name")), 0, 0, 0, 0.0])
+                    continue
+                suite_element, name, failed, passed, skipped, cases_duration = suites.pop()
+                yield SUITE_RECORD, {
+                    "failures_count": failed,
+                    "skipped_count": skipped,
+                    "passed_count": passed,
+                    "total_count": failed + passed + skipped,
+                    "name": name,
+                    "duration": _seconds(suite_element.get("time"), cases_duration),
+                }
+                # Drops the suite and its remaining children, e.g. properties and output
+                if suites:
+                    del suites[-1][0][:]
+                else:
+                    suite_element.clear()
+
+            elif element.tag == "testcase" and event == "end" and suites:
+                suite = suites[-1]
+                test_result, message = _case_result(element)
+                duration = _seconds(element.get("time"))
+                yield TEST_RECORD, {
+                    "suite": suite[1],
+                    "classname": normalize_string(element.get("classname")),
+                    "test": normalize_string(element.get("name")),
+                    "result": test_result.name,
+                    "message": normalize_string(message),
+                    "duration": duration,
+                }
+
+                if test_result == Test.Result.FAILED:
+                    suite[2] += 1
+                elif test_result == Test.Result.SKIPPED:
+                    suite[4] += 1
+                else:
+                    suite[3] += 1
+                suite[5] += duration
+                # Drops the test case and everything before it, the suite keeps no children
+                del suite[0][:]
+    except (ParseError, OSError) as error:
+        print("Failed to parse test report '%s': %s, no further results of it will be included." % (path, error))
+
+
+def _case_result(case):
+    """Returns the :class:`ebr_connector.schema.Test.Result` and the message of a test case element."""
+    from ebr_connector.schema.build_results import Test  # pylint: disable=import-outside-toplevel
+
+    for child in case:
+        if child.tag in FAILED_ELEMENTS or child.tag in SKIPPED_ELEMENTS:
+            message = child.get("message") or child.text
+            return Test.Result.create(child.tag), message
+    return Test.Result.create("passed"), None
+
+
+def _seconds(value, default=0.0):
+    """Converts a `time` attribute (seconds, possibly with thousands separators) into a float."""
+    if not value:
+        return default
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        return default
+
+
+def store(args):
+    """Parses the test reports and stores the data into the backend, fetching the build details from Jenkins."""
+    with create_jenkins_client(args) as client:
+        build_results = assemble_build(args, junit_xml_records, [args.reports, args.workers], client)
+    save_build(args, build_results)
+    return build_results
+
+
+def main():
+    """
+    Provides a CLI interface callable on Jenkins to send the results of JUnit XML reports to Elasticsearch.
+    """
+    args = parse_args("Send results of JUnit XML test reports to a LogCollector instance over TCP.", add_junit_args)
+    store(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
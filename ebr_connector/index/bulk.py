@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+"""
+Indexes :class:`ebr_connector.schema.BuildResults` documents directly into Elasticsearch using the bulk API.
+
+This is an alternative to sending the documents to a LogCollector instance, e.g. for backfilling many builds.
+Documents are encoded with :mod:`ebr_connector.schema.serializer` and handed over to the bulk helpers of the
+Elasticsearch client as they are, without going through `to_dict()`.
+"""
+
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import parallel_bulk, streaming_bulk
+
+
+class BulkResult:
+    """
+    Outcome of indexing documents with :class:`BulkWriter`.
+
+    Args:
+        success: Number of documents indexed
+        errors: List of `(position, item)` tuples for every document which failed. `position` is the index of the
+        document in the iterable passed to :meth:`BulkWriter.write`, `item` the error reported by Elasticsearch.
+    """
+
+    def __init__(self, success=0, errors=None):
+        self.success = success
+        self.errors = errors or []
+
+    def __repr__(self):
+        return "BulkResult(success=%d, errors=%d)" % (self.success, len(self.errors))
+
+
+class BulkWriter:
+    """
+    Writes documents to an Elasticsearch index with the bulk API.
+
+    Args:
+        client: Elasticsearch client, see :func:`create_client`
+        index: Name of the index (or alias) to write to
+        chunk_size: (optional) number of documents sent in one bulk request (default: 100)
+        max_chunk_bytes: (optional) maximum size in bytes of one bulk request (default: 50 MB)
+        thread_count: (optional) number of threads sending bulk requests in parallel (default: 1, no extra threads)
+        backend: (optional) JSON backend used to encode the documents, see :mod:`ebr_connector.schema.serializer`
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, client, index, chunk_size=100, max_chunk_bytes=50 * 1024 * 1024, thread_count=1, backend="auto"):
+        self.client = client
+        self.index = index
+        self.chunk_size = chunk_size
+        self.max_chunk_bytes = max_chunk_bytes
+        self.thread_count = thread_count
+        self.backend = backend
+
+    def _actions(self, documents):
+        for document in documents:
+            yield {
+                "_op_type": "index",
+                "_index": self.index,
+                "_type": document._doc_type.name,  # pylint: disable=protected-access
+                # Pre-encoded sources are passed through by the serializer of the client
+                "_source": document.to_json(self.backend).decode("utf-8"),
+            }
+
+    def write(self, documents):
+        """
+        Indexes the documents. Errors of single documents (including failed requests) are reported in the result
+        instead of being raised.
+
+        Args:
+            documents: Iterable of :class:`ebr_connector.schema.BuildResults`, consumed lazily
+
+        Returns:
+            :class:`BulkResult`
+        """
+        options = {
+            "chunk_size": self.chunk_size,
+            "max_chunk_bytes": self.max_chunk_bytes,
+            "raise_on_error": False,
+            "raise_on_exception": False,
+        }
+        if self.thread_count > 1:
+            items = parallel_bulk(self.client, self._actions(documents), thread_count=self.thread_count, **options)
+        else:
+            items = streaming_bulk(self.client, self._actions(documents), **options)
+
+        result = BulkResult()
+        for position, (success, item) in enumerate(items):
+            if success:
+                result.success += 1
+            else:
+                result.errors.append((position, item))
+        return result
+
+
+def create_client(hosts, user=None, password=None, cafile=None, timeout=30):
+    """
+    Creates an Elasticsearch client.
+
+    Args:
+        hosts: List of Elasticsearch URLs, e.g. `https://localhost:9200`
+        user: (optional) user name for HTTP basic authentication
+        password: (optional) password for HTTP basic authentication
+        cafile: (optional) CA certificate file to verify the certificates of the hosts against
+        timeout: (optional) request timeout in seconds (default: 30)
+    """
+    options = {"timeout": timeout}
+    if user:
+        options["http_auth"] = (user, password or "")
+    if cafile:
+        options["ca_certs"] = cafile
+        options["verify_certs"] = True
+    return Elasticsearch(hosts, **options)
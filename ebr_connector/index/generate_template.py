@@ -9,9 +9,6 @@ import argparse
 import json
 import sys
 
-from elasticsearch_dsl import Index
-from ebr_connector.schema.build_results import _BuildResultsMetaDocument
-
 
 def generate_template(index_name):
     """
@@ -22,6 +19,10 @@ def generate_template(index_name):
         index_name: index name to generate the template with, should be the index the module will upload to
         output_file: (optional) file path to write template to
     """
+    # Imported here so that the arguments are parsed before loading elasticsearch_dsl and the schema
+    # pylint: disable=import-outside-toplevel
+    from elasticsearch_dsl import Index
+    from ebr_connector.schema.build_results import _BuildResultsMetaDocument
 
     document = _BuildResultsMetaDocument()
     index = Index(name=index_name)
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+
+"""
+Transport of :class:`ebr_connector.schema.BuildResults` documents to LogCollector instances.
+"""
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+"""
+asyncio based transport to LogCollector instances.
+
+Allows sending many documents concurrently from a single event loop. The configuration (certificates, timeout,
+chunk size) is the same as for the blocking transport, see :meth:`ebr_connector.schema.BuildResults.save_logcollect`.
+"""
+
+import asyncio
+import time
+
+from ebr_connector.logcollector.writer import DEFAULT_CHUNK_SIZE, TransferStats, bounded_chunks
+
+
+async def write_chunks_async(dest, port, chunks, ssl_context, timeout=10, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Opens a TLS connection to a LogCollector and writes byte chunks to it, regrouped into chunks of at most
+    `chunk_size` bytes. Waits for each chunk to be handed over to the transport before encoding the next one.
+
+    Args:
+        dest: URL/IP of the LogCollector server
+        port: port of the raw intake on the LogCollector server
+        chunks: Iterable of byte chunks, e.g. from :meth:`ebr_connector.schema.BuildResults.iter_json_chunks`
+        ssl_context: SSL context of the connection, see :func:`ebr_connector.logcollector.client.create_ssl_context`
+        timeout: (optional) timeout in seconds for connecting and each write operation (10 seconds if unset)
+        chunk_size: (optional) maximum number of bytes written at once
+
+    Returns:
+        :class:`ebr_connector.logcollector.writer.TransferStats` of the written data
+    """
+    stats = TransferStats()
+    start = time.monotonic()
+    _, writer = await asyncio.wait_for(
+        asyncio.open_connection(dest, port, ssl=ssl_context, server_hostname=dest), timeout
+    )
+    try:
+        for chunk in bounded_chunks(chunks, chunk_size):
+            writer.write(chunk)
+            await asyncio.wait_for(writer.drain(), timeout)
+            stats.bytes_sent += len(chunk)
+            stats.chunks_sent += 1
+    finally:
+        writer.close()
+        if hasattr(writer, "wait_closed"):
+            try:
+                await asyncio.wait_for(writer.wait_closed(), timeout)
+            except (OSError, asyncio.TimeoutError):
+                pass
+    stats.seconds = time.monotonic() - start
+    return stats
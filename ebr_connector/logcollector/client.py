@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+
+"""
+Client keeping connections to a LogCollector instance open across documents.
+
+Creating a new TLS connection for every document requires loading the certificates and a full TLS handshake
+each time. The :class:`LogCollectorClient` creates its `SSLContext` once, keeps a small pool of idle connections
+around for reuse and resumes TLS sessions when new connections are needed.
+
+Documents sent over pooled connections are terminated by a newline, so that the LogCollector can tell them apart
+on a connection which is used for more than one document. With compression enabled each write (a document or a
+batch of documents) is compressed on its own, the LogCollector receives a sequence of gzip members or zstd frames.
+"""
+
+import abc
+import select
+import socket
+import ssl
+import threading
+import time
+from collections import deque
+
+from ebr_connector.logcollector.compression import compress_chunks
+from ebr_connector.logcollector.writer import DEFAULT_CHUNK_SIZE, TransferStats, write_chunks
+
+DOCUMENT_SEPARATOR = b"\n"
+"""Terminates each document sent over a pooled connection."""
+
+DEFAULT_BATCH_DOCUMENTS = 100
+"""Default maximum number of documents written at once by :meth:`LogCollectorClient.send_batch`."""
+
+DEFAULT_BATCH_BYTES = 4 * 1024 * 1024
+"""Default maximum size in bytes of the documents written at once by :meth:`LogCollectorClient.send_batch`."""
+
+
+def create_ssl_context(cafile=None, clientcert=None, clientkey=None, keypass=""):
+    """
+    Creates the SSL context for connections to a LogCollector.
+
+    Args:
+        cafile: (optional) file location of the root CA certificate that signed the
+        LogCollector's certificate (or the LogCollector's certificate if self-signed)
+        clientcert: (optional) file location of the client certificate
+        clientkey: (optional) file location of the client key
+        keypass: (optional) password of the client key (leave blank if unset)
+    """
+    context = ssl.create_default_context(cafile=cafile)
+
+    if clientcert:
+        context.verify_mode = ssl.CERT_REQUIRED
+        context.load_cert_chain(clientcert, clientkey, keypass)
+    return context
+
+
+class DocumentResult:
+    """
+    Outcome of sending a single document of a batch.
+
+    Args:
+        document: The document
+        bytes_sent: Number of bytes of the encoded document (including the separator) which were sent
+        error: Exception which prevented sending the document, `None` on success
+    """
+
+    def __init__(self, document, bytes_sent=0, error=None):
+        self.document = document
+        self.bytes_sent = bytes_sent
+        self.error = error
+
+    @property
+    def success(self):
+        """`True` if the document was sent."""
+        return self.error is None
+
+    def __repr__(self):
+        return "DocumentResult(success=%s, bytes_sent=%d, error=%r)" % (self.success, self.bytes_sent, self.error)
+
+
+class BaseClient(abc.ABC):
+    """
+    Common interface of the clients sending :class:`ebr_connector.schema.BuildResults` documents to LogCollectors.
+
+    Subclasses implement :meth:`send_encoded` and :meth:`close`, sending single documents and batches is built on
+    top of them.
+    """
+
+    # JSON backend the documents are encoded with, see :mod:`ebr_connector.schema.serializer`
+    backend = "auto"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @abc.abstractmethod
+    def send_encoded(self, make_chunks):
+        """
+        Sends an encoded document.
+
+        Args:
+            make_chunks: Callable returning the byte chunks of a single document (without separator). It is called
+            again for each attempt to send the document.
+
+        Returns:
+            :class:`ebr_connector.logcollector.writer.TransferStats` of the document (after compression)
+        """
+
+    def send(self, build_results):
+        """
+        Sends a single :class:`ebr_connector.schema.BuildResults` document.
+
+        Returns:
+            :class:`ebr_connector.logcollector.writer.TransferStats` of the document
+        """
+        return self.send_encoded(lambda: build_results.iter_json_chunks(self.backend))
+
+    def send_batch(self, documents, max_documents=DEFAULT_BATCH_DOCUMENTS, max_bytes=DEFAULT_BATCH_BYTES):
+        """
+        Sends several :class:`ebr_connector.schema.BuildResults` documents as newline-delimited JSON.
+
+        The encoded documents are collected and written together once `max_documents` documents or `max_bytes`
+        bytes are reached. If writing fails, all documents written together are reported as failed and sending
+        continues with the next documents.
+
+        Args:
+            documents: Iterable of documents, consumed lazily
+            max_documents: (optional) maximum number of documents written at once
+            max_bytes: (optional) maximum number of bytes written at once, a larger document is written on its own
+
+        Returns:
+            List of :class:`DocumentResult`, one per document in the order of `documents`
+        """
+        results = []
+        pending = []
+        pending_bytes = 0
+
+        for document in documents:
+            result = DocumentResult(document)
+            results.append(result)
+            try:
+                encoded = document.to_json(self.backend)
+            except (TypeError, ValueError) as error:
+                result.error = error
+                continue
+
+            if pending and pending_bytes + len(encoded) + len(DOCUMENT_SEPARATOR) > max_bytes:
+                self._send_pending(pending)
+                pending, pending_bytes = [], 0
+            pending.append((result, encoded))
+            pending_bytes += len(encoded) + len(DOCUMENT_SEPARATOR)
+            if len(pending) >= max_documents or pending_bytes >= max_bytes:
+                self._send_pending(pending)
+                pending, pending_bytes = [], 0
+
+        if pending:
+            self._send_pending(pending)
+        return results
+
+    def _send_pending(self, pending):
+        payload = DOCUMENT_SEPARATOR.join(encoded for _, encoded in pending)
+        try:
+            self.send_encoded(lambda: (payload,))
+        except OSError as error:
+            for result, _ in pending:
+                result.error = error
+            return
+        for result, encoded in pending:
+            result.bytes_sent = len(encoded) + len(DOCUMENT_SEPARATOR)
+
+    @abc.abstractmethod
+    def close(self):
+        """Closes all open connections of the client."""
+
+
+class _Connection:
+    """Connection of the pool together with the time it was last used."""
+
+    def __init__(self, secure_socket):
+        self.socket = secure_socket
+        self.last_used = time.monotonic()
+
+    def is_healthy(self, max_idle):
+        """
+        Checks whether the connection can be reused: it must not have been idle for too long and the LogCollector
+        must not have closed it. The LogCollector never sends data, so a readable socket means it was closed.
+        """
+        if time.monotonic() - self.last_used > max_idle:
+            return False
+        try:
+            readable, _, _ = select.select([self.socket], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def close(self):
+        """Closes the connection, ignoring errors."""
+        try:
+            self.socket.close()
+        except OSError:
+            pass
+
+
+class LogCollectorClient(BaseClient):
+    """
+    Sends :class:`ebr_connector.schema.BuildResults` documents to a LogCollector instance over pooled TLS connections.
+
+    The client can be shared between threads. Use it as context manager or call :meth:`close` to close the pooled
+    connections.
+
+    Args:
+        dest: URL/IP of the LogCollector server
+        port: port of the raw intake on the LogCollector server
+        cafile: (optional) file location of the root CA certificate that signed the
+        LogCollector's certificate (or the LogCollector's certificate if self-signed)
+        clientcert: (optional) file location of the client certificate
+        clientkey: (optional) file location of the client key
+        keypass: (optional) password of the client key (leave blank if unset)
+        timeout: (optional) socket timeout in seconds for the write operation (10 seconds if unset)
+        pool_size: (optional) maximum number of idle connections kept open (2 if unset)
+        max_idle: (optional) seconds after which idle connections are not reused anymore (60 seconds if unset)
+        chunk_size: (optional) maximum number of bytes written to a socket at once
+        ssl_context: (optional) SSL context to use instead of creating one from the certificate arguments
+        compression: (optional) compression method for the sent data (`gzip` or `zstd`), uncompressed if unset
+        backend: (optional) JSON backend the documents are encoded with (`json`, `orjson` or `auto`), the fastest
+        available one if unset. See :mod:`ebr_connector.schema.serializer`.
+    """
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    def __init__(
+        self,
+        dest,
+        port,
+        cafile=None,
+        clientcert=None,
+        clientkey=None,
+        keypass="",
+        timeout=10,
+        pool_size=2,
+        max_idle=60,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        ssl_context=None,
+        compression=None,
+        backend="auto",
+    ):
+        self.dest = dest
+        self.port = port
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.max_idle = max_idle
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self.backend = backend
+        self.ssl_context = ssl_context or create_ssl_context(cafile, clientcert, clientkey, keypass)
+
+        self.stats = TransferStats()
+        self.connections_opened = 0
+        self.sessions_resumed = 0
+
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._session = None
+
+    def _connect(self):
+        bare_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        bare_socket.settimeout(self.timeout)
+        bare_socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        secure_socket = self.ssl_context.wrap_socket(bare_socket, server_hostname=self.dest, session=self._session)
+        try:
+            secure_socket.connect((self.dest, self.port))
+        except BaseException:
+            secure_socket.close()
+            raise
+
+        with self._lock:
+            self.connections_opened += 1
+            if secure_socket.session_reused:
+                self.sessions_resumed += 1
+            if secure_socket.session is not None:
+                self._session = secure_socket.session
+        return _Connection(secure_socket)
+
+    def _acquire(self):
+        """Returns a healthy idle connection and whether it was reused, or opens a new one."""
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                return self._connect(), False
+            if connection.is_healthy(self.max_idle):
+                return connection, True
+            connection.close()
+
+    def _release(self, connection):
+        connection.last_used = time.monotonic()
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def _encode(self, make_chunks):
+        return compress_chunks(_terminated(make_chunks()), self.compression)
+
+    def send_encoded(self, make_chunks):
+        """
+        Sends an encoded document over a pooled connection.
+
+        A failing write on a reused connection is retried once on a new connection, since the LogCollector
+        might have closed the connection in the meantime. The document is encoded again for the retry.
+
+        Args:
+            make_chunks: Callable returning the byte chunks of a single document (without separator)
+
+        Returns:
+            :class:`ebr_connector.logcollector.writer.TransferStats` of the document (after compression)
+        """
+        connection, reused = self._acquire()
+        try:
+            stats = write_chunks(connection.socket, self._encode(make_chunks), self.chunk_size)
+        except OSError:
+            connection.close()
+            if not reused:
+                raise
+            connection = self._connect()
+            try:
+                stats = write_chunks(connection.socket, self._encode(make_chunks), self.chunk_size)
+            except BaseException:
+                connection.close()
+                raise
+        except BaseException:
+            connection.close()
+            raise
+
+        self._release(connection)
+        with self._lock:
+            self.stats.add(stats)
+        return stats
+
+    def close(self):
+        """Closes all idle connections of the pool."""
+        with self._lock:
+            connections = list(self._idle)
+            self._idle.clear()
+        for connection in connections:
+            connection.close()
+
+
+def _terminated(chunks):
+    yield from chunks
+    yield DOCUMENT_SEPARATOR
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""
+Streaming compression of documents sent to a LogCollector.
+
+Build documents repeat the same field names, suite and class names many times and compress very well.
+The chunks of a document are compressed one after the other as they are produced, so the uncompressed
+document is never held in memory as a whole.
+
+Supported methods:
+
+* `gzip`: Always available, produces a gzip stream.
+* `zstd`: Requires the `zstandard <https://pypi.org/project/zstandard/>`_ package, produces a zstd frame.
+"""
+
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+# Adds the gzip header and trailer to the deflate stream
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def available_compressions():
+    """Returns the names of the compression methods which can be used in this environment."""
+    methods = [GZIP]
+    if zstandard is not None:
+        methods.append(ZSTD)
+    return methods
+
+
+def _create_compressor(method, level):
+    if method == GZIP:
+        return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level, zlib.DEFLATED, _GZIP_WBITS)
+    if method == ZSTD:
+        if zstandard is None:
+            raise ValueError("Compression 'zstd' requires the zstandard package to be installed")
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compressobj()
+    raise ValueError("Unknown compression method '%s'" % method)
+
+
+def compress_chunks(chunks, method=None, level=None):
+    """
+    Compresses a sequence of byte chunks into a single compressed stream.
+
+    Args:
+        chunks: Iterable of byte chunks
+        method: (optional) Compression method (`gzip` or `zstd`), the chunks are returned unchanged if unset
+        level: (optional) Compression level, defaults to the default level of the method
+    """
+    if method is None:
+        yield from chunks
+        return
+
+    compressor = _create_compressor(method, level)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+
+"""
+Client sending documents to one of several LogCollector instances.
+
+The :class:`FailoverClient` keeps a :class:`ebr_connector.logcollector.client.LogCollectorClient` per endpoint and
+tracks the latency and errors of each endpoint in an :class:`EndpointHealth`. Documents are sent to the healthiest
+endpoint. If the connection breaks (also partway through a document) the endpoint is put on hold for a while and
+the document is sent again to the next endpoint. With `fanout` larger than one, each document is sent to several
+endpoints concurrently.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from ebr_connector.logcollector.client import BaseClient, LogCollectorClient, create_ssl_context
+from ebr_connector.logcollector.writer import DEFAULT_CHUNK_SIZE, TransferStats
+
+
+def parse_endpoints(addresses, default_port=None):
+    """
+    Parses LogCollector addresses of the form `host` or `host:port` into `(host, port)` tuples.
+
+    Args:
+        addresses: Iterable of addresses
+        default_port: (optional) port of addresses without port
+
+    Raises:
+        ValueError: if an address has no port and no default port is given, or the port is not a number
+    """
+    endpoints = []
+    for address in addresses:
+        host, separator, port = address.rpartition(":")
+        if not separator:
+            host, port = address, default_port
+        if not host or port is None:
+            raise ValueError("No port given for LogCollector address '%s'." % address)
+        endpoints.append((host, int(port)))
+    return endpoints
+
+
+class EndpointHealth:
+    """
+    Latency and error statistics of a LogCollector endpoint.
+
+    After a failure the endpoint is on hold for `cooldown` seconds, doubled for every further failure in a row up
+    to `max_cooldown`. A successful send clears the hold.
+
+    Args:
+        cooldown: (optional) seconds the endpoint is on hold after a failure (5 seconds if unset)
+        max_cooldown: (optional) maximum seconds the endpoint is on hold (5 minutes if unset)
+        smoothing: (optional) weight of the latest send in the moving average of the latency
+    """
+
+    def __init__(self, cooldown=5.0, max_cooldown=300.0, smoothing=0.3):
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.smoothing = smoothing
+
+        self.sends = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency = 0.0
+        self.last_error = None
+        self.down_until = 0.0
+
+    def available(self, now=None):
+        """`True` if the endpoint is not on hold."""
+        return (time.monotonic() if now is None else now) >= self.down_until
+
+    def record_success(self, seconds):
+        """Records a successful send which took `seconds`."""
+        self.latency = seconds if not self.sends else self.latency + self.smoothing * (seconds - self.latency)
+        self.sends += 1
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+
+    def record_failure(self, error, now=None):
+        """Records a failed send and puts the endpoint on hold."""
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+        hold = min(self.cooldown * 2 ** (self.consecutive_failures - 1), self.max_cooldown)
+        self.down_until = (time.monotonic() if now is None else now) + hold
+
+    def __repr__(self):
+        return "EndpointHealth(sends=%d, failures=%d, latency=%.3f, available=%s)" % (
+            self.sends,
+            self.failures,
+            self.latency,
+            self.available(),
+        )
+
+
+class FailoverClient(BaseClient):
+    """
+    Sends :class:`ebr_connector.schema.BuildResults` documents to the healthiest of several LogCollector instances.
+
+    Endpoints which are not on hold are preferred, ordered by failures in a row and latency. Endpoints on hold are
+    only tried after all others failed, so a document is not dropped just because every endpoint failed recently.
+
+    The client can be used in place of a :class:`ebr_connector.logcollector.client.LogCollectorClient`, e.g. for
+    :meth:`ebr_connector.schema.BuildResults.save_logcollect` or
+    :meth:`ebr_connector.logcollector.spool.Spool.flush`.
+
+    Args:
+        endpoints: List of `(host, port)` tuples, see :func:`parse_endpoints`
+        cafile: (optional) file location of the root CA certificate that signed the
+        LogCollectors' certificates (or the LogCollectors' certificates if self-signed)
+        clientcert: (optional) file location of the client certificate
+        clientkey: (optional) file location of the client key
+        keypass: (optional) password of the client key (leave blank if unset)
+        timeout: (optional) socket timeout in seconds for connecting and the write operation (10 seconds if unset)
+        fanout: (optional) number of endpoints each document is sent to concurrently (1 if unset)
+        cooldown: (optional) seconds a failed endpoint is on hold, see :class:`EndpointHealth`
+        max_cooldown: (optional) maximum seconds a failed endpoint is on hold, see :class:`EndpointHealth`
+        ssl_context: (optional) SSL context to use instead of creating one from the certificate arguments
+        compression: (optional) compression method for the sent data (`gzip` or `zstd`), uncompressed if unset
+        chunk_size: (optional) maximum number of bytes written to a socket at once
+        backend: (optional) JSON backend the documents are encoded with (`json`, `orjson` or `auto`), the fastest
+        available one if unset. See :mod:`ebr_connector.schema.serializer`.
+        client_args: (optional) further keyword arguments of the
+        :class:`ebr_connector.logcollector.client.LogCollectorClient` of each endpoint
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        endpoints,
+        cafile=None,
+        clientcert=None,
+        clientkey=None,
+        keypass="",
+        timeout=10,
+        fanout=1,
+        cooldown=5.0,
+        max_cooldown=300.0,
+        ssl_context=None,
+        compression=None,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        backend="auto",
+        **client_args
+    ):
+        if not endpoints:
+            raise ValueError("At least one LogCollector endpoint is required.")
+        if fanout < 1:
+            raise ValueError("Fanout must be positive (got %d)" % fanout)
+
+        ssl_context = ssl_context or create_ssl_context(cafile, clientcert, clientkey, keypass)
+        self.clients = [
+            LogCollectorClient(
+                dest,
+                port,
+                timeout=timeout,
+                chunk_size=chunk_size,
+                ssl_context=ssl_context,
+                compression=compression,
+                **client_args
+            )
+            for dest, port in endpoints
+        ]
+        self.health = [EndpointHealth(cooldown, max_cooldown) for _ in self.clients]
+        self.fanout = min(fanout, len(self.clients))
+        self.backend = backend
+        self.stats = TransferStats()
+
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(self.fanout) if self.fanout > 1 else None
+
+    def _ordered(self):
+        """Returns the indices of the endpoints, the preferred ones first."""
+        now = time.monotonic()
+        with self._lock:
+            return sorted(
+                range(len(self.clients)),
+                key=lambda index: (
+                    not self.health[index].available(now),
+                    self.health[index].consecutive_failures,
+                    self.health[index].latency,
+                ),
+            )
+
+    def _deliver(self, make_chunks, candidates):
+        """
+        Sends a document to the first endpoint of `candidates` which accepts it. Endpoints are taken from the
+        (shared) deque, so concurrent deliveries of the same document never use the same endpoint.
+        """
+        error = None
+        while True:
+            try:
+                index = candidates.popleft()
+            except IndexError:
+                raise error or ConnectionError("No LogCollector endpoint left to send to.") from None
+            start = time.monotonic()
+            try:
+                stats = self.clients[index].send_encoded(make_chunks)
+            except OSError as send_error:
+                error = send_error
+                with self._lock:
+                    self.health[index].record_failure(send_error)
+                continue
+            with self._lock:
+                self.health[index].record_success(time.monotonic() - start)
+            return stats
+
+    def send_encoded(self, make_chunks):
+        """
+        Sends an encoded document to the healthiest endpoint, or to the `fanout` healthiest endpoints. An endpoint
+        which fails is replaced by the next one.
+
+        Args:
+            make_chunks: Callable returning the byte chunks of a single document (without separator)
+
+        Returns:
+            :class:`ebr_connector.logcollector.writer.TransferStats` of all copies of the document
+
+        Raises:
+            OSError: the last error if no endpoint accepted the document
+        """
+        candidates = deque(self._ordered())
+        if self._executor is None:
+            stats = self._deliver(make_chunks, candidates)
+        else:
+            futures = [self._executor.submit(self._deliver, make_chunks, candidates) for _ in range(self.fanout)]
+            stats, error = TransferStats(), None
+            delivered = False
+            for future in futures:
+                try:
+                    stats.add(future.result())
+                    delivered = True
+                except OSError as send_error:
+                    error = send_error
+            if not delivered:
+                raise error
+
+        with self._lock:
+            self.stats.add(stats)
+        return stats
+
+    def close(self):
+        """Closes the pooled connections to all endpoints."""
+        if self._executor is not None:
+            self._executor.shutdown()
+        for client in self.clients:
+            client.close()
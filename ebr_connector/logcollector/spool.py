@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+"""
+Disk-backed outbox for documents which could not be delivered to a LogCollector yet.
+
+Each document is written to its own file in the spool directory. The file is written under a temporary name and
+renamed once it is complete, so the spool only ever contains complete documents and several processes can add to
+the same spool. A flusher claims a file by renaming it before sending it and removes it once the document is
+delivered. Files are sent in the order they were added.
+"""
+
+import os
+import time
+import uuid
+
+from ebr_connector.logcollector.writer import DEFAULT_CHUNK_SIZE
+
+_DOCUMENT_SUFFIX = ".json"
+_CLAIMED_SUFFIX = ".sending"
+_TEMPORARY_SUFFIX = ".tmp"
+
+
+class FlushResult:
+    """
+    Outcome of flushing a spool.
+
+    Args:
+        sent: Number of documents delivered
+        remaining: Number of documents left in the spool
+        error: The last error which stopped the flush, `None` if the spool was flushed completely
+    """
+
+    def __init__(self, sent=0, remaining=0, error=None):
+        self.sent = sent
+        self.remaining = remaining
+        self.error = error
+
+    def __repr__(self):
+        return "FlushResult(sent=%d, remaining=%d, error=%r)" % (self.sent, self.remaining, self.error)
+
+
+class Spool:
+    """
+    Append-only on-disk queue of encoded documents.
+
+    Args:
+        directory: Directory holding the spooled documents, created if missing
+        claim_timeout: (optional) seconds after which documents claimed by a flusher which did not finish (e.g.
+        because it was killed) can be claimed again (1 hour if unset)
+    """
+
+    def __init__(self, directory, claim_timeout=3600):
+        self.directory = directory
+        self.claim_timeout = claim_timeout
+        os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._documents(include_claimed=True))
+
+    def put_chunks(self, chunks):
+        """
+        Adds an encoded document given as byte chunks to the spool.
+
+        Returns:
+            Path of the spooled document
+        """
+        # Nanosecond time stamps keep the documents in the order they were added
+        name = "%020d-%s" % (int(time.time() * 1e9), uuid.uuid4().hex)
+        temporary_path = os.path.join(self.directory, name + _TEMPORARY_SUFFIX)
+        path = os.path.join(self.directory, name + _DOCUMENT_SUFFIX)
+        try:
+            with open(temporary_path, "wb") as spool_file:
+                for chunk in chunks:
+                    spool_file.write(chunk)
+                spool_file.flush()
+                os.fsync(spool_file.fileno())
+            os.replace(temporary_path, path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        return path
+
+    def put(self, build_results, backend="auto"):
+        """
+        Adds a :class:`ebr_connector.schema.BuildResults` document to the spool.
+
+        Args:
+            build_results: Document to add
+            backend: (optional) JSON backend the document is encoded with (`json`, `orjson` or `auto`), the fastest
+            available one if unset. See :mod:`ebr_connector.schema.serializer`.
+
+        Returns:
+            Path of the spooled document
+        """
+        return self.put_chunks(build_results.iter_json_chunks(backend))
+
+    def _documents(self, include_claimed=False):
+        now = time.time()
+        documents = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(_DOCUMENT_SUFFIX):
+                documents.append(entry.name)
+            elif entry.name.endswith(_CLAIMED_SUFFIX):
+                try:
+                    abandoned = now - entry.stat().st_mtime > self.claim_timeout
+                except FileNotFoundError:
+                    continue
+                if include_claimed or abandoned:
+                    documents.append(entry.name)
+        return sorted(documents)
+
+    def _claim(self, name):
+        """Renames a document to mark it as being sent, returns the new path or `None` if it was claimed already."""
+        base, _ = os.path.splitext(name)
+        claimed_path = os.path.join(self.directory, base + _CLAIMED_SUFFIX)
+        try:
+            os.replace(os.path.join(self.directory, name), claimed_path)
+            os.utime(claimed_path)
+        except FileNotFoundError:
+            return None
+        return claimed_path
+
+    def _release(self, claimed_path):
+        base, _ = os.path.splitext(claimed_path)
+        os.replace(claimed_path, base + _DOCUMENT_SUFFIX)
+
+    def flush(
+        self, client, max_attempts=5, initial_delay=1.0, max_delay=60.0, chunk_size=DEFAULT_CHUNK_SIZE, sleep=time.sleep
+    ):
+        """
+        Sends the spooled documents with a LogCollector client and removes the delivered ones.
+
+        A failing document is retried with exponentially growing delays (`initial_delay`, twice that, ...
+        up to `max_delay`). After `max_attempts` failed attempts in a row the flush stops, the remaining
+        documents stay in the spool.
+
+        Args:
+            client: :class:`ebr_connector.logcollector.client.LogCollectorClient` to send the documents with
+            max_attempts: (optional) number of attempts per document before giving up
+            initial_delay: (optional) delay in seconds before the first retry
+            max_delay: (optional) maximum delay in seconds between two attempts
+            chunk_size: (optional) size in bytes of the chunks read from the spooled files
+            sleep: (optional) function used for waiting between attempts
+
+        Returns:
+            :class:`FlushResult`
+        """
+        result = FlushResult()
+        for name in self._documents():
+            claimed_path = self._claim(name)
+            if claimed_path is None:
+                continue
+
+            delay = initial_delay
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    client.send_encoded(lambda path=claimed_path: _read_chunks(path, chunk_size))
+                except OSError as error:
+                    result.error = error
+                    if attempt < max_attempts:
+                        sleep(delay)
+                        delay = min(delay * 2, max_delay)
+                    continue
+                os.remove(claimed_path)
+                result.sent += 1
+                result.error = None
+                break
+            else:
+                self._release(claimed_path)
+                break
+
+        result.remaining = len(self)
+        return result
+
+
+def _read_chunks(path, chunk_size):
+    with open(path, "rb") as spool_file:
+        yield from iter(lambda: spool_file.read(chunk_size), b"")
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+"""
+Writes encoded documents to a socket in chunks of bounded size.
+
+The document is encoded while it is written out, so the memory required for sending does not grow with the size
+of the document. Each chunk is written with `sendall`, which keeps writing until all of its data has been sent.
+"""
+
+import time
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+"""Default size in bytes of the chunks written to the socket."""
+
+
+class TransferStats:
+    """
+    Statistics about the data written to a LogCollector.
+
+    Args:
+        bytes_sent: Number of bytes written
+        chunks_sent: Number of chunks written
+        seconds: Time in seconds spent on encoding and writing
+    """
+
+    def __init__(self, bytes_sent=0, chunks_sent=0, seconds=0.0):
+        self.bytes_sent = bytes_sent
+        self.chunks_sent = chunks_sent
+        self.seconds = seconds
+
+    @property
+    def throughput(self):
+        """Throughput in bytes per second."""
+        if not self.seconds:
+            return 0.0
+        return self.bytes_sent / self.seconds
+
+    def add(self, other):
+        """Adds the statistics of another transfer to this one."""
+        self.bytes_sent += other.bytes_sent
+        self.chunks_sent += other.chunks_sent
+        self.seconds += other.seconds
+
+    def __repr__(self):
+        return "TransferStats(bytes_sent=%d, chunks_sent=%d, seconds=%.3f, throughput=%.0f B/s)" % (
+            self.bytes_sent,
+            self.chunks_sent,
+            self.seconds,
+            self.throughput,
+        )
+
+
+def bounded_chunks(chunks, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Regroups a sequence of byte chunks of arbitrary size into chunks of exactly `chunk_size` bytes
+    (except for the last one).
+
+    Args:
+        chunks: Iterable of byte chunks
+        chunk_size: (optional) Size in bytes of the returned chunks
+    """
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive (got %d)" % chunk_size)
+
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def write_chunks(sock, chunks, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Writes byte chunks to a socket, regrouped into chunks of at most `chunk_size` bytes.
+
+    Args:
+        sock: Connected socket to write to
+        chunks: Iterable of byte chunks, e.g. from :meth:`ebr_connector.schema.serializer.DocumentSerializer.iter_chunks`
+        chunk_size: (optional) Maximum size in bytes of a single write
+
+    Returns:
+        :class:`TransferStats` of the written data
+    """
+    stats = TransferStats()
+    start = time.monotonic()
+    for chunk in bounded_chunks(chunks, chunk_size):
+        sock.sendall(chunk)
+        stats.bytes_sent += len(chunk)
+        stats.chunks_sent += 1
+    stats.seconds = time.monotonic() - start
+    return stats
@@ -0,0 +1,145 @@
+"""
+asyncio variants of the prepacked queries.
+
+Allows running many queries concurrently on a single event loop, e.g. in a web service. The queries are built by
+the same functions as the synchronous ones (e.g.
+:func:`ebr_connector.prepacked_queries.multi_jobs.failed_tests_query`) and executed with an async Elasticsearch
+client, see :func:`create_async_client`. Every variant takes the client as first argument followed by the arguments
+of the synchronous query:
+
+.. code-block:: python
+
+    client = create_async_client(["https://elastic:9200"])
+    failed, builds = await asyncio.gather(
+        failed_tests(client, "staging*", "my_job"), get_job(client, "staging*", "my_job")
+    )
+
+Responses are cached the same way as the ones of the synchronous queries, see
+:func:`ebr_connector.prepacked_queries.query.set_query_cache`.
+"""
+
+from ebr_connector.prepacked_queries import multi_jobs, single_jobs
+from ebr_connector.prepacked_queries.query import lookup_cached, store_cached
+
+
+def create_async_client(hosts, **kwargs):
+    """
+    Creates an async Elasticsearch client of the `elasticsearch-async` package, which supports the Elasticsearch 6
+    client used by `elasticsearch-dsl`.
+
+    Args:
+        hosts: Elasticsearch nodes to connect to
+        kwargs: further arguments of the client, e.g. `http_auth`
+
+    Raises:
+        ImportError: if `elasticsearch-async` is not installed
+    """
+    try:
+        from elasticsearch_async import AsyncElasticsearch  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ImportError(
+            "The async queries require an async Elasticsearch client, install ebr-connector[async]"
+        ) from error
+    return AsyncElasticsearch(hosts, **kwargs)
+
+
+async def execute_async(client, query):
+    """
+    Executes a prepared query with an async Elasticsearch client.
+
+    Args:
+        client: async Elasticsearch client, see :func:`create_async_client`
+        query: :class:`ebr_connector.prepacked_queries.query.PreparedQuery` to execute
+
+    Returns:
+        The results of the query, see :meth:`ebr_connector.prepacked_queries.query.PreparedQuery.results`
+    """
+    search, key, raw_response = lookup_cached(query.search, query.index)
+    if raw_response is None:
+        raw_response = await client.search(index=query.index, body=search.to_dict())
+        store_cached(key, raw_response)
+    return query.results(raw_response)
+
+
+async def successful_jobs(client, index, job_name_regex, size=10, start_date="now-7d", end_date="now"):
+    """
+    Async variant of :func:`ebr_connector.prepacked_queries.multi_jobs.successful_jobs`.
+
+    Args:
+        client: async Elasticsearch client, see :func:`create_async_client`
+    """
+    return await execute_async(
+        client, multi_jobs.successful_jobs_query(index, job_name_regex, size, start_date, end_date)
+    )
+
+
+async def failed_tests(
+    client,
+    index,
+    job_name,
+    size=10,
+    fail_count=5,
+    duration_low=162.38,
+    duration_high=320,
+    start_date="now-7d",
+    end_date="now",
+    agg=False,
+):
+    """
+    Async variant of :func:`ebr_connector.prepacked_queries.multi_jobs.failed_tests`.
+
+    Args:
+        client: async Elasticsearch client, see :func:`create_async_client`
+    """
+    return await execute_async(
+        client,
+        multi_jobs.failed_tests_query(
+            index, job_name, size, fail_count, duration_low, duration_high, start_date, end_date, agg
+        ),
+    )
+
+
+async def job_matching_test(
+    client,
+    index,
+    test_name,
+    passed=True,
+    failed=True,
+    skipped=False,
+    job_name=None,
+    size=10,
+    start_date="now-7d",
+    end_date="now",
+):
+    """
+    Async variant of :func:`ebr_connector.prepacked_queries.multi_jobs.job_matching_test`.
+
+    Args:
+        client: async Elasticsearch client, see :func:`create_async_client`
+    """
+    return await execute_async(
+        client,
+        multi_jobs.job_matching_test_query(
+            index, test_name, passed, failed, skipped, job_name, size, start_date, end_date
+        ),
+    )
+
+
+async def get_job(client, index, job_name, wildcard=False, size=10, start_date="now-7d", end_date="now"):
+    """
+    Async variant of :func:`ebr_connector.prepacked_queries.multi_jobs.get_job`.
+
+    Args:
+        client: async Elasticsearch client, see :func:`create_async_client`
+    """
+    return await execute_async(client, multi_jobs.get_job_query(index, job_name, wildcard, size, start_date, end_date))
+
+
+async def get_build(client, index, job_name, build_id, wildcard=False):
+    """
+    Async variant of :func:`ebr_connector.prepacked_queries.single_jobs.get_build`.
+
+    Args:
+        client: async Elasticsearch client, see :func:`create_async_client`
+    """
+    return await execute_async(client, single_jobs.get_build_query(index, job_name, build_id, wildcard))
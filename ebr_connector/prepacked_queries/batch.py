@@ -0,0 +1,125 @@
+"""
+Executes several prepacked queries in a single round trip to Elasticsearch with the multi search API (`_msearch`).
+
+The queries are built by the same functions as the single queries (e.g.
+:func:`ebr_connector.prepacked_queries.multi_jobs.failed_tests_query`):
+
+.. code-block:: python
+
+    batch = QueryBatch()
+    batch.add(failed_tests_query("staging*", "my_job"))
+    batch.add(get_job_query("staging*", "my_job"))
+    for result in batch.execute():
+        print(result.results if result.success else result.error)
+
+Queries answered by the cache (see :func:`ebr_connector.prepacked_queries.query.set_query_cache`) are not sent.
+"""
+
+from elasticsearch import TransportError
+from elasticsearch_dsl.connections import connections
+
+from ebr_connector.prepacked_queries.query import lookup_cached, store_cached
+
+
+class QueryResult:
+    """
+    Outcome of a single query of a batch.
+
+    Args:
+        query: The :class:`ebr_connector.prepacked_queries.query.PreparedQuery`
+        results: Results of the query, see :meth:`ebr_connector.prepacked_queries.query.PreparedQuery.results`
+        error: Exception which prevented executing the query, `None` on success
+    """
+
+    def __init__(self, query, results=None, error=None):
+        self.query = query
+        self.results = results
+        self.error = error
+
+    @property
+    def success(self):
+        """`True` if the query was executed."""
+        return self.error is None
+
+    def __repr__(self):
+        return "QueryResult(success=%s, error=%r)" % (self.success, self.error)
+
+
+class QueryBatch:
+    """
+    Collects prepared queries and executes them with a single multi search request.
+
+    Args:
+        using: (optional) alias of the Elasticsearch connection, see :mod:`elasticsearch_dsl.connections`
+        client: (optional) Elasticsearch client to use instead of the connection given by `using`
+    """
+
+    def __init__(self, using="default", client=None):
+        self.using = using
+        self.client = client
+        self.queries = []
+
+    def __len__(self):
+        return len(self.queries)
+
+    def add(self, query):
+        """
+        Adds a query to the batch.
+
+        Args:
+            query: :class:`ebr_connector.prepacked_queries.query.PreparedQuery` to execute
+
+        Returns:
+            Position of the query in the batch and of its result in :meth:`execute`
+        """
+        self.queries.append(query)
+        return len(self.queries) - 1
+
+    def execute(self):
+        """
+        Executes the queries of the batch. Errors do not stop the other queries, they are reported by the results.
+
+        Returns:
+            List of :class:`QueryResult`, in the order the queries were added
+        """
+        results = [None] * len(self.queries)
+        pending = []
+        for position, query in enumerate(self.queries):
+            search, key, raw_response = lookup_cached(query.search, query.index)
+            if raw_response is None:
+                pending.append((position, search, key))
+            else:
+                results[position] = self._result(query, raw_response)
+
+        if pending:
+            body = []
+            for position, search, _ in pending:
+                body.append({"index": self.queries[position].index})
+                body.append(search.to_dict())
+            try:
+                client = self.client or connections.get_connection(self.using)
+                responses = client.msearch(body=body)["responses"]
+            except Exception as error:  # pylint: disable=broad-except
+                responses = [error] * len(pending)
+
+            for (position, _, key), raw_response in zip(pending, responses):
+                query = self.queries[position]
+                if isinstance(raw_response, Exception):
+                    results[position] = QueryResult(query, error=raw_response)
+                elif raw_response.get("error"):
+                    error = raw_response["error"]
+                    error_type = error.get("type", "N/A") if isinstance(error, dict) else str(error)
+                    results[position] = QueryResult(
+                        query, error=TransportError(raw_response.get("status", "N/A"), error_type, error)
+                    )
+                else:
+                    store_cached(key, raw_response)
+                    results[position] = self._result(query, raw_response)
+        return results
+
+    @staticmethod
+    def _result(query, raw_response):
+        try:
+            return QueryResult(query, results=query.results(raw_response))
+        except (KeyError, IndexError) as error:
+            return QueryResult(query, error=error)
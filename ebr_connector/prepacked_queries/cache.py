@@ -0,0 +1,218 @@
+"""
+Cache of the responses of the prepacked queries, see :func:`ebr_connector.prepacked_queries.query.set_query_cache`.
+
+Responses are keyed on the index and the normalized body of the query (including the source filter). They are kept
+in memory until their time to live expires, the least recently used ones are dropped once the cached responses take
+more than `max_bytes`. With a directory given they are also written to disk, so they are shared between processes.
+
+Queries with relative date ranges (e.g. `now-7d`) return different results over time. Their dates are rounded to
+a bucket (a minute by default) with the date math of Elasticsearch, e.g. `now-7d/m`, and the current bucket is part
+of the key. Identical queries within the same bucket are then answered from the cache. Elasticsearch rounds `lt`
+bounds down, they are moved to the next bucket first (e.g. `now+1m/m`), so the current bucket stays included.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+DATE_ROUNDING_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+"""Supported units of the rounding of relative dates and their length in seconds."""
+
+_RANGE_BOUNDS = ("gt", "gte", "lt", "lte", "from", "to")
+# Bounds rounded down by Elasticsearch although they limit the range from above
+_EXCLUSIVE_UPPER_BOUNDS = ("lt",)
+_RELATIVE_DATE = re.compile(r"^now([+-]\d+[yMwdhHms])*$")
+
+
+def normalize_query(body, date_rounding="m"):
+    """
+    Returns the body of a query with the relative dates of its range clauses rounded to buckets.
+
+    Args:
+        body: Body of the query as dictionary, e.g. from :meth:`elasticsearch_dsl.Search.to_dict`
+        date_rounding: (optional) unit the relative dates are rounded to (one of :data:`DATE_ROUNDING_SECONDS`),
+        relative dates are kept as they are if `None`
+
+    Returns:
+        Tuple of the normalized body and whether it contains relative dates
+    """
+    relative = []
+
+    def normalize(value, in_range=False):
+        if isinstance(value, dict):
+            normalized = {}
+            for key, item in value.items():
+                if in_range and key in _RANGE_BOUNDS and isinstance(item, str) and item.startswith("now"):
+                    relative.append(item)
+                    if date_rounding and _RELATIVE_DATE.match(item):
+                        if key in _EXCLUSIVE_UPPER_BOUNDS:
+                            item += "+1" + date_rounding
+                        item = "%s/%s" % (item, date_rounding)
+                    normalized[key] = item
+                else:
+                    normalized[key] = normalize(item, in_range or key == "range")
+            return normalized
+        if isinstance(value, list):
+            return [normalize(item, in_range) for item in value]
+        return value
+
+    normalized_body = normalize(body)
+    return normalized_body, bool(relative)
+
+
+class QueryCache:
+    """
+    In-memory LRU cache of query responses with time to live and optional on-disk store. The cache can be shared
+    between threads.
+
+    Args:
+        ttl: (optional) seconds a response is used before the query is executed again (60 if unset)
+        max_bytes: (optional) maximum size in bytes of the JSON encoded responses kept in memory (64 MB if unset),
+        larger responses are not cached
+        directory: (optional) directory of the on-disk store, created if missing. Nothing is stored on disk if unset.
+        The on-disk store is not limited in size, expired responses are only removed once they are looked up again.
+        date_rounding: (optional) unit the relative dates of the queries are rounded to, see
+        :func:`normalize_query`. Queries with relative dates are not cached if `None`.
+    """
+
+    def __init__(self, ttl=60, max_bytes=64 * 1024 * 1024, directory=None, date_rounding="m"):
+        if date_rounding is not None and date_rounding not in DATE_ROUNDING_SECONDS:
+            raise ValueError(
+                "Unknown date rounding '%s', expected one of %s" % (date_rounding, ", ".join(DATE_ROUNDING_SECONDS))
+            )
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.date_rounding = date_rounding
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+
+        # Maps keys to (expires, JSON encoded response)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "QueryCache(entries=%d, size=%d, hits=%d, misses=%d)" % (
+            len(self._entries),
+            self.size,
+            self.hits,
+            self.misses,
+        )
+
+    def prepare(self, index, body, now=None):
+        """
+        Normalizes the body of a query and returns its key.
+
+        Args:
+            index: Index (or list of indices) the query is executed on
+            body: Body of the query as dictionary
+            now: (optional) current time stamp (seconds since the epoch)
+
+        Returns:
+            Tuple of the normalized body, to be executed instead of `body`, and its key. The key is `None` if the
+            query must not be cached.
+        """
+        normalized_body, relative = normalize_query(body, self.date_rounding)
+        bucket = None
+        if relative:
+            if self.date_rounding is None:
+                return normalized_body, None
+            bucket = int((time.time() if now is None else now) // DATE_ROUNDING_SECONDS[self.date_rounding])
+        key_data = json.dumps([index, normalized_body, bucket], sort_keys=True, separators=(",", ":"), default=str)
+        return normalized_body, hashlib.sha1(key_data.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key, now=None):
+        """
+        Returns a copy of the cached response of `key` and counts a hit, `None` and counts a miss if there is none.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[1])
+
+        encoded = self._load(key, now)
+        with self._lock:
+            if encoded is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(encoded)
+
+    def _load(self, key, now):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key)) as entry_file:
+                expires = float(entry_file.readline())
+                encoded = entry_file.read()
+        except (OSError, ValueError):
+            return None
+        if expires <= now:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            return None
+        self._remember(key, expires, encoded)
+        return encoded
+
+    def put(self, key, response, now=None):
+        """
+        Stores a response. Responses are stored JSON encoded, so later changes of `response` do not affect the cache.
+
+        Args:
+            key: Key of the query, see :meth:`prepare`
+            response: JSON serializable response of the query
+            now: (optional) current time stamp (seconds since the epoch)
+        """
+        expires = (time.time() if now is None else now) + self.ttl
+        encoded = json.dumps(response, separators=(",", ":"))
+        if not self._remember(key, expires, encoded):
+            return
+        if self.directory:
+            path = self._path(key)
+            temporary_path = "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+            with open(temporary_path, "w") as entry_file:
+                entry_file.write("%r\n" % expires)
+                entry_file.write(encoded)
+            os.replace(temporary_path, path)
+
+    def _remember(self, key, expires, encoded):
+        size = len(encoded)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (expires, encoded)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+        return True
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def clear(self):
+        """Drops all responses kept in memory, the on-disk store is left as it is."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
@@ -7,7 +7,13 @@ from deprecated.sphinx import deprecated
 
 from ebr_connector.schema.build_results import BuildResults
 from ebr_connector.prepacked_queries import DEPRECATION_MESSAGE
-from ebr_connector.prepacked_queries.query import make_query, DETAILED_JOB, JOB_MINIMAL
+from ebr_connector.prepacked_queries.query import (
+    iter_query,
+    prepare_query,
+    DEFAULT_PAGE_SIZE,
+    DETAILED_JOB,
+    JOB_MINIMAL,
+)
 
 
 @deprecated(version="0.1.1", reason=DEPRECATION_MESSAGE)
@@ -24,6 +30,16 @@ def successful_jobs(index, job_name_regex, size=10, start_date="now-7d", end_dat
     Returns:
         An array of dicts of the matching jobs
     """
+    return successful_jobs_query(index, job_name_regex, size, start_date, end_date).execute()
+
+
+def successful_jobs_query(index, job_name_regex, size=10, start_date="now-7d", end_date="now"):
+    """
+    Builds the query of :func:`successful_jobs`.
+
+    Returns:
+        :class:`ebr_connector.prepacked_queries.query.PreparedQuery`
+    """
     ## Search for all jobs that fullfil the regex. The regex is evaluated on the keyword field (`raw`) of the field `br_job_name`.
     match_jobname = Q("regexp", br_job_name__raw=job_name_regex)
     ## and have the following build status
@@ -33,10 +49,9 @@ def successful_jobs(index, job_name_regex, size=10, start_date="now-7d", end_dat
 
     combined_filter = match_jobname & match_status & range_time
 
-    result = make_query(
+    return prepare_query(
         index, combined_filter, includes=DETAILED_JOB["includes"], excludes=DETAILED_JOB["excludes"], size=size
     )
-    return result
 
 
 @deprecated(version="0.1.1", reason=DEPRECATION_MESSAGE)
@@ -67,6 +82,28 @@ def failed_tests(
     Returns:
         An array of dicts of the matching jobs
     """
+    return failed_tests_query(
+        index, job_name, size, fail_count, duration_low, duration_high, start_date, end_date, agg
+    ).execute()
+
+
+def failed_tests_query(
+    index,
+    job_name,
+    size=10,
+    fail_count=5,
+    duration_low=162.38,
+    duration_high=320,
+    start_date="now-7d",
+    end_date="now",
+    agg=False,
+):  # pylint: disable=too-many-locals
+    """
+    Builds the query of :func:`failed_tests`.
+
+    Returns:
+        :class:`ebr_connector.prepacked_queries.query.PreparedQuery`
+    """
     ## Search for "failure", "FAILURE", "unstable", "UNSTABLE"
     match_status = Q("match", br_status_key=BuildResults.BuildStatus.FAILURE.name) | Q(
         "match", br_status_key=BuildResults.BuildStatus.UNSTABLE.name
@@ -95,7 +132,7 @@ def failed_tests(
     if agg:
         test_agg = A("terms", field="br_tests_object.br_tests_failed_object.br_fullname.raw")
 
-    return make_query(
+    return prepare_query(
         index,
         combined_filter,
         includes=DETAILED_JOB["includes"],
@@ -133,6 +170,28 @@ def job_matching_test(
     Returns:
         An array of dicts of the matching information
     """
+    return job_matching_test_query(
+        index, test_name, passed, failed, skipped, job_name, size, start_date, end_date
+    ).execute()
+
+
+def job_matching_test_query(
+    index,
+    test_name,
+    passed=True,
+    failed=True,
+    skipped=False,
+    job_name=None,
+    size=10,
+    start_date="now-7d",
+    end_date="now",
+):
+    """
+    Builds the query of :func:`job_matching_test`.
+
+    Returns:
+        :class:`ebr_connector.prepacked_queries.query.PreparedQuery`
+    """
     # Over the specified time
     combined_filter = Q("range", **{"br_build_date_time": {"gte": start_date, "lt": end_date}})
     test_status_filter = None
@@ -161,7 +220,7 @@ def job_matching_test(
         match_jobname = Q("term", br_job_name__raw=job_name)
         combined_filter &= match_jobname
 
-    return make_query(
+    return prepare_query(
         index, combined_filter, includes=JOB_MINIMAL["includes"], excludes=JOB_MINIMAL["excludes"], size=size
     )
 
@@ -178,6 +237,16 @@ def get_job(index, job_name, wildcard=False, size=10, start_date="now-7d", end_d
     Returns:
         A list of the results from the job requested
     """
+    return get_job_query(index, job_name, wildcard, size, start_date, end_date).execute()
+
+
+def get_job_query(index, job_name, wildcard=False, size=10, start_date="now-7d", end_date="now"):
+    """
+    Builds the query of :func:`get_job`.
+
+    Returns:
+        :class:`ebr_connector.prepacked_queries.query.PreparedQuery`
+    """
     search_type = "term"
     if wildcard:
         search_type = "wildcard"
@@ -186,6 +255,49 @@ def get_job(index, job_name, wildcard=False, size=10, start_date="now-7d", end_d
 
     combined_filters = match_job_name & range_time
 
-    return make_query(
+    return prepare_query(
         index, combined_filters, includes=DETAILED_JOB["includes"], excludes=DETAILED_JOB["excludes"], size=size
     )
+
+
+def iter_builds(
+    index,
+    job_name=None,
+    wildcard=False,
+    start_date="now-30d",
+    end_date="now",
+    source=None,
+    page_size=DEFAULT_PAGE_SIZE,
+    slices=1,
+):  # pylint: disable=too-many-arguments
+    """
+    Generator over all builds recorded within a time window, see
+    :func:`ebr_connector.prepacked_queries.query.iter_query`. The builds are yielded oldest first, unless they are
+    fetched in several slices.
+
+    Args:
+        index: Elastic search index to use
+        job_name: [Optional] Name of job to search within, all jobs if unset
+        wildcard: [Optional] When true, search the job name with wildcard instead of exact match
+        start_date: [Optional] Specify start date (string in elastic search format). Default is 30 days ago.
+        end_date: [Optional] Specify end date (string in elastic search format). Default is now.
+        source: [Optional] Dict with the `includes` and `excludes` of the fields to return. Default is `JOB_MINIMAL`.
+        page_size: [Optional] Number of builds fetched per request. Default is `DEFAULT_PAGE_SIZE`.
+        slices: [Optional] Number of slices fetched in parallel. With more than one slice the builds are yielded in
+        no particular order. Default is 1.
+    Returns:
+        A generator over the dicts of the builds
+    """
+    source = source or JOB_MINIMAL
+    combined_filter = Q("range", **{"br_build_date_time": {"gte": start_date, "lt": end_date}})
+    if job_name:
+        combined_filter &= Q("wildcard" if wildcard else "term", br_job_name__raw=job_name)
+
+    return iter_query(
+        index,
+        combined_filter,
+        includes=source["includes"],
+        excludes=source["excludes"],
+        page_size=page_size,
+        slices=slices,
+    )
@@ -2,10 +2,21 @@
 Module with basic wrapper for making a query to elastic search, as well as default field lists for including/excluding in results
 """
 
+import queue
+import threading
+
 from deprecated.sphinx import deprecated
+from elasticsearch.helpers import scan
+from elasticsearch_dsl.connections import connections
+from elasticsearch_dsl.response import Response
 from ebr_connector.schema.build_results import BuildResults
 from ebr_connector.prepacked_queries import DEPRECATION_MESSAGE
 
+_QUERY_CACHE = None
+
+DEFAULT_PAGE_SIZE = 1000
+"""Number of hits fetched per request by :func:`iter_query`."""
+
 
 # Provides common job details, without all passing and skipped tests
 DETAILED_JOB = {
@@ -32,6 +43,123 @@ DETAILED_JOB = {
 JOB_MINIMAL = {"includes": ["br_job_name", "br_build_id_key", "br_status_key", "br_build_date_time"], "excludes": []}
 
 
+def set_query_cache(cache):
+    """
+    Sets the cache used by :func:`make_query` and thus by all prepacked queries.
+
+    Args:
+        cache: :class:`ebr_connector.prepacked_queries.cache.QueryCache` (or an object with the same `prepare`,
+        `get` and `put` methods), `None` to execute every query
+    """
+    global _QUERY_CACHE  # pylint: disable=global-statement
+    _QUERY_CACHE = cache
+
+
+def execute_search(search, index):
+    """
+    Executes a search, answering it from the cache set with :func:`set_query_cache` if possible.
+
+    Args:
+        search: :class:`elasticsearch_dsl.Search` to execute
+        index: index the search is executed on, part of the cache key
+
+    Returns:
+        :class:`elasticsearch_dsl.response.Response`
+    """
+    search, key, raw_response = lookup_cached(search, index)
+    if raw_response is None:
+        raw_response = search.execute().to_dict()
+        store_cached(key, raw_response)
+    return Response(search, raw_response)
+
+
+def lookup_cached(search, index):
+    """
+    Looks up the response of a search in the cache set with :func:`set_query_cache`, see :func:`execute_search`.
+
+    Returns:
+        Tuple of the search to execute (a normalized copy of `search`, which is left unchanged), its cache key
+        (`None` if it is not cached) and the cached raw response (`None` if there is none)
+    """
+    cache = _QUERY_CACHE
+    if cache is None:
+        return search, None, None
+    body, key = cache.prepare(index, search.to_dict())
+    search = search._clone().update_from_dict(body)  # pylint: disable=protected-access
+    if key is None:
+        return search, None, None
+    return search, key, cache.get(key)
+
+
+def store_cached(key, raw_response):
+    """Stores the raw response of a search looked up with :func:`lookup_cached`, unless it is not cached."""
+    cache = _QUERY_CACHE
+    if cache is not None and key is not None:
+        cache.put(key, raw_response)
+
+
+class PreparedQuery:
+    """
+    A query built by one of the prepacked queries, ready to be executed: the search and how its results are
+    extracted from the response. Allows executing the same queries in different ways, e.g. see
+    :mod:`ebr_connector.prepacked_queries.aio`.
+
+    Args:
+        index: index to search on
+        search: :class:`elasticsearch_dsl.Search` to execute
+        aggregated: (optional) the results are the buckets of the `fail_count` aggregation instead of the hits
+        single: (optional) only the first result is returned instead of the list of the results
+    """
+
+    def __init__(self, index, search, aggregated=False, single=False):
+        self.index = index
+        self.search = search
+        self.aggregated = aggregated
+        self.single = single
+
+    def __repr__(self):
+        return "PreparedQuery(index=%r, body=%r)" % (self.index, self.search.to_dict())
+
+    def results(self, response):
+        """
+        Extracts the results from the response of the query.
+
+        Args:
+            response: :class:`elasticsearch_dsl.response.Response` or raw response (dict) of the query
+        Returns:
+            List of dicts with results of the query, a single dict for `single` queries.
+        """
+        if not isinstance(response, Response):
+            response = Response(self.search, response)
+        if self.aggregated:
+            results = response["aggregations"]["fail_count"]["buckets"]
+        else:
+            results = [hit["_source"] for hit in response["hits"]["hits"]]
+        if self.single:
+            return results[0]
+        return results
+
+    def execute(self):
+        """Executes the query with the default connection, see :func:`execute_search`, and returns its results."""
+        return self.results(execute_search(self.search, self.index))
+
+
+def prepare_query(index, combined_filter, includes, excludes, agg=None, size=1, single=False):
+    """
+    Builds a typical query, see :func:`make_query`.
+
+    Returns:
+        :class:`PreparedQuery`
+    """
+    search = BuildResults().search(index=index)
+    search = search.source(includes=includes, excludes=excludes)
+    if agg:
+        search = search.aggs.metric("fail_count", agg)
+    search = search.query("bool", filter=[combined_filter])[0:1]  # pylint: disable=no-member
+    search = search[0:size]
+    return PreparedQuery(index, search, aggregated=bool(agg), single=single)
+
+
 @deprecated(version="0.1.1", reason=DEPRECATION_MESSAGE)
 def make_query(index, combined_filter, includes, excludes, agg=None, size=1):
     """
@@ -46,18 +174,106 @@ def make_query(index, combined_filter, includes, excludes, agg=None, size=1):
     Returns:
         List of dicts with results of the query.
     """
+    return prepare_query(index, combined_filter, includes, excludes, agg=agg, size=size).execute()
+
+
+def iter_query(
+    index,
+    combined_filter,
+    includes,
+    excludes,
+    page_size=DEFAULT_PAGE_SIZE,
+    slices=1,
+    sort_field="br_build_date_time",
+    tiebreaker="_id",
+    scroll="5m",
+):  # pylint: disable=too-many-arguments
+    """
+    Generator over all results of a query, not limited by `index.max_result_window` like :func:`make_query`.
+
+    With a single slice the results are yielded in the order of `sort_field` (oldest first by default): they are
+    fetched in pages of `page_size` hits with `search_after`, sorted on `sort_field` and then on `tiebreaker`, which
+    must be unique per document. The documents have no unique field with doc values, so the tiebreaker defaults to
+    `_id`. Elasticsearch 6 loads `_id` into fielddata on the heap to sort on it, which costs heap memory on large
+    indices; pass a unique field with doc values as `tiebreaker` if the documents have one.
+
+    With more than one slice the query is split into `slices` sliced scrolls fetched in parallel threads instead.
+    The ordering is dropped then: the results are yielded in no particular order, `sort_field` and `tiebreaker` are
+    not used.
+
+    Args:
+        index: index to search on
+        combined_filter: combined set of filters to run the query with
+        includes: list of fields to include on the results
+        excludes: list of fields to explicitly exclude from the results
+        page_size: [Optional] number of hits fetched per request. Defaults to :data:`DEFAULT_PAGE_SIZE`.
+        slices: [Optional] number of slices fetched in parallel. Defaults to 1.
+        sort_field: [Optional] field the results are sorted on. Defaults to `br_build_date_time`.
+        tiebreaker: [Optional] unique field sorting the results with the same `sort_field`. Defaults to `_id`, see
+        above for its cost.
+        scroll: [Optional] time the scroll contexts of the slices are kept between two requests. Defaults to 5m.
+    Returns:
+        Generator over the dicts of the results
+    """
     search = BuildResults().search(index=index)
     search = search.source(includes=includes, excludes=excludes)
-    if agg:
-        search = search.aggs.metric("fail_count", agg)
-    search = search.query("bool", filter=[combined_filter])[0:1]  # pylint: disable=no-member
-    search = search[0:size]
-    response = search.execute()
-    results = []
+    search = search.query("bool", filter=[combined_filter])  # pylint: disable=no-member
 
-    if agg:
-        results = response["aggregations"]["fail_count"]["buckets"]
-    else:
-        for hit in response["hits"]["hits"]:
-            results.append(hit["_source"])
-    return results
+    if slices > 1:
+        return _iter_slices(search, index, page_size, slices, scroll)
+    search = search.sort({sort_field: "asc"}, {tiebreaker: "asc"})[0:page_size]
+    return _iter_pages(search, page_size)
+
+
+def _iter_pages(search, page_size):
+    while True:
+        hits = search.execute()["hits"]["hits"]
+        for hit in hits:
+            yield hit["_source"].to_dict()
+        if len(hits) < page_size:
+            return
+        search = search.extra(search_after=list(hits[-1]["sort"]))
+
+
+def _iter_slices(search, index, page_size, slices, scroll):
+    """Fetches the slices in threads, the hits are passed on through a bounded queue."""
+    hits = queue.Queue(page_size * slices)
+    stopped = threading.Event()
+    done = object()
+
+    def put(item):
+        """Waits for space in the queue, returns `False` if the consumer stopped in the meantime."""
+        while not stopped.is_set():
+            try:
+                hits.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def fetch(slice_id):
+        try:
+            body = search.extra(slice={"id": slice_id, "max": slices}).to_dict()
+            client = connections.get_connection(search._using)  # pylint: disable=protected-access
+            for hit in scan(client, query=body, index=index, scroll=scroll, size=page_size):
+                if not put(hit["_source"]):
+                    return
+            put(done)
+        except Exception as error:  # pylint: disable=broad-except
+            put(error)
+
+    threads = [threading.Thread(target=fetch, args=(slice_id,), daemon=True) for slice_id in range(slices)]
+    for thread in threads:
+        thread.start()
+    try:
+        running = slices
+        while running:
+            item = hits.get()
+            if item is done:
+                running -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        stopped.set()
@@ -6,7 +6,7 @@ from elasticsearch_dsl import Q
 from deprecated.sphinx import deprecated
 
 from ebr_connector.prepacked_queries import DEPRECATION_MESSAGE
-from ebr_connector.prepacked_queries.query import make_query, DETAILED_JOB
+from ebr_connector.prepacked_queries.query import prepare_query, DETAILED_JOB
 
 
 @deprecated(version="0.1.1", reason=DEPRECATION_MESSAGE)
@@ -22,14 +22,27 @@ def get_build(index, job_name, build_id, wildcard=False):
     Returns:
         A single dict of the results from the build requested
     """
+    return get_build_query(index, job_name, build_id, wildcard).execute()
+
+
+def get_build_query(index, job_name, build_id, wildcard=False):
+    """
+    Builds the query of :func:`get_build`.
+
+    Returns:
+        :class:`ebr_connector.prepacked_queries.query.PreparedQuery`
+    """
     search_type = "term"
     if wildcard:
         search_type = "wildcard"
     match_job_name = Q(search_type, br_job_name__raw=job_name)
     match_build_id = Q(search_type, br_build_id_key=build_id)
     combined_filter = match_job_name + match_build_id
-    result = make_query(
-        index, combined_filter, includes=DETAILED_JOB["includes"], excludes=DETAILED_JOB["excludes"], size=1
+    return prepare_query(
+        index,
+        combined_filter,
+        includes=DETAILED_JOB["includes"],
+        excludes=DETAILED_JOB["excludes"],
+        size=1,
+        single=True,
     )
-
-    return result[0]
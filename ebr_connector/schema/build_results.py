@@ -14,16 +14,47 @@ factory method instead to create instances of these types.
 """
 
 import socket
-import ssl
-import json
 import traceback
 import warnings
 
+from collections.abc import Mapping
 from enum import Enum
+from itertools import chain
 from elasticsearch_dsl import Document, Text, InnerDoc, Float, Integer, Nested, Date, Keyword, MetaField, Object
 
 import ebr_connector
+from ebr_connector.logcollector.aio import write_chunks_async
+from ebr_connector.logcollector.client import create_ssl_context
+from ebr_connector.logcollector.compression import compress_chunks
+from ebr_connector.logcollector.writer import DEFAULT_CHUNK_SIZE, write_chunks
 from ebr_connector.schema.dynamic_template import DYNAMIC_TEMPLATES
+from ebr_connector.schema.serializer import get_serializer
+from ebr_connector.schema.test_store import TestStore
+
+
+TEST_RECORD = "test"
+"""Record type of test case records passed to :meth:`ebr_connector.schema.BuildResults.store_tests`."""
+
+SUITE_RECORD = "suite"
+"""Record type of test suite records passed to :meth:`ebr_connector.schema.BuildResults.store_tests`."""
+
+TEST_STORE_RECORD = "tests"
+"""
+Record type of records passed to :meth:`ebr_connector.schema.BuildResults.store_tests` holding several test cases as
+:class:`ebr_connector.schema.test_store.TestStore`, e.g. decoded in another process.
+"""
+
+
+def _validate_result(result):
+    """Raises a `KeyError` if `result` is not the name of a :class:`ebr_connector.schema.Test.Result`."""
+    if result not in Test.Result.__members__:
+        raise KeyError("Unknown test result '%s'" % result)
+
+
+def _tag_records(record_type, records):
+    """Turns plain records into `(record_type, record)` tuples."""
+    for record in records:
+        yield record_type, record
 
 
 class Test(InnerDoc):
@@ -174,6 +205,16 @@ class Tests(InnerDoc):
     br_tests_skipped_object = Nested(Test)
     br_summary_object = Object(TestSummary)
 
+    # Maps the nested test fields to the name of the test result they hold.
+    TEST_RESULT_FIELDS = {
+        "br_tests_passed_object": Test.Result.PASSED.name,
+        "br_tests_failed_object": Test.Result.FAILED.name,
+        "br_tests_skipped_object": Test.Result.SKIPPED.name,
+    }
+
+    # Class attribute so that assigning it on an instance does not end up in the document data.
+    _test_store = None
+
     @staticmethod
     def create(suites, tests_passed, tests_failed, tests_skipped, summary):
         """
@@ -187,6 +228,81 @@ class Tests(InnerDoc):
             br_summary_object=summary,
         )
 
+    def attach_test_store(self, test_store):
+        """
+        Backs the passed/failed/skipped test fields by a :class:`ebr_connector.schema.test_store.TestStore`.
+
+        The fields are only turned into :class:`ebr_connector.schema.Test` objects once they are accessed,
+        :meth:`to_dict` reads fields which have not been accessed directly from the store.
+
+        Args:
+            test_store: Store holding the test cases
+        """
+        self._test_store = test_store
+
+    def _materialize(self, name):
+        if self._test_store is not None and name in self.TEST_RESULT_FIELDS and name not in self._d_:
+            records = self._test_store.records(self.TEST_RESULT_FIELDS[name], skip_empty=False)
+            self._d_[name] = [Test(**record) for record in records]
+
+    def _test_field_order(self):
+        """Returns the test fields in the order they are created by filling them one test case after the other."""
+        result_fields = {result: name for name, result in self.TEST_RESULT_FIELDS.items()}
+        seen = [result_fields[result] for result in self._test_store.result_names() if result in result_fields]
+        return seen + [name for name in self.TEST_RESULT_FIELDS if name not in seen]
+
+    def __getattr__(self, name):
+        self._materialize(name)
+        return super(Tests, self).__getattr__(name)
+
+    def __eq__(self, other):
+        for name in self.TEST_RESULT_FIELDS:
+            self._materialize(name)
+            if isinstance(other, Tests):
+                other._materialize(name)  # pylint: disable=protected-access
+        return super(Tests, self).__eq__(other)
+
+    def serialization_items(self, skip_empty=True):
+        """
+        Generator over the fields of this object in document order as `(name, value, from_store)` tuples.
+
+        Test fields which have not been accessed so far are read from the attached test store. Their value is a
+        generator of plain records (see :meth:`ebr_connector.schema.test_store.TestStore.records`) and `from_store`
+        is set. All other values are returned as they are stored in the document.
+
+        Args:
+            skip_empty: (optional) Leaves out unset values of the records read from the test store
+        """
+        if self._test_store is None:
+            for name, value in self._d_.items():
+                yield name, value, False
+            return
+
+        for name in self._test_field_order():
+            if name in self._d_:
+                yield name, self._d_[name], False
+            else:
+                records = self._test_store.records(self.TEST_RESULT_FIELDS[name], skip_empty=skip_empty)
+                yield name, records, True
+        for name, value in self._d_.items():
+            if name not in self.TEST_RESULT_FIELDS:
+                yield name, value, False
+
+    def to_dict(self, skip_empty=True):
+        out = super(Tests, self).to_dict(skip_empty=skip_empty)
+        if self._test_store is None:
+            return out
+
+        ordered = {}
+        for name, value, from_store in self.serialization_items(skip_empty=skip_empty):
+            if from_store:
+                value = list(value)
+                if value or not skip_empty:
+                    ordered[name] = value
+            elif name in out:
+                ordered[name] = out[name]
+        return ordered
+
 
 class _BuildResultsMetaDocument(Document):
     """Base class for the BuildResults document describing the index structure."""
@@ -299,38 +415,61 @@ class BuildResults(_BuildResultsMetaDocument):
 
         Args:
             retrieve_function: Callback function which provides test and suite data in dictionaries
-            (see Test and TestSuite documentation for format)
+            (see Test and TestSuite documentation for format). It either returns a dictionary with the iterables
+            `tests` and `suites` or an iterable of `(record_type, record)` tuples where `record_type` is one of
+            :data:`TEST_RECORD`, :data:`SUITE_RECORD` or :data:`TEST_STORE_RECORD`. The iterable allows producing the
+            records lazily, e.g. by a generator, as they are only consumed once.
         """
         try:
             results = retrieve_function(*args, **kwargs)
-            self.br_tests_object = Tests()
-
-            for test in results.get("tests", None):
-                test_result = Test.Result[test.get("result", Test.Result.FAILED)]
-                if test_result == Test.Result.PASSED:
-                    self.br_tests_object.br_tests_passed_object.append(Test.create(**test))
-                elif test_result == Test.Result.FAILED:
-                    self.br_tests_object.br_tests_failed_object.append(Test.create(**test))
-                else:
-                    self.br_tests_object.br_tests_skipped_object.append(Test.create(**test))
-
-            total_passed_count = len(self.br_tests_object.br_tests_passed_object)
-            total_failed_count = len(self.br_tests_object.br_tests_failed_object)
-            total_skipped_count = len(self.br_tests_object.br_tests_skipped_object)
-            self.br_tests_object.br_summary_object = TestSummary.create(
-                total_passed_count=total_passed_count,
-                total_failed_count=total_failed_count,
-                total_skipped_count=total_skipped_count,
-                total_count=total_passed_count + total_failed_count + total_skipped_count,
-            )
-
-            for suite in results.get("suites", None):
-                self.br_tests_object.br_suites_object.append(TestSuite.create(**suite))
+            if isinstance(results, Mapping):
+                records = chain(
+                    _tag_records(TEST_RECORD, iter(results.get("tests", None))),
+                    _tag_records(SUITE_RECORD, results.get("suites", None)),
+                )
+            else:
+                records = results
+            self._store_test_records(records)
 
         except (KeyError, TypeError):
             warnings.warn("Failed to retrieve test data.")
             traceback.print_exc()
 
+    def _store_test_records(self, records):
+        """
+        Adds test and suite records to the document in a single pass, the test summary is counted along the way.
+        The document is only changed once all records are consumed, errors of the records are raised as they are.
+
+        Args:
+            records: Iterable of `(record_type, record)` tuples
+        """
+        tests = Tests()
+        test_store = TestStore()
+        tests.attach_test_store(test_store)
+        # Set up front so that the summary stays ahead of the suites in the document even if tests and suites
+        # records arrive interleaved.
+        summary = TestSummary.create(0, 0, 0, 0)
+        tests.br_summary_object = summary
+
+        for record_type, record in records:
+            if record_type == TEST_RECORD:
+                _validate_result(record.get("result"))
+                test_store.append(**record)
+            elif record_type == SUITE_RECORD:
+                tests.br_suites_object.append(TestSuite.create(**record))
+            elif record_type == TEST_STORE_RECORD:
+                for result in record.result_names():
+                    _validate_result(result)
+                test_store.extend(record)
+            else:
+                raise KeyError("Unknown record type '%s'" % record_type)
+
+        summary.br_total_passed_count = test_store.count(Test.Result.PASSED.name)
+        summary.br_total_failed_count = test_store.count(Test.Result.FAILED.name)
+        summary.br_total_skipped_count = test_store.count(Test.Result.SKIPPED.name)
+        summary.br_total_count = len(test_store)
+        self.br_tests_object = tests
+
     def store_status(self, status_function, *args, **kwargs):
         """
         Retrieves the status of a build and adds it to the :class:`ebr_connector.schema.BuildResults` object
@@ -344,10 +483,51 @@ class BuildResults(_BuildResultsMetaDocument):
             warnings.warn("Failed to retrieve status information.")
             traceback.print_exc()
 
-    def save_logcollect(self, dest, port, cafile=None, clientcert=None, clientkey=None, keypass="", timeout=10):
+    def to_json(self, backend=None):
+        """
+        Encodes the :class:`ebr_connector.schema.BuildResults` object as JSON.
+
+        The default output is identical to `json.dumps(self.to_dict())` but avoids building the intermediate
+        dictionaries, see :mod:`ebr_connector.schema.serializer`.
+
+        Args:
+            backend: (optional) JSON backend to use (`json`, `orjson` or `auto`), defaults to `json`
+
+        Returns:
+            The encoded document as bytes
+        """
+        return get_serializer(BuildResults, backend).dumps(self)
+
+    def iter_json_chunks(self, backend=None):
+        """
+        Generator over the JSON encoded :class:`ebr_connector.schema.BuildResults` object as byte chunks,
+        see :meth:`to_json`. The document is encoded while iterating.
+
+        Args:
+            backend: (optional) JSON backend to use (`json`, `orjson` or `auto`), defaults to `json`
+        """
+        return get_serializer(BuildResults, backend).iter_chunks(self)
+
+    def save_logcollect(
+        self,
+        dest=None,
+        port=None,
+        cafile=None,
+        clientcert=None,
+        clientkey=None,
+        keypass="",
+        timeout=10,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        client=None,
+        compression=None,
+        backend="auto",
+    ):
         """
         Saves the :class:`ebr_connector.schema.BuildResults` object to a LogCollector instance.
 
+        The document is encoded while it is sent and written in chunks of at most `chunk_size` bytes,
+        so it is never held in memory as a whole in its encoded form.
+
         Args:
             dest: URL/IP of the LogCollector server
             port: port of the raw intake on the LogCollector server
@@ -357,18 +537,69 @@ class BuildResults(_BuildResultsMetaDocument):
             clientkey: (optional) file location of the client key
             keypass: (optional) password of the client key (leave blank if unset)
             timeout: (optional) socket timeout in seconds for the write operation (10 seconds if unset)
+            chunk_size: (optional) maximum number of bytes written to the socket at once
+            client: (optional) :class:`ebr_connector.logcollector.client.LogCollectorClient` to send the document
+            with. Its pooled connections and settings are used instead of the other arguments.
+            compression: (optional) compression method for the sent data (`gzip` or `zstd`), uncompressed if unset.
+            See :mod:`ebr_connector.logcollector.compression`.
+            backend: (optional) JSON backend the document is encoded with (`json`, `orjson` or `auto`), the fastest
+            available one if unset. See :mod:`ebr_connector.schema.serializer`. The backend of `client` is used if
+            it is given.
+
+        Returns:
+            :class:`ebr_connector.logcollector.writer.TransferStats` with the number of bytes sent and the throughput
         """
-
-        result = str.encode(json.dumps(self.to_dict()))
+        if client is not None:
+            return client.send(self)
+        if dest is None or port is None:
+            raise ValueError("Either 'dest' and 'port' or 'client' must be provided.")
 
         bare_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         bare_socket.settimeout(timeout)
-        context = ssl.create_default_context(cafile=cafile)
-
-        if clientcert:
-            context.verify_mode = ssl.CERT_REQUIRED
-            context.load_cert_chain(clientcert, clientkey, keypass)
+        context = create_ssl_context(cafile, clientcert, clientkey, keypass)
 
         with context.wrap_socket(bare_socket, server_hostname=dest) as secure_socket:
             secure_socket.connect((dest, port))
-            secure_socket.send(result)
+            chunks = compress_chunks(self.iter_json_chunks(backend), compression)
+            return write_chunks(secure_socket, chunks, chunk_size)
+
+    async def save_logcollect_async(
+        self,
+        dest=None,
+        port=None,
+        cafile=None,
+        clientcert=None,
+        clientkey=None,
+        keypass="",
+        timeout=10,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        client=None,
+        ssl_context=None,
+        compression=None,
+        backend="auto",
+    ):
+        """
+        Saves the :class:`ebr_connector.schema.BuildResults` object to a LogCollector instance using asyncio.
+        Counterpart of :meth:`save_logcollect` taking the same arguments.
+
+        Args:
+            client: (optional) :class:`ebr_connector.logcollector.client.LogCollectorClient` whose destination,
+            SSL context, timeout, chunk size, compression and JSON backend are used instead of the other arguments. Its connection
+            pool is not used, each call opens its own connection.
+            ssl_context: (optional) SSL context to use instead of creating one from the certificate arguments.
+            Pass a shared context when sending many documents to avoid loading the certificates each time.
+
+        Returns:
+            :class:`ebr_connector.logcollector.writer.TransferStats` with the number of bytes sent and the throughput
+        """
+        if client is not None:
+            dest, port, ssl_context = client.dest, client.port, client.ssl_context
+            timeout, chunk_size, compression = client.timeout, client.chunk_size, client.compression
+            backend = client.backend
+        if dest is None or port is None:
+            raise ValueError("Either 'dest' and 'port' or 'client' must be provided.")
+        if ssl_context is None:
+            ssl_context = create_ssl_context(cafile, clientcert, clientkey, keypass)
+
+        chunks = compress_chunks(self.iter_json_chunks(backend), compression)
+        return await write_chunks_async(dest, port, chunks, ssl_context, timeout, chunk_size)
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+
+"""
+Fast JSON serialization of :class:`ebr_connector.schema.BuildResults` documents.
+
+`json.dumps(document.to_dict())` passes every field of every test case through the generic field serialization of
+elasticsearch_dsl and builds a complete copy of the document as dictionaries before encoding it. The serializers in
+this module are set up once per document class from its mapping instead: they know which fields hold inner objects
+and which ones can be encoded as they are, and they produce the encoded document as a sequence of byte chunks.
+
+Two JSON backends are supported:
+
+* `json`: The standard library encoder. The output is byte-for-byte identical to
+  `json.dumps(document.to_dict()).encode()`. This is the default.
+* `orjson`: Uses `orjson <https://github.com/ijl/orjson>`_ if it is installed. Produces the same document but in the
+  compact form of orjson (no whitespace between items, non-ASCII characters are not escaped).
+
+Pass `backend="auto"` to use the fastest available backend.
+"""
+
+import json
+from itertools import chain
+
+from elasticsearch_dsl import Object
+from elasticsearch_dsl.field import Field
+from elasticsearch_dsl.utils import AttrDict, AttrList
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Number of test store records encoded at once
+_RECORDS_BATCH_SIZE = 1000
+
+# Values which are left out of the document, see `ObjectBase.to_dict`.
+_EMPTY_VALUES = ([], {}, None)
+
+
+def _default(value):
+    """Encodes values which are not natively supported by the JSON backends."""
+    if isinstance(value, AttrList):
+        return value._l_  # pylint: disable=protected-access
+    if isinstance(value, AttrDict):
+        return value.to_dict()
+    raise TypeError("Object of type %s is not JSON serializable" % value.__class__.__name__)
+
+
+class _JsonBackend:
+    """JSON backend using the standard library encoder, matching the output of `json.dumps`."""
+
+    name = "json"
+    item_separator = b", "
+    key_separator = b": "
+
+    def __init__(self):
+        self._encode = json.JSONEncoder(default=_default).encode
+
+    def encode(self, value):
+        """Encodes a plain value (dict, list, string, number, ...) into bytes."""
+        return self._encode(value).encode("utf-8")
+
+
+class _OrjsonBackend:
+    """JSON backend using orjson."""
+
+    name = "orjson"
+    item_separator = b","
+    key_separator = b":"
+
+    def encode(self, value):  # pylint: disable=no-self-use
+        """Encodes a plain value (dict, list, string, number, ...) into bytes."""
+        return orjson.dumps(value, default=_default)
+
+
+def available_backends():
+    """Returns the names of the JSON backends which can be used in this environment."""
+    backends = [_JsonBackend.name]
+    if orjson is not None:
+        backends.append(_OrjsonBackend.name)
+    return backends
+
+
+def _create_backend(name):
+    if name in (None, _JsonBackend.name):
+        return _JsonBackend()
+    if name == "auto":
+        return _OrjsonBackend() if orjson is not None else _JsonBackend()
+    if name == _OrjsonBackend.name:
+        if orjson is None:
+            raise ValueError("JSON backend 'orjson' requires the orjson package to be installed")
+        return _OrjsonBackend()
+    raise ValueError("Unknown JSON backend '%s'" % name)
+
+
+class _ObjectSerializer:
+    """
+    Serializer for a single document class. Created once per class and backend from the mapping of the class.
+    """
+
+    def __init__(self, doc_class, backend, cache):
+        cache[doc_class] = self
+        mapping = doc_class._doc_type.mapping  # pylint: disable=protected-access
+        self._backend = backend
+        self._keys = {}
+        self._inner = {}
+        self._converters = {}
+
+        for name in mapping:
+            field = mapping[name]
+            self._keys[name] = backend.encode(name)
+            if isinstance(field, Object):
+                # pylint: disable=protected-access
+                inner = cache.get(field._doc_class) or _ObjectSerializer(field._doc_class, backend, cache)
+                self._inner[name] = inner
+            elif type(field)._serialize is not Field._serialize:  # pylint: disable=protected-access
+                self._converters[name] = field.serialize
+
+        # Objects without inner objects and converted fields can be encoded in one go
+        self._flat = not self._inner and not self._converters
+
+    def _key(self, name):
+        key = self._keys.get(name)
+        return key if key is not None else self._backend.encode(name)
+
+    def members(self, obj):
+        """
+        Generator over the non-empty members of an object as `(encoded key, chunk iterable)` tuples.
+        The chunks of each member have to be consumed before advancing to the next one.
+        """
+        if hasattr(obj, "serialization_items"):
+            items = obj.serialization_items()
+        elif isinstance(obj, AttrDict):
+            items = ((name, value, False) for name, value in obj._d_.items())  # pylint: disable=protected-access
+        else:
+            items = ((name, value, False) for name, value in obj.items())
+
+        for name, value, from_store in items:
+            if from_store:
+                first = next(value, None)
+                if first is not None:
+                    yield self._key(name), self._records_chunks(first, value)
+                continue
+
+            if isinstance(value, AttrList):
+                value = value._l_  # pylint: disable=protected-access
+
+            inner = self._inner.get(name)
+            if inner is not None:
+                if isinstance(value, (list, tuple)):
+                    if value:
+                        yield self._key(name), self._list_chunks(inner, value)
+                    continue
+                chunks = inner.object_chunks(value)
+                if chunks is not None:
+                    yield self._key(name), chunks
+                continue
+
+            converter = self._converters.get(name)
+            if converter is not None:
+                value = converter(value)
+                if isinstance(value, AttrList):
+                    value = value._l_  # pylint: disable=protected-access
+            if value in _EMPTY_VALUES:
+                continue
+            yield self._key(name), (self._backend.encode(value),)
+
+    def object_chunks(self, obj):
+        """
+        Returns the chunks of an encoded object, or `None` if the object is empty and left out of the document.
+        """
+        if obj is None:
+            return None
+        if not isinstance(obj, AttrDict):
+            # Plain dictionaries are taken over as they are
+            return (self._backend.encode(obj),) if obj else None
+        if self._flat:
+            data = {
+                name: value
+                for name, value in obj._d_.items()  # pylint: disable=protected-access
+                if value not in _EMPTY_VALUES
+            }
+            return (self._backend.encode(data),) if data else None
+
+        members = self.members(obj)
+        first = next(members, None)
+        if first is None:
+            return None
+        return self._members_chunks(first, members)
+
+    def element_chunks(self, obj):
+        """Returns the chunks of an encoded list element, empty objects are kept inside of lists."""
+        chunks = self.object_chunks(obj)
+        if chunks is None:
+            return (self._backend.encode(obj._d_ if isinstance(obj, AttrDict) else obj),)  # pylint: disable=W0212
+        return chunks
+
+    def _members_chunks(self, first, members):
+        backend = self._backend
+        key, chunks = first
+        yield b"{" + key + backend.key_separator
+        yield from chunks
+        for key, chunks in members:
+            yield backend.item_separator + key + backend.key_separator
+            yield from chunks
+        yield b"}"
+
+    def _list_chunks(self, inner, values):
+        separator = self._backend.item_separator
+        yield b"["
+        for index, value in enumerate(values):
+            if index:
+                yield separator
+            yield from inner.element_chunks(value)
+        yield b"]"
+
+    def _records_chunks(self, first, records):
+        # Encoding records in batches keeps the per call overhead of the backends low while the size of the
+        # chunks stays bounded.
+        encode = self._backend.encode
+        separator = b""
+        batch = [first]
+        for record in chain(records, (None,)):
+            if record is not None:
+                batch.append(record)
+                if len(batch) < _RECORDS_BATCH_SIZE:
+                    continue
+            if batch:
+                # Strip the brackets of the encoded list to join the batches into a single list
+                yield (b"[" if not separator else separator) + encode(batch)[1:-1]
+                separator = self._backend.item_separator
+                batch = []
+        yield b"]"
+
+
+class DocumentSerializer:
+    """
+    JSON serializer for documents of a given class.
+
+    Args:
+        doc_class: Document class to serialize, e.g. :class:`ebr_connector.schema.BuildResults`
+        backend: (optional) Name of the JSON backend (`json`, `orjson` or `auto`), defaults to `json`
+    """
+
+    def __init__(self, doc_class, backend=None):
+        self._backend = _create_backend(backend)
+        self._serializer = _ObjectSerializer(doc_class, self._backend, {})
+
+    @property
+    def backend(self):
+        """Name of the JSON backend in use."""
+        return self._backend.name
+
+    def iter_chunks(self, document):
+        """
+        Generator over the encoded document as byte chunks. The document is encoded while iterating,
+        which allows writing it out without holding the complete encoded document in memory.
+        """
+        chunks = self._serializer.object_chunks(document)
+        if chunks is None:
+            yield b"{}"
+        else:
+            yield from chunks
+
+    def dumps(self, document):
+        """Returns the encoded document as bytes."""
+        return b"".join(self.iter_chunks(document))
+
+
+_SERIALIZERS = {}
+
+
+def get_serializer(doc_class, backend=None):
+    """
+    Returns the (cached) :class:`DocumentSerializer` for a document class.
+
+    Args:
+        doc_class: Document class to serialize
+        backend: (optional) Name of the JSON backend (`json`, `orjson` or `auto`), defaults to `json`
+    """
+    key = (doc_class, backend)
+    serializer = _SERIALIZERS.get(key)
+    if serializer is None:
+        serializer = _SERIALIZERS[key] = DocumentSerializer(doc_class, backend)
+    return serializer
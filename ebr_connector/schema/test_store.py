@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compact storage for the test cases of a build.
+
+Builds can report hundreds of thousands of test cases. Keeping every single one of them as a
+:class:`ebr_connector.schema.Test` instance is expensive since each of them carries its own attribute dictionary
+and meta data object. The :class:`ebr_connector.schema.test_store.TestStore` keeps the test cases in columnar
+arrays instead and interns the strings shared between them (suite names, class names, result names, ...).
+"""
+
+import math
+from array import array
+
+# Columns of the store holding interned strings, in the order of the `Test` fields.
+_STRING_COLUMNS = ("br_suite", "br_classname", "br_test", "br_message", "br_reportset", "br_context")
+
+
+class TestStore:
+    """
+    Columnar container for test cases.
+
+    Strings are stored once in a string table and referenced by index, durations are kept in a
+    `double` array and the results as small integer codes. Test cases are only turned into
+    dictionaries (see :meth:`records`) when they are read.
+    """
+
+    # Not a test class, prevents pytest from trying to collect it.
+    __test__ = False
+
+    def __init__(self):
+        self._strings = [None]
+        self._string_ids = {None: 0}
+        self._columns = {name: array("I") for name in _STRING_COLUMNS}
+        self._durations = array("d")
+        self._results = array("B")
+        self._result_names = []
+        self._result_counts = []
+
+    def __len__(self):
+        return len(self._results)
+
+    def _intern(self, value):
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(value)
+            self._string_ids[value] = string_id
+        return string_id
+
+    def _result_code(self, result):
+        try:
+            return self._result_names.index(result)
+        except ValueError:
+            self._result_names.append(result)
+            self._result_counts.append(0)
+            return len(self._result_names) - 1
+
+    def append(self, suite, classname, test, result, message, duration, reportset=None, context=None):
+        """
+        Adds a single test case to the store. Takes the same arguments as :meth:`ebr_connector.schema.Test.create`.
+
+        Args:
+            result: Name of the result of the test (e.g. `PASSED`)
+        """
+        if not isinstance(suite, str) or not isinstance(test, str):
+            raise TypeError("Suite and test names must be strings (got %r and %r)" % (suite, test))
+
+        code = self._result_code(result)
+        self._result_counts[code] += 1
+        self._results.append(code)
+        self._durations.append(math.nan if duration is None else duration)
+
+        columns = self._columns
+        columns["br_suite"].append(self._intern(suite))
+        columns["br_classname"].append(self._intern(classname))
+        columns["br_test"].append(self._intern(test))
+        columns["br_message"].append(self._intern(message))
+        columns["br_reportset"].append(self._intern(reportset))
+        columns["br_context"].append(self._intern(context))
+
+    def extend(self, other):
+        """
+        Appends all test cases of another store, in their order. The strings and result codes of the other store are
+        mapped to the ones of this store column by column, without turning the test cases into dictionaries.
+
+        Args:
+            other: :class:`TestStore` to take the test cases from
+        """
+        # pylint: disable=protected-access
+        # Interns the strings in bulk, only the strings known to both stores are looked at one by one
+        new_strings = dict.fromkeys(other._strings)
+        for value in new_strings.keys() & self._string_ids.keys():
+            del new_strings[value]
+        first_id = len(self._strings)
+        self._strings.extend(new_strings)
+        self._string_ids.update(zip(new_strings, range(first_id, len(self._strings))))
+        string_ids = list(map(self._string_ids.__getitem__, other._strings))
+        for name, column in other._columns.items():
+            self._columns[name].extend(array("I", map(string_ids.__getitem__, column)))
+        self._durations.extend(other._durations)
+
+        result_codes = []
+        for result, count in zip(other._result_names, other._result_counts):
+            code = self._result_code(result)
+            self._result_counts[code] += count
+            result_codes.append(code)
+        self._results.extend(array("B", map(result_codes.__getitem__, other._results)))
+
+    def __getstate__(self):
+        # The string IDs are rebuilt from the string table, so stores are pickled (e.g. to be sent between
+        # processes) without holding the strings twice.
+        state = dict(self.__dict__)
+        del state["_string_ids"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._string_ids = {value: string_id for string_id, value in enumerate(self._strings)}
+
+    def count(self, result):
+        """Returns the number of stored test cases with the given result name."""
+        try:
+            return self._result_counts[self._result_names.index(result)]
+        except ValueError:
+            return 0
+
+    def result_names(self):
+        """Returns the result names of the stored test cases in the order they were first seen."""
+        return list(self._result_names)
+
+    def records(self, result, skip_empty=True):
+        """
+        Generator over all test cases with the given result name.
+
+        Args:
+            result: Name of the result of the test cases to return (e.g. `PASSED`)
+            skip_empty: (optional) Leaves out unset values, same as :meth:`ebr_connector.schema.Test.to_dict` does
+
+        Returns:
+            One dictionary per test case, keyed by the field names of :class:`ebr_connector.schema.Test`
+        """
+        if result not in self._result_names:
+            return
+        code = self._result_names.index(result)
+        strings = self._strings
+        suites, classnames, tests, messages, reportsets, contexts = (self._columns[name] for name in _STRING_COLUMNS)
+
+        for index, result_code in enumerate(self._results):
+            if result_code != code:
+                continue
+            duration = self._durations[index]
+            suite = strings[suites[index]]
+            test = strings[tests[index]]
+            record = {
+                "br_suite": suite,
+                "br_classname": strings[classnames[index]],
+                "br_test": test,
+                "br_result": result,
+                "br_message": strings[messages[index]],
+                "br_duration": None if math.isnan(duration) else duration,
+                "br_reportset": strings[reportsets[index]],
+                "br_context": strings[contexts[index]],
+                "br_fullname": suite + "." + test,
+            }
+            if skip_empty:
+                record = {key: value for key, value in record.items() if value is not None}
+            yield record
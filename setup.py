@@ -22,6 +22,13 @@ with open("CHANGELOG.md") as changelog_file:
 requirements = ["elasticsearch-dsl==6.3.1",
                 "requests>=2.18.4,<3", "Deprecated==1.2.5"]
 
+extra_requirements = {
+    "orjson": ["orjson>=3"],
+    "zstd": ["zstandard"],
+    "ijson": ["ijson>=3.1"],
+    "async": ["elasticsearch-async>=6.2,<7"],
+}
+
 setup_requirements = ["pytest-runner"]
 
 test_requirements = ["pytest", "pytest-cov", "coverage", "docker>=3.7.0,<4"]
@@ -42,9 +49,14 @@ setup(
     entry_points={
         "console_scripts": [
             "ebr-generate-index-template = ebr_connector.index.generate_template:main",
-            "ebr-store-jenkins-results = ebr_connector.hooks.jenkins.store_results:main"
+            "ebr-store-jenkins-results = ebr_connector.hooks.jenkins.store_results:main",
+            "ebr-replay-spool = ebr_connector.hooks.common.replay_spool:main",
+            "ebr-backfill-jenkins-results = ebr_connector.hooks.jenkins.backfill:main",
+            "ebr-poll-jenkins = ebr_connector.hooks.jenkins.poller:main",
+            "ebr-store-junit-results = ebr_connector.hooks.junit.store_results:main",
         ],
     },
+    extras_require=extra_requirements,
     install_requires=requirements,
     license="Apache License 2.0",
     long_description=readme + "\n\n" + changelog,
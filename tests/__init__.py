@@ -3,7 +3,7 @@
 """Module providing some test data.
 """
 
-from ebr_connector.schema.build_results import Test
+from ebr_connector.schema.build_results import BuildResults, Test
 
 
 def get_test_data_for_successful_build():
@@ -18,6 +18,21 @@ def get_test_data_for_failed_build():
     return _get_test_data(["SKIPPED", "FAILED", "PASSED"])
 
 
+def create_build_results(build_id="1234", product=None):
+    """Returns a build results object with the test data set of a failed build.
+    """
+    build_results = BuildResults.create(
+        job_name="my_jobname",
+        job_link="my_joburl",
+        build_date_time="2019-02-19T09:14:59",
+        build_id=build_id,
+        platform="Linux-x86_64",
+        product=product,
+    )
+    build_results.store_tests(get_test_data_for_failed_build)
+    return build_results
+
+
 def _get_test_data(test_case_results):
     """Returns suites with `len(test_case_results)` test cases per suite.
     """
@@ -0,0 +1,60 @@
+"""
+Tests for the cache of responses of the CI server.
+"""
+
+import errno
+import os
+import time
+from unittest.mock import patch
+
+from ebr_connector.hooks.common.http_cache import CacheEntry, ResponseCache
+
+
+def test_cache_drops_least_recently_used_entries():
+    """Only `max_entries` entries are kept in memory, the least recently used ones are dropped."""
+    cache = ResponseCache(max_entries=2)
+    for key in "abc":
+        cache.put(key, CacheEntry({"key": key}, 0))
+        cache.get("a")
+
+    assert cache.get("a").data == {"key": "a"}
+    assert cache.get("b") is None
+    assert cache.get("c").data == {"key": "c"}
+
+
+def test_cache_keeps_entries_on_disk(tmp_path):
+    """Entries are found by a new cache with the same directory, large responses are not stored."""
+    expires = time.time() + 60
+    ResponseCache(directory=str(tmp_path)).put("a", CacheEntry([1], expires, etag='"x"'))
+    ResponseCache(directory=str(tmp_path), max_entry_size=10).put("b", CacheEntry([2], expires), size=11)
+
+    cache = ResponseCache(directory=str(tmp_path))
+
+    entry = cache.get("a")
+    assert entry.data == [1] and entry.is_fresh()
+    assert entry.validators() == {"If-None-Match": '"x"'}
+    assert cache.get("b") is None
+
+
+def test_cache_removes_expired_entries_from_disk(tmp_path):
+    """Expired entries are removed from disk when looked up, unless they can be revalidated."""
+    cache = ResponseCache(directory=str(tmp_path))
+    cache.put("a", CacheEntry([1], 0))
+    cache.put("b", CacheEntry([2], 0, last_modified="Tue, 19 Feb 2019 09:14:59 GMT"))
+
+    cache = ResponseCache(directory=str(tmp_path))
+
+    assert cache.get("a") is None
+    assert cache.get("b").data == [2]
+    assert len(os.listdir(str(tmp_path))) == 1
+
+
+def test_cache_ignores_disk_errors(tmp_path):
+    """Entries which cannot be written to disk are kept in memory and leave no temporary files behind."""
+    cache = ResponseCache(directory=str(tmp_path))
+
+    with patch("os.replace", side_effect=OSError(errno.ENOSPC, "No space left on device")):
+        cache.put("a", CacheEntry([1], time.time() + 60))
+
+    assert cache.get("a").data == [1]
+    assert not os.listdir(str(tmp_path))
@@ -0,0 +1,119 @@
+"""
+Tests for the HTTP client of the Jenkins JSON API.
+"""
+
+import gzip
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from ebr_connector.hooks.common.http_cache import ResponseCache
+from ebr_connector.hooks.common.jenkins_client import JenkinsClient
+
+
+class StandInJenkins(ThreadingHTTPServer):
+    """Local HTTP server answering with the given `(status, body)` or `(status, body, headers)` responses in turn."""
+
+    daemon_threads = True
+
+    def __init__(self, responses):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.responses = list(responses)
+        self.requests = []
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        """Base URL of the server."""
+        return "http://127.0.0.1:%d" % self.server_port
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        super().__exit__(*exc_info)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answers with the next response, gzip compressed if accepted."""
+        self.server.requests.append((self.path, dict(self.headers)))
+        status, body, *headers = self.server.responses.pop(0)
+        body = json.dumps(body).encode() if status != 304 else b""
+        self.send_response(status)
+        for name, value in (headers[0] if headers else {}).items():
+            self.send_header(name, value)
+        if body and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+def test_get_json_reuses_connection_and_decompresses():
+    """Requests share one connection and the gzip compressed responses are decoded."""
+    with StandInJenkins([(200, {"fullName": "job"}), (200, {"result": "SUCCESS"})]) as jenkins:
+        with JenkinsClient() as client:
+            assert client.get_json(jenkins.url + "/job/a") == {"fullName": "job"}
+            assert client.get_json(jenkins.url + "/job/a/1", tree="result") == {"result": "SUCCESS"}
+
+    assert [path for path, _ in jenkins.requests] == ["/job/a/api/json", "/job/a/1/api/json?tree=result"]
+    assert "gzip" in jenkins.requests[0][1]["Accept-Encoding"]
+    assert jenkins.requests[1][1].get("Connection", "keep-alive") == "keep-alive"
+
+
+def test_get_json_retries_server_errors():
+    """Responses with a retried status code are retried with backoff."""
+    with StandInJenkins([(503, {}), (502, {}), (200, {"fullName": "job"})]) as jenkins:
+        with JenkinsClient(backoff_factor=0) as client:
+            assert client.get_json(jenkins.url) == {"fullName": "job"}
+    assert len(jenkins.requests) == 3
+
+
+def test_get_json_raises_when_retries_are_exhausted():
+    """A server error which persists after the retries is raised instead of being decoded as an error page."""
+    with StandInJenkins([(503, {})] * 6) as jenkins:
+        with JenkinsClient(retries=2, backoff_factor=0) as client:
+            with pytest.raises(requests.exceptions.RetryError):
+                client.get_json(jenkins.url)
+            with pytest.raises(requests.exceptions.RetryError):
+                client.stream_json(jenkins.url)
+    assert len(jenkins.requests) == 6
+
+
+def test_get_json_times_out():
+    """A Jenkins which does not answer raises a timeout instead of blocking."""
+    with socket.socket() as silent_server:
+        silent_server.bind(("127.0.0.1", 0))
+        silent_server.listen(1)
+        with JenkinsClient(read_timeout=0.2, retries=0) as client:
+            with pytest.raises(requests.exceptions.ConnectionError, match="timed out"):
+                client.get_json("http://127.0.0.1:%d" % silent_server.getsockname()[1])
+
+
+def test_get_json_caches_completed_builds_and_revalidates():
+    """Completed builds are cached, other responses are revalidated with their ETag or cached for `max_age`."""
+    responses = [
+        (200, {"result": "SUCCESS"}),
+        (200, {"fullName": "job"}, {"ETag": '"1"'}),
+        (200, {"fullName": "folder"}),
+        (304, None),
+    ]
+    with StandInJenkins(responses) as jenkins:
+        with JenkinsClient(cache=ResponseCache()) as client:
+            for _ in range(2):
+                assert client.get_json(jenkins.url + "/job/a/1", tree="result") == {"result": "SUCCESS"}
+                assert client.get_json(jenkins.url + "/job/a", tree="fullName") == {"fullName": "job"}
+                assert client.get_json(jenkins.url + "/job/f", max_age=60) == {"fullName": "folder"}
+
+    assert len(jenkins.requests) == 4
+    assert jenkins.requests[3][1]["If-None-Match"] == '"1"'
+    assert (client.cache.hits, client.cache.revalidations, client.cache.misses) == (2, 1, 3)
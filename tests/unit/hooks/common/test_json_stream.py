@@ -0,0 +1,102 @@
+"""
+Tests for the incremental JSON parsing.
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from ebr_connector.hooks.common import json_stream
+from ebr_connector.hooks.common.json_stream import ITEM_END, NESTED_ITEM, iter_items, iter_nested_items
+
+DOCUMENT = {
+    "_class": "hudson.tasks.junit.TestResult",
+    "duration": 12.5,
+    "suites": [
+        {"cases": [{"name": "tést", "duration": 123456.25}, {"name": "b", "duration": 0}], "name": "s1"},
+        {"cases": [], "name": "s2", "nested": {"suites": [1]}},
+    ],
+    "empty": False,
+}
+
+
+def chunked(document, size):
+    """Returns the encoded document in chunks of `size` bytes."""
+    data = json.dumps(document, ensure_ascii=False).encode("utf-8")
+    return [data[index : index + size] for index in range(0, len(data), size)]
+
+
+@pytest.fixture(params=["python", "ijson"])
+def backend(request):
+    """Runs a test with each JSON parser, the ijson one only if it is installed."""
+    if request.param == "python":
+        with patch.object(json_stream, "ijson", None):
+            yield request.param
+    else:
+        pytest.importorskip("ijson")
+        yield request.param
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_iter_items_yields_array_items(backend, size):  # pylint: disable=redefined-outer-name,unused-argument
+    """Items are parsed correctly however the document is split, including numbers and multi-byte characters."""
+    assert list(iter_items(chunked(DOCUMENT, size), "suites")) == DOCUMENT["suites"]
+
+
+def test_iter_items_without_key(backend):  # pylint: disable=redefined-outer-name,unused-argument
+    """Documents without the key yield no items."""
+    assert not list(iter_items(chunked({"a": [1]}, 3), "suites"))
+    assert not list(iter_items([b"{}"], "suites"))
+
+
+def test_iter_items_is_lazy():
+    """Items are yielded before the rest of the document is read."""
+    chunks = iter(chunked(DOCUMENT, 10))
+    with patch.object(json_stream, "ijson", None):
+        first = next(iter_items(chunks, "suites"))
+    assert first == DOCUMENT["suites"][0]
+    assert next(chunks, None) is not None
+
+
+def test_iter_items_rejects_invalid_documents(backend):  # pylint: disable=redefined-outer-name,unused-argument
+    """Invalid documents, e.g. an HTML error page, raise a ValueError."""
+    with pytest.raises(ValueError):
+        list(iter_items([b"<html><body>Not found</body></html>"], "suites"))
+    with pytest.raises(ValueError):
+        list(iter_items([b'{"suites": [{"name": "a"}, {"na'], "suites"))
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_iter_nested_items_yields_inner_items(backend, size):  # pylint: disable=redefined-outer-name,unused-argument
+    """The items of the inner arrays are yielded one at a time, followed by the fields of the object holding them."""
+    parts = [
+        (part, dict(item), nested)
+        for part, item, nested in iter_nested_items(chunked(DOCUMENT, size), "suites", "cases")
+    ]
+
+    assert parts == [
+        (NESTED_ITEM, {}, DOCUMENT["suites"][0]["cases"][0]),
+        (NESTED_ITEM, {}, DOCUMENT["suites"][0]["cases"][1]),
+        (ITEM_END, {"name": "s1"}, None),
+        (ITEM_END, {"name": "s2", "nested": {"suites": [1]}}, None),
+    ]
+
+
+def test_iter_nested_items_passes_fields_read_so_far(backend):  # pylint: disable=redefined-outer-name,unused-argument
+    """Fields of the object which precede the inner array are available with its items."""
+    document = {"suites": [{"name": "s1", "cases": [{"name": "a"}], "duration": 1.5}]}
+
+    [(part, item, nested), _] = iter_nested_items(chunked(document, 5), "suites", "cases")
+
+    assert (part, item["name"], nested) == (NESTED_ITEM, "s1", {"name": "a"})
+
+
+def test_iter_nested_items_rejects_invalid_documents(backend):  # pylint: disable=redefined-outer-name,unused-argument
+    """Outer items which are not objects and inner values which are not arrays raise a ValueError."""
+    with pytest.raises(ValueError):
+        list(iter_nested_items([b'{"suites": [1]}'], "suites", "cases"))
+    with pytest.raises(ValueError):
+        list(iter_nested_items([b'{"suites": [{"cases": 1}]}'], "suites", "cases"))
+    with pytest.raises(ValueError):
+        list(iter_nested_items([b'{"suites": [{"cases": [{"na'], "suites", "cases"))
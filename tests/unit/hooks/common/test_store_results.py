@@ -0,0 +1,57 @@
+"""
+Tests for the common parts of the hooks storing build results.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from ebr_connector.hooks.common.store_results import get_json_job_details, save_build
+from ebr_connector.logcollector.spool import Spool
+
+
+@patch("ebr_connector.hooks.common.store_results.create_logcollector_client")
+def test_save_build_tries_spooled_documents_once(mock_create_logcollector_client, tmp_path):
+    """An unreachable LogCollector does not delay the hook, the document stays in the spool."""
+    # Given
+    mock_client = mock_create_logcollector_client.return_value.__enter__.return_value
+    mock_client.send_encoded.side_effect = ConnectionRefusedError()
+    mock_args = MagicMock()
+    mock_args.backend = "logcollector"
+    mock_args.spooldir = str(tmp_path)
+    mock_args.retries = 5
+    mock_build_results = MagicMock()
+    mock_build_results.iter_json_chunks.return_value = [b'{"id": 1}']
+
+    # When
+    save_build(mock_args, mock_build_results)
+
+    # Then
+    assert mock_client.send_encoded.call_count == 1
+    assert len(Spool(str(tmp_path))) == 1
+
+
+@patch("ebr_connector.hooks.common.store_results._DEFAULT_JENKINS_CLIENT", None)
+@patch("ebr_connector.hooks.common.jenkins_client.JenkinsClient")
+def test_default_jenkins_client_is_shared_between_threads(mock_jenkins_client):
+    """Concurrent calls without client create a single default client."""
+    # Given
+    barrier = threading.Barrier(2)
+
+    def create_client(**_):
+        time.sleep(0.05)
+        return MagicMock()
+
+    mock_jenkins_client.side_effect = create_client
+
+    def fetch(url):
+        barrier.wait()
+        return get_json_job_details(url)
+
+    # When
+    with ThreadPoolExecutor(2) as executor:
+        list(executor.map(fetch, ["job", "build"]))
+
+    # Then
+    assert mock_jenkins_client.call_count == 1
@@ -0,0 +1,82 @@
+"""
+Tests for the backfill of past Jenkins builds.
+"""
+
+import argparse
+from unittest.mock import MagicMock, patch
+
+from ebr_connector.hooks.jenkins.backfill import Checkpoint, backfill
+from ebr_connector.logcollector.client import DocumentResult
+
+
+def create_args(tmp_path, **kwargs):
+    """Returns the arguments of a backfill with a checkpoint file in `tmp_path`."""
+    args = {
+        "buildurl": "http://jenkins/job/a",
+        "first": None,
+        "last": None,
+        "workers": 2,
+        "batchsize": 2,
+        "checkpoint": str(tmp_path / "checkpoint.json"),
+        "backend": "logcollector",
+        "spooldir": None,
+        "httpconnecttimeout": 10,
+        "httptimeout": 60,
+        "httpretries": 3,
+        "httpcachedir": None,
+    }
+    args.update(kwargs)
+    return argparse.Namespace(**args)
+
+
+def test_checkpoint_persists_build_ids(tmp_path):
+    """Recorded builds are found again when the checkpoint file is loaded."""
+    Checkpoint(str(tmp_path / "checkpoint.json")).add([3, 1])
+
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+
+    assert 1 in checkpoint and 3 in checkpoint
+    assert 2 not in checkpoint
+
+
+@patch("ebr_connector.hooks.jenkins.backfill.create_logcollector_client")
+@patch("ebr_connector.hooks.jenkins.backfill.assemble_jenkins_build")
+@patch("ebr_connector.hooks.jenkins.backfill.get_json_job_details")
+def test_backfill_sends_builds_in_batches_and_resumes(
+    mock_get_json_job_details, mock_assemble_jenkins_build, mock_create_logcollector_client, tmp_path
+):
+    """Builds of the range are sent in batches, failed builds are not checkpointed and retried by a rerun."""
+    # Given
+    mock_get_json_job_details.return_value = {
+        "allBuilds": [{"number": number, "building": number == 7} for number in range(7, 0, -1)]
+    }
+
+    def assemble(args, _):
+        if args.buildid == "3":
+            raise KeyError("fullName")
+        return MagicMock(buildid=args.buildid)
+
+    mock_assemble_jenkins_build.side_effect = assemble
+    mock_sender = mock_create_logcollector_client.return_value.__enter__.return_value
+    mock_sender.send_batch.side_effect = lambda documents: [DocumentResult(document) for document in documents]
+    args = create_args(tmp_path, first=2)
+
+    # When
+    result = backfill(args)
+
+    # Then
+    sent = [[document.buildid for document in call[0][0]] for call in mock_sender.send_batch.call_args_list]
+    assert sent == [["2", "4"], ["5", "6"]]
+    assert result.sent == 4
+    assert [build_id for build_id, _ in result.failed] == [3]
+    assert Checkpoint(args.checkpoint).build_ids == {2, 4, 5, 6}
+
+    # When
+    mock_assemble_jenkins_build.side_effect = lambda args, _: MagicMock(buildid=args.buildid)
+    mock_sender.send_batch.reset_mock()
+    result = backfill(args)
+
+    # Then
+    assert [call[0][0][0].buildid for call in mock_sender.send_batch.call_args_list] == ["3"]
+    assert result.skipped == 4
+    assert Checkpoint(args.checkpoint).build_ids == {2, 3, 4, 5, 6}
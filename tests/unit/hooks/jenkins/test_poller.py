@@ -0,0 +1,221 @@
+"""
+Tests for the daemon polling Jenkins for completed builds.
+"""
+
+import argparse
+import threading
+from json.decoder import JSONDecodeError
+from unittest.mock import MagicMock, patch
+
+from ebr_connector.hooks.jenkins.poller import JenkinsPoller, folder_tree, iter_jobs
+
+
+def folder(builds):
+    """Returns the JSON details of a folder with a job per entry of `builds` and a sub-folder with one more job."""
+    jobs = [{"url": "http://jenkins/job/%s/" % name, "lastCompletedBuild": {"number": build}} for name, build in builds]
+    jobs.append({"url": "http://jenkins/job/new/", "lastCompletedBuild": None})
+    return {"jobs": [{"url": "http://jenkins/job/sub/", "jobs": jobs}]}
+
+
+def create_args(tmp_path, **kwargs):
+    """Returns the arguments of a poller with a state file in `tmp_path`."""
+    args = {
+        "folders": ["http://jenkins/job/folder/"],
+        "depth": 1,
+        "interval": 0,
+        "workers": 2,
+        "queuesize": 10,
+        "maxattempts": 3,
+        "statefile": str(tmp_path / "state.json"),
+        "backend": "logcollector",
+        "spooldir": None,
+    }
+    args.update(kwargs)
+    return argparse.Namespace(**args)
+
+
+def test_folder_tree_and_jobs():
+    """Jobs of sub-folders are listed, jobs without completed build are left out."""
+    assert folder_tree(1) == "jobs[url,lastCompletedBuild[number],jobs[url,lastCompletedBuild[number]]]"
+    assert list(iter_jobs(folder([("a", 3)]))) == [("http://jenkins/job/a", 3)]
+
+
+@patch("ebr_connector.hooks.jenkins.poller.get_json_job_details")
+def test_poll_queues_new_builds_and_keeps_state(mock_get_json_job_details, tmp_path):
+    """Builds completed since the last poll are queued, also after a restart with the same state file."""
+    # Given
+    mock_get_json_job_details.return_value = folder([("a", 3), ("b", 10)])
+    args = create_args(tmp_path)
+    JenkinsPoller(args, MagicMock(), MagicMock()).poll()
+    mock_get_json_job_details.return_value = folder([("a", 5), ("b", 10)])
+
+    # When
+    queued = JenkinsPoller(args, MagicMock(), MagicMock()).poll()
+
+    # Then
+    assert queued == [("http://jenkins/job/a", 4), ("http://jenkins/job/a", 5)]
+    _, _, tree = mock_get_json_job_details.call_args[0]
+    assert tree == folder_tree(1)
+
+
+def jenkins(folders, results=None):
+    """
+    Returns a stand-in for `get_json_job_details` answering the folder URL with the next of `folders` (the last one
+    once all were returned) and build URLs with the result given in `results` by `(job_url, build_id)`, `SUCCESS` if
+    not given. Exceptions given as result are raised.
+    """
+    folders = list(folders)
+    results = results or {}
+
+    def get_json_job_details(url, client=None, tree=None):  # pylint: disable=unused-argument
+        if url == "http://jenkins/job/folder":
+            return folders.pop(0) if len(folders) > 1 else folders[0]
+        job_url, _, build_id = url.rpartition("/")
+        result = results.get((job_url, int(build_id)), "SUCCESS")
+        if isinstance(result, Exception):
+            raise result
+        return {"result": result}
+
+    return get_json_job_details
+
+
+@patch("ebr_connector.hooks.jenkins.poller.save_builds", return_value=[])
+@patch("ebr_connector.hooks.jenkins.poller.assemble_jenkins_build")
+@patch("ebr_connector.hooks.jenkins.poller.get_json_job_details")
+def test_run_ingests_queued_builds(mock_get_json_job_details, mock_assemble_jenkins_build, mock_save_builds, tmp_path):
+    """Queued builds are assembled with the shared client and sent with the shared sender."""
+    # Given
+    mock_client, mock_sender = MagicMock(), MagicMock()
+    poller = JenkinsPoller(create_args(tmp_path, statefile=None), mock_client, mock_sender)
+    folders = jenkins([folder([("a", 1)]), folder([("a", 3)])])
+    polls = []
+
+    def get_json_job_details(url, client=None, tree=None):
+        if tree == folder_tree(1):
+            polls.append(url)
+            if len(polls) > 2:
+                poller.stop()
+        return folders(url, client, tree)
+
+    mock_get_json_job_details.side_effect = get_json_job_details
+    mock_assemble_jenkins_build.side_effect = lambda args, client: (args.buildurl, args.buildid)
+
+    # When
+    thread = threading.Thread(target=poller.run)
+    thread.start()
+    thread.join(5)
+
+    # Then
+    assert not thread.is_alive()
+    assert poller.sent == 2
+    sent = sorted(call[0][1][0] for call in mock_save_builds.call_args_list)
+    assert sent == [("http://jenkins/job/a", "2"), ("http://jenkins/job/a", "3")]
+    assert all(call[0][2] is mock_sender for call in mock_save_builds.call_args_list)
+    assert all(call[0][1] is mock_client for call in mock_assemble_jenkins_build.call_args_list)
+
+
+@patch("ebr_connector.hooks.jenkins.poller.save_builds", return_value=[])
+@patch("ebr_connector.hooks.jenkins.poller.assemble_jenkins_build")
+@patch("ebr_connector.hooks.jenkins.poller.get_json_job_details")
+def test_running_and_failed_builds_are_queued_again(
+    mock_get_json_job_details, mock_assemble_jenkins_build, mock_save_builds, tmp_path
+):  # pylint: disable=unused-argument
+    """Builds still running or failing to be ingested keep the last build of the job and are polled again."""
+    # Given
+    job_url = "http://jenkins/job/a"
+    mock_get_json_job_details.side_effect = jenkins([folder([("a", 1)]), folder([("a", 4)])], {(job_url, 2): None})
+    mock_assemble_jenkins_build.side_effect = lambda args, client: args.buildid
+    mock_save_builds.side_effect = lambda args, documents, sender: ["failed"] if documents == ["3"] else []
+    poller = JenkinsPoller(create_args(tmp_path), MagicMock(), MagicMock())
+    poller.poll()
+
+    # When
+    for item in poller.poll():
+        poller.ingest(*item)
+
+    # Then
+    assert (poller.sent, poller.failed) == (1, 1)
+    assert poller.last_builds[job_url] == 1
+    assert poller.ingested_builds[job_url] == {4}
+    assert JenkinsPoller(create_args(tmp_path), MagicMock(), MagicMock()).poll() == [(job_url, 2), (job_url, 3)]
+
+    # When the builds complete and are ingested
+    mock_get_json_job_details.side_effect = jenkins([folder([("a", 4)])])
+    mock_save_builds.side_effect = None
+    for item in poller.poll():
+        poller.ingest(*item)
+
+    # Then
+    assert poller.last_builds[job_url] == 4
+    assert not poller.ingested_builds
+
+
+@patch("ebr_connector.hooks.jenkins.poller.get_json_job_details")
+def test_queued_builds_are_not_lost_on_restart(mock_get_json_job_details, tmp_path):
+    """Queued builds which were not ingested before a restart are queued again."""
+    # Given
+    mock_get_json_job_details.side_effect = jenkins([folder([("a", 1)]), folder([("a", 3)])])
+    args = create_args(tmp_path)
+    poller = JenkinsPoller(args, MagicMock(), MagicMock())
+    poller.poll()
+    queued = poller.poll()
+
+    # When
+    restarted = JenkinsPoller(args, MagicMock(), MagicMock())
+
+    # Then
+    assert restarted.poll() == queued == [("http://jenkins/job/a", 2), ("http://jenkins/job/a", 3)]
+
+
+@patch("ebr_connector.hooks.jenkins.poller.save_builds", return_value=[])
+@patch("ebr_connector.hooks.jenkins.poller.assemble_jenkins_build")
+@patch("ebr_connector.hooks.jenkins.poller.get_json_job_details")
+def test_builds_missing_in_jenkins_are_skipped(
+    mock_get_json_job_details, mock_assemble_jenkins_build, mock_save_builds, tmp_path
+):  # pylint: disable=unused-argument
+    """Builds Jenkins does not have anymore, e.g. deleted ones, do not hold back the last build of the job."""
+    # Given
+    job_url = "http://jenkins/job/a"
+    deleted = JSONDecodeError("Expecting value", "<html>Not found</html>", 0)
+    mock_get_json_job_details.side_effect = jenkins([folder([("a", 1)]), folder([("a", 3)])], {(job_url, 2): deleted})
+    poller = JenkinsPoller(create_args(tmp_path), MagicMock(), MagicMock())
+    poller.poll()
+
+    # When
+    for item in poller.poll():
+        poller.ingest(*item)
+
+    # Then
+    assert (poller.sent, poller.skipped, poller.failed) == (1, 1, 0)
+    assert poller.last_builds[job_url] == 3
+    assert not poller.ingested_builds
+    assert mock_assemble_jenkins_build.call_count == 1
+
+
+@patch("ebr_connector.hooks.jenkins.poller.save_builds", return_value=[])
+@patch("ebr_connector.hooks.jenkins.poller.assemble_jenkins_build")
+@patch("ebr_connector.hooks.jenkins.poller.get_json_job_details")
+def test_builds_failing_repeatedly_are_given_up(
+    mock_get_json_job_details, mock_assemble_jenkins_build, mock_save_builds, tmp_path
+):  # pylint: disable=unused-argument
+    """Builds which failed to be ingested `maxattempts` times are recorded as failed, the last build moves on."""
+    # Given
+    job_url = "http://jenkins/job/a"
+    mock_get_json_job_details.side_effect = jenkins([folder([("a", 1)]), folder([("a", 2)])])
+    mock_assemble_jenkins_build.side_effect = ValueError("invalid build")
+    args = create_args(tmp_path, maxattempts=2)
+    poller = JenkinsPoller(args, MagicMock(), MagicMock())
+    poller.poll()
+
+    # When
+    attempts = []
+    for _ in range(3):
+        for item in poller.poll():
+            attempts.append(item)
+            poller.ingest(*item)
+
+    # Then
+    assert attempts == [(job_url, 2), (job_url, 2)]
+    assert poller.failed == 2
+    assert poller.last_builds[job_url] == 2
+    assert JenkinsPoller(args, MagicMock(), MagicMock()).failed_builds == {job_url: {2}}
@@ -2,13 +2,64 @@
 Tests for the Jenkins hook.
 """
 
+import json
 from unittest.mock import MagicMock, patch
 from json.decoder import JSONDecodeError
-
-from ebr_connector.hooks.jenkins.store_results import store
+import pytest
+
+from ebr_connector.hooks.jenkins.store_results import (
+    decode_suites,
+    jenkins_json_stream_records,
+    jenkins_report_tree,
+    store,
+)
+from ebr_connector.schema.build_results import BuildResults
 from . import get_jenkins_test_report_response
 
 
+def create_mock_args(**kwargs):
+    """Creates the command line arguments of the script, the given ones replace the defaults."""
+    args = {
+        "buildurl": "abc",
+        "buildid": "123",
+        "platform": "platform",
+        "productversion": "1234abc",
+        "httpconnecttimeout": 10,
+        "httptimeout": 60,
+        "httpretries": 3,
+        "httpcachedir": None,
+        "casefields": [],
+        "streamreport": False,
+        "decodeworkers": 1,
+        "logcollectaddr": ["localhost"],
+        "logcollectport": 10000,
+        "fanout": 1,
+        "compression": None,
+        "spooldir": None,
+        "backend": "logcollector",
+    }
+    args.update(kwargs)
+    return MagicMock(**args)
+
+
+def jenkins_responses(test_report):
+    """Returns a stand-in for `get_json_job_details` answering by URL, raising `test_report` if it is an error."""
+    responses = {
+        "abc": {"fullName": "a_job_name"},
+        "abc/123": {"url": "http://abc", "timestamp": "1550567699000", "result": "FAILURE"},
+        "abc/123/testReport/api/json": test_report,
+    }
+
+    def get_json_job_details(url, client=None, tree=None, max_age=0):  # pylint: disable=unused-argument
+        assert tree
+        response = responses[url]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return get_json_job_details
+
+
 @patch("socket.socket")
 @patch("ssl.create_default_context")
 @patch("ebr_connector.hooks.common.store_results.get_json_job_details")
@@ -22,18 +73,10 @@ def test_store_tests_returns_valid_build_results_document(
     mock_ssl_create_default_context.return_value = mock_context
 
     ## Mocked arguments
-    mock_args = MagicMock()
-    mock_args.buildurl = "abc"
-    mock_args.buildid = "123"
-    mock_args.platform = "platform"
-    mock_args.productversion = "1234abc"
-
-    ## Mock the JSON response from Jenkins REST APIs
-    mock_get_json_job_details.side_effect = [
-        {"fullName": "a_job_name"},
-        {"url": "http://abc", "timestamp": "1550567699000", "result": "FAILURE"},
-        get_jenkins_test_report_response(),
-    ]
+    mock_args = create_mock_args()
+
+    ## Mock the JSON response from Jenkins REST APIs, which are requested concurrently
+    mock_get_json_job_details.side_effect = jenkins_responses(get_jenkins_test_report_response())
 
     # When
     build_results = store(mock_args)
@@ -64,18 +107,10 @@ def test_store_tests_should_return_empty_results_if_json_decoder_exception_throw
     mock_ssl_create_default_context.return_value = mock_context
 
     ## Mocked arguments
-    mock_args = MagicMock()
-    mock_args.buildurl = "abc"
-    mock_args.buildid = "123"
-    mock_args.platform = "platform"
-    mock_args.productversion = "1234abc"
-
-    ## Mock the JSON response from Jenkins REST APIs
-    mock_get_json_job_details.side_effect = [
-        {"fullName": "a_job_name"},
-        {"url": "http://abc", "timestamp": "1550567699000", "result": "FAILURE"},
-        JSONDecodeError("dummy message", "doc", 1),
-    ]
+    mock_args = create_mock_args()
+
+    ## Mock the JSON response from Jenkins REST APIs, which are requested concurrently
+    mock_get_json_job_details.side_effect = jenkins_responses(JSONDecodeError("dummy message", "doc", 1))
 
     # When
     build_results = store(mock_args)
@@ -91,3 +126,103 @@ def test_store_tests_should_return_empty_results_if_json_decoder_exception_throw
     assert not build_results.br_tests_object.br_summary_object.br_total_count
 
     assert not build_results.br_tests_object.br_suites_object
+
+
+@patch("socket.socket")
+@patch("ssl.create_default_context")
+@patch("ebr_connector.hooks.common.store_results.stream_json_job_details")
+@patch("ebr_connector.hooks.common.store_results.get_json_job_details")
+def test_store_tests_parses_streamed_test_report(
+    mock_get_json_job_details, mock_stream_json_job_details, mock_ssl_create_default_context, mock_socket
+):
+    """Tests that the test report is parsed while it is streamed if `--streamreport` is given."""
+    # Given
+    mock_socket = mock_socket.return_value
+    mock_ssl_create_default_context.return_value = MagicMock()
+
+    ## Mocked arguments
+    mock_args = create_mock_args(streamreport=True)
+
+    ## Mock the JSON responses from Jenkins REST APIs, the test report is returned in small chunks
+    mock_get_json_job_details.side_effect = jenkins_responses(None)
+    report = json.dumps(get_jenkins_test_report_response()).encode()
+    mock_stream_json_job_details.return_value = (report[index : index + 100] for index in range(0, len(report), 100))
+
+    # When
+    build_results = store(mock_args)
+
+    # Then
+    assert build_results.br_tests_object.br_summary_object.br_total_failed_count == 2
+    assert build_results.br_tests_object.br_summary_object.br_total_passed_count == 13
+    assert build_results.br_tests_object.br_summary_object.br_total_skipped_count == 1
+    assert len(build_results.br_tests_object.br_suites_object) == 4
+
+
+@patch("ebr_connector.hooks.common.store_results.stream_json_job_details")
+def test_streamed_test_report_keeps_records_before_json_error(mock_stream_json_job_details):
+    """A truncated test report ends the records without error, like an invalid report without streaming."""
+    report = json.dumps(get_jenkins_test_report_response()).encode()
+    second_suite = report.index(b'"name": "org.acme.tests.myPackage.FeatureATest"')
+    mock_stream_json_job_details.return_value = iter([report[:second_suite]])
+
+    records = list(jenkins_json_stream_records("abc/123"))
+
+    assert [record_type for record_type, _ in records].count("suite") == 1
+
+
+@patch("ebr_connector.hooks.common.store_results.stream_json_job_details")
+def test_streamed_test_report_raises_on_invalid_test_data(mock_stream_json_job_details):
+    """Invalid test data of a streamed test report is raised, like without streaming."""
+    report = get_jenkins_test_report_response()
+    report["suites"][0]["cases"][0]["status"] = "BROKEN"
+    mock_stream_json_job_details.return_value = iter([json.dumps(report).encode()])
+
+    with pytest.raises(ValueError):
+        list(jenkins_json_stream_records("abc/123"))
+
+
+@patch("ebr_connector.hooks.common.store_results.stream_json_job_details")
+def test_streamed_test_report_yields_cases_one_at_a_time(mock_stream_json_job_details):
+    """Test records are yielded as their cases are read if the suite name precedes the cases."""
+    suite = get_jenkins_test_report_response()["suites"][0]
+    report = json.dumps({"suites": [dict(name=suite["name"], duration=suite["duration"], cases=suite["cases"])]})
+    first_case_end = report.index("}", report.index('"cases"')) + 1
+    mock_stream_json_job_details.return_value = iter([report[:first_case_end].encode(), b", {"])
+
+    records = jenkins_json_stream_records("abc/123")
+
+    record_type, record = next(records)
+    assert record_type == "test"
+    assert record["suite"] == suite["name"]
+    assert record["test"] == suite["cases"][0]["name"]
+
+
+@patch("ebr_connector.hooks.common.store_results.stream_json_job_details")
+def test_streamed_test_report_matches_loaded_report(mock_stream_json_job_details):
+    """Streaming the test report results in the same records as loading it completely."""
+    report = get_jenkins_test_report_response()
+    mock_stream_json_job_details.return_value = iter([json.dumps(report).encode()])
+
+    assert list(jenkins_json_stream_records("abc/123")) == list(decode_suites(report["suites"]))
+
+
+@patch("ebr_connector.hooks.jenkins.store_results.DECODE_CHUNK_CASES", 3)
+def test_decode_suites_in_parallel_keeps_order():
+    """Decoding the suites in several processes results in the same build results as decoding them in this process."""
+    suites = get_jenkins_test_report_response()["suites"] * 3
+
+    build = {"job_name": "job", "job_link": "http://abc", "build_date_time": "2019-02-19T09:14:59", "build_id": "1"}
+    serial = BuildResults.create(platform="platform", **build)
+    serial.store_tests(decode_suites, suites)
+    parallel = BuildResults.create(platform="platform", **build)
+    parallel.store_tests(decode_suites, iter(suites), workers=2)
+
+    assert parallel.br_tests_object.br_summary_object.br_total_count == 3 * 16
+    assert parallel.to_dict() == serial.to_dict()
+
+
+def test_jenkins_report_tree_limits_fields():
+    """The test report is limited to the consumed fields and the requested extra fields."""
+    assert jenkins_report_tree() == "suites[name,duration,cases[className,name,status,errorDetails,duration]]"
+    tree = jenkins_report_tree(["stdout", "name"])
+    assert tree.endswith("cases[className,name,status,errorDetails,duration,stdout]]")
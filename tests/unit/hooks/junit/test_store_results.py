@@ -0,0 +1,150 @@
+"""
+Tests for the JUnit XML hook.
+"""
+
+from unittest.mock import MagicMock, patch
+
+from ebr_connector.hooks.junit.store_results import find_reports, junit_file_records, junit_xml_records, store
+from ebr_connector.schema.build_results import BuildResults, TEST_STORE_RECORD
+
+REPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuites>
+  <testsuite name="Suite (1)" time="1,002.5">
+    <properties><property name="a" value="b"/></properties>
+    <testcase classname="a.B" name="passes/0 (16-byte object &lt;60-A5&gt;)" time="0.5"/>
+    <testcase classname="a.B" name="fails" time="1">
+      <failure message="expected 1">stack trace</failure>
+    </testcase>
+    <testcase classname="a.B" name="errors" time="1"><error>broken</error></testcase>
+    <testcase classname="a.B" name="skipped"><skipped/></testcase>
+    <testsuite name="Nested">
+      <testcase classname="a.C" name="nested" time="2"/>
+    </testsuite>
+    <system-out>output</system-out>
+  </testsuite>
+</testsuites>
+"""
+
+
+def write_reports(tmp_path, count=1):
+    """Writes `count` copies of the report with different suite names, returns their directory."""
+    for number in range(count):
+        report = REPORT.replace("Suite (1)", "Suite%d (1)" % number).replace("Nested", "Nested%d" % number)
+        (tmp_path / ("report%d.xml" % number)).write_text(report)
+    return tmp_path
+
+
+def test_junit_file_records_translates_cases_and_suites(tmp_path):
+    """Test cases are turned into records followed by the record of their suite, nested suites are supported."""
+    path = write_reports(tmp_path) / "report0.xml"
+
+    records = list(junit_file_records(str(path)))
+
+    assert [record_type for record_type, _ in records] == ["test"] * 4 + ["test", "suite", "suite"]
+    assert records[0][1] == {
+        "suite": "Suite0",
+        "classname": "a.B",
+        "test": "passes/0",
+        "result": "PASSED",
+        "message": "",
+        "duration": 0.5,
+    }
+    assert [record["result"] for _, record in records[:4]] == ["PASSED", "FAILED", "FAILED", "SKIPPED"]
+    assert [record["message"] for _, record in records[1:3]] == ["expected 1", "broken"]
+    assert records[4][1]["suite"] == "Nested0"
+    assert records[5][1] == {
+        "failures_count": 0,
+        "skipped_count": 0,
+        "passed_count": 1,
+        "total_count": 1,
+        "name": "Nested0",
+        "duration": 2.0,
+    }
+    assert records[6][1] == {
+        "failures_count": 2,
+        "skipped_count": 1,
+        "passed_count": 1,
+        "total_count": 4,
+        "name": "Suite0",
+        "duration": 1002.5,
+    }
+
+
+def test_junit_file_records_keeps_records_before_parse_error(tmp_path):
+    """A truncated report yields the records parsed before the error."""
+    path = tmp_path / "truncated.xml"
+    path.write_text(REPORT[: REPORT.index('<testcase classname="a.B" name="errors"')])
+
+    records = list(junit_file_records(str(path)))
+
+    assert [record["test"] for _, record in records] == ["passes/0", "fails"]
+
+
+def test_junit_xml_records_parses_reports_in_parallel_in_order(tmp_path):
+    """Parsing in several processes results in the same build results as parsing in this process."""
+    directory = write_reports(tmp_path, count=5)
+    patterns = [str(directory / "**" / "*.xml"), str(directory / "report0.xml")]
+
+    assert len(find_reports(patterns)) == 5
+    serial_records = list(junit_xml_records(patterns, workers=1))
+    parallel_records = list(junit_xml_records(patterns, workers=2))
+
+    assert len(serial_records) == 5 * 7
+    assert [record_type for record_type, _ in parallel_records] == [TEST_STORE_RECORD, "suite", "suite"] * 5
+    build = {"job_name": "job", "job_link": "http://abc", "build_date_time": "2019-02-19T09:14:59", "build_id": "1"}
+    serial = BuildResults.create(platform="platform", **build)
+    serial.store_tests(lambda: iter(serial_records))
+    parallel = BuildResults.create(platform="platform", **build)
+    parallel.store_tests(lambda: iter(parallel_records))
+    assert parallel.to_dict() == serial.to_dict()
+    suites = parallel.br_tests_object.br_suites_object
+    assert [suite.br_name for suite in suites][-2:] == ["Nested4", "Suite4"]
+
+
+def test_junit_xml_records_without_reports(tmp_path):
+    """No records are produced if no report matches."""
+    assert not list(junit_xml_records([str(tmp_path / "*.xml")], workers=4))
+
+
+@patch("socket.socket")
+@patch("ssl.create_default_context")
+@patch("ebr_connector.hooks.common.store_results.get_json_job_details")
+def test_store_returns_build_results_of_reports(
+    mock_get_json_job_details, mock_ssl_create_default_context, mock_socket, tmp_path
+):  # pylint: disable=unused-argument
+    """The build details are fetched from Jenkins, the tests are read from the reports."""
+    # Given
+    mock_args = MagicMock()
+    mock_args.buildurl = "abc"
+    mock_args.buildid = "123"
+    mock_args.platform = "platform"
+    mock_args.productversion = "1234abc"
+    mock_args.httpconnecttimeout = 10
+    mock_args.httptimeout = 60
+    mock_args.httpretries = 3
+    mock_args.httpcachedir = None
+    mock_args.reports = [str(write_reports(tmp_path, count=2) / "*.xml")]
+    mock_args.workers = 2
+    mock_args.logcollectaddr = ["localhost"]
+    mock_args.logcollectport = 10000
+    mock_args.fanout = 1
+    mock_args.compression = None
+    mock_args.spooldir = None
+    mock_args.backend = "logcollector"
+
+    responses = {
+        "abc": {"fullName": "a_job_name"},
+        "abc/123": {"url": "http://abc", "timestamp": "1550567699000", "result": "FAILURE"},
+    }
+    mock_get_json_job_details.side_effect = lambda url, client=None, tree=None, max_age=0: responses[url]
+
+    # When
+    build_results = store(mock_args)
+
+    # Then
+    summary = build_results.br_tests_object.br_summary_object
+    assert summary.br_total_failed_count == 4
+    assert summary.br_total_passed_count == 4
+    assert summary.br_total_skipped_count == 2
+    assert summary.br_total_count == 10
+    assert len(build_results.br_tests_object.br_suites_object) == 4
@@ -0,0 +1,57 @@
+"""
+Tests that the CLI entry points do not load the HTTP and Elasticsearch libraries when imported and stay within an
+import time budget.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from ebr_connector.hooks.common.import_time import ENTRY_POINTS, import_times
+
+HEAVY_MODULES = ("requests", "urllib3", "ssl", "elasticsearch", "elasticsearch_dsl")
+
+DEFERRED_MODULES = ("requests", "elasticsearch_dsl")
+"""Modules the entry points imported eagerly before, they load all of :data:`HEAVY_MODULES`."""
+
+IMPORT_TIME_RATIO = 0.5
+"""
+Share of the import time of the :data:`DEFERRED_MODULES` an entry point may take. The entry points take about a
+quarter of it. The budget is relative, so it holds on slower machines as well.
+"""
+
+CHECK = """
+import sys
+import {module}
+print(",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_entry_point_imports_lazily(module):
+    """The heavy libraries are only imported once they are used."""
+    loaded = subprocess.run(
+        [sys.executable, "-c", CHECK.format(module=module, heavy=HEAVY_MODULES)],
+        stdout=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    ).stdout.strip()
+    assert loaded == ""
+
+
+def fastest_import_time(modules, runs=3):
+    """Returns the fastest of several cumulative import times in seconds of the modules in a new interpreter."""
+    return min(sum(times[module] for module in modules) for times in (import_times(*modules) for _ in range(runs)))
+
+
+@pytest.fixture(scope="module")
+def eager_import_time():
+    """Import time in seconds of the modules the entry points defer."""
+    return fastest_import_time(DEFERRED_MODULES)
+
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_entry_point_import_time_within_budget(module, eager_import_time):  # pylint: disable=redefined-outer-name
+    """The entry point takes a fraction of the time importing the deferred modules takes on the same machine."""
+    assert fastest_import_time([module]) < IMPORT_TIME_RATIO * eager_import_time
@@ -0,0 +1,69 @@
+"""
+Tests for indexing documents with the bulk API.
+"""
+
+import json
+
+from elasticsearch import Elasticsearch
+
+from ebr_connector.index.bulk import BulkWriter
+from tests import create_build_results
+
+
+def create_client(requests, failing_builds=()):
+    """
+    Creates an Elasticsearch client whose bulk requests are recorded in `requests`. Documents of the given builds
+    are rejected.
+    """
+    client = Elasticsearch()
+
+    def bulk(body, **_):
+        lines = [json.loads(line) for line in body.splitlines()]
+        requests.append(lines)
+        items = []
+        for source in lines[1::2]:
+            if source["br_build_id_key"] in failing_builds:
+                items.append({"index": {"status": 400, "error": {"type": "mapper_parsing_exception"}}})
+            else:
+                items.append({"index": {"status": 201, "_id": source["br_build_id_key"]}})
+        return {"errors": any(item["index"]["status"] >= 300 for item in items), "items": items}
+
+    client.bulk = bulk
+    return client
+
+
+def test_write_indexes_documents_in_chunks():
+    """Documents are sent as they are encoded by `to_json`, in requests of at most `chunk_size` documents."""
+    requests = []
+    documents = [create_build_results(str(build_id)) for build_id in range(5)]
+    writer = BulkWriter(create_client(requests), "builds", chunk_size=2)
+
+    result = writer.write(iter(documents))
+
+    assert result.success == 5
+    assert result.errors == []
+    assert [len(lines) // 2 for lines in requests] == [2, 2, 1]
+    assert requests[0][0] == {"index": {"_index": "builds", "_type": "doc"}}
+    assert requests[0][1] == documents[0].to_dict()
+
+
+def test_write_reports_failed_documents():
+    """Rejected documents are reported with their position instead of raising."""
+    writer = BulkWriter(create_client([], failing_builds={"1", "3"}), "builds", chunk_size=2)
+
+    result = writer.write(create_build_results(str(build_id)) for build_id in range(4))
+
+    assert result.success == 2
+    assert [position for position, _ in result.errors] == [1, 3]
+    assert result.errors[0][1]["index"]["error"]["type"] == "mapper_parsing_exception"
+
+
+def test_write_with_threads():
+    """Documents are indexed by several threads with `parallel_bulk`."""
+    requests = []
+    writer = BulkWriter(create_client(requests), "builds", chunk_size=1, thread_count=3)
+
+    result = writer.write(create_build_results(str(build_id)) for build_id in range(6))
+
+    assert result.success == 6
+    assert len(requests) == 6
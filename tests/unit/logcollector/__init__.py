@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+"""Module providing a local stand-in for a LogCollector instance."""
+
+import socket
+import threading
+
+
+class PlainSocketContext:
+    """Stands in for an `SSLContext`, returns the plain sockets unchanged."""
+
+    def wrap_socket(self, sock, server_hostname=None, session=None):  # pylint: disable=unused-argument
+        """Returns a plain socket wrapper offering the attributes of an SSL socket used by the clients."""
+        return _PlainSocket(sock)
+
+
+class _PlainSocket:
+    """Wraps a plain socket and provides the session attributes of an SSL socket."""
+
+    session = None
+    session_reused = False
+
+    def __init__(self, sock):
+        self._socket = sock
+
+    def __getattr__(self, name):
+        return getattr(self._socket, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._socket.close()
+
+
+class StandInLogCollector:
+    """
+    Local TCP server standing in for a LogCollector. Collects all data received per connection until the
+    connection is closed by the client.
+    """
+
+    def __init__(self):
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.bind(("127.0.0.1", 0))
+        self._server.listen(5)
+        self.port = self._server.getsockname()[1]
+        self.received = []
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.close()
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._receive, args=(connection,), daemon=True).start()
+
+    def _receive(self, connection):
+        data = bytearray()
+        with connection:
+            while True:
+                chunk = connection.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        with self._condition:
+            self.received.append(bytes(data))
+            self._condition.notify_all()
+
+    def wait_for_connections(self, count, timeout=5):
+        """Waits until `count` connections were closed and returns the data received on them."""
+        with self._condition:
+            if not self._condition.wait_for(lambda: len(self.received) >= count, timeout):
+                raise TimeoutError("Received only %d of %d connections" % (len(self.received), count))
+            return list(self.received)
@@ -0,0 +1,86 @@
+"""
+Tests for the asyncio LogCollector transport.
+"""
+
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+from ebr_connector.schema.build_results import BuildResults
+from tests import get_test_data_for_failed_build
+
+
+def run(coroutine):
+    """Runs a coroutine on a new event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+async def _done():
+    pass
+
+
+def create_mock_writer():
+    """Creates a mocked `StreamWriter`."""
+    mock_writer = MagicMock()
+    mock_writer.drain.side_effect = _done
+    mock_writer.wait_closed.side_effect = _done
+    return mock_writer
+
+
+@patch("ssl.create_default_context")
+@patch("asyncio.open_connection")
+def test_save_logcollect_async(mock_open_connection, mock_ssl_create_default_context):
+    """The document is written in chunks over a TLS connection which is closed afterwards."""
+    # Given
+    mock_writer = create_mock_writer()
+
+    async def open_connection(*_, **__):
+        return MagicMock(), mock_writer
+
+    mock_open_connection.side_effect = open_connection
+    build_results = BuildResults.create(
+        job_name="my_jobname", job_link="my_joburl", build_date_time="2019", build_id="1234", platform="Linux"
+    )
+    build_results.store_tests(get_test_data_for_failed_build)
+
+    # When
+    stats = run(
+        build_results.save_logcollect_async("localhost", 10000, cafile="ca.pem", chunk_size=100, backend="json")
+    )
+
+    # Then
+    mock_ssl_create_default_context.assert_called_with(cafile="ca.pem")
+    mock_open_connection.assert_called_once_with(
+        "localhost", 10000, ssl=mock_ssl_create_default_context.return_value, server_hostname="localhost"
+    )
+    data = b"".join(args[0] for args, _ in mock_writer.write.call_args_list)
+    assert data == json.dumps(build_results.to_dict()).encode()
+    assert stats.bytes_sent == len(data)
+    assert stats.chunks_sent == mock_writer.drain.call_count
+    mock_writer.close.assert_called_once()
+
+
+@patch("asyncio.open_connection")
+def test_save_logcollect_async_uses_client_configuration(mock_open_connection):
+    """The configuration of a LogCollector client is shared with the asyncio transport."""
+    # Given
+    mock_writer = create_mock_writer()
+
+    async def open_connection(*_, **__):
+        return MagicMock(), mock_writer
+
+    mock_open_connection.side_effect = open_connection
+    mock_client = MagicMock(dest="collector", port=5000, timeout=5, chunk_size=10, compression=None, backend="json")
+
+    # When
+    run(BuildResults.create("job", "url", "2019", "1", "Linux").save_logcollect_async(client=mock_client))
+
+    # Then
+    mock_open_connection.assert_called_once_with(
+        "collector", 5000, ssl=mock_client.ssl_context, server_hostname="collector"
+    )
+    assert all(len(args[0]) <= 10 for args, _ in mock_writer.write.call_args_list)
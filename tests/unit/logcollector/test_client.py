@@ -0,0 +1,174 @@
+"""
+Tests for the pooled LogCollector client.
+"""
+
+from unittest.mock import MagicMock, patch
+import pytest
+
+from ebr_connector.logcollector.client import BaseClient, LogCollectorClient
+
+
+def create_client(**kwargs):
+    """Creates a client with a mocked SSL context."""
+    mock_context = MagicMock()
+    mock_context.wrap_socket.return_value.session_reused = False
+    return LogCollectorClient("localhost", 10000, ssl_context=mock_context, **kwargs), mock_context
+
+
+def sent_data(mock_secure_socket):
+    """Returns all data written to a mocked socket."""
+    return b"".join(args[0] for args, _ in mock_secure_socket.sendall.call_args_list)
+
+
+@patch("select.select", return_value=([], [], []))
+@patch("socket.socket")
+def test_send_reuses_connection(_, __):
+    """Documents sent one after the other share a single connection."""
+    # Given
+    client, mock_context = create_client()
+
+    # When
+    client.send_encoded(lambda: [b'{"a": 1}'])
+    client.send_encoded(lambda: [b'{"b": 2}'])
+
+    # Then
+    assert mock_context.wrap_socket.call_count == 1
+    assert client.connections_opened == 1
+    assert sent_data(mock_context.wrap_socket.return_value) == b'{"a": 1}\n{"b": 2}\n'
+    assert client.stats.bytes_sent == 18
+
+
+@patch("select.select")
+@patch("socket.socket")
+def test_send_replaces_connection_closed_by_peer(_, mock_select):
+    """Connections closed by the LogCollector are not reused and the TLS session is resumed."""
+    # Given
+    client, mock_context = create_client()
+    client.send_encoded(lambda: [b"{}"])
+    mock_select.side_effect = lambda sockets, *_: (sockets, [], [])
+
+    # When
+    client.send_encoded(lambda: [b"{}"])
+
+    # Then
+    assert client.connections_opened == 2
+    mock_context.wrap_socket.return_value.close.assert_called_once()
+    _, kwargs = mock_context.wrap_socket.call_args
+    assert kwargs["session"] == mock_context.wrap_socket.return_value.session
+
+
+@patch("select.select", return_value=([], [], []))
+@patch("socket.socket")
+def test_send_retries_failed_write_on_reused_connection(_, __):
+    """A failing write on a reused connection is retried once on a new connection."""
+    # Given
+    client, mock_context = create_client()
+    stale_socket = MagicMock(session_reused=False)
+    new_socket = MagicMock(session_reused=True)
+    mock_context.wrap_socket.side_effect = [stale_socket, new_socket]
+    client.send_encoded(lambda: [b"{}"])
+    stale_socket.sendall.side_effect = BrokenPipeError()
+
+    # When
+    client.send_encoded(lambda: [b'{"a": 1}'])
+
+    # Then
+    assert sent_data(new_socket) == b'{"a": 1}\n'
+    assert client.sessions_resumed == 1
+
+
+@patch("socket.socket")
+def test_send_raises_on_new_connection(_):
+    """Write errors on new connections are not retried."""
+    # Given
+    client, mock_context = create_client()
+    mock_context.wrap_socket.return_value.sendall.side_effect = BrokenPipeError()
+
+    # When & Then
+    with pytest.raises(BrokenPipeError):
+        client.send_encoded(lambda: [b"{}"])
+    assert client.connections_opened == 1
+
+
+@patch("select.select", return_value=([], [], []))
+@patch("socket.socket")
+def test_pool_size_limits_idle_connections(_, __):
+    """Only `pool_size` idle connections are kept open, `close` closes them."""
+    # Given
+    client, mock_context = create_client(pool_size=0)
+
+    # When
+    client.send_encoded(lambda: [b"{}"])
+
+    # Then
+    mock_context.wrap_socket.return_value.close.assert_called_once()
+    client.close()
+
+
+@patch("select.select", return_value=([], [], []))
+@patch("socket.socket")
+def test_send_batch_writes_newline_delimited_documents(_, __):
+    """Documents of a batch are written as newline-delimited JSON, flushed by document count."""
+    # Given
+    client, mock_context = create_client()
+    documents = [MagicMock(**{"to_json.return_value": b'{"id": %d}' % index}) for index in range(5)]
+
+    # When
+    results = client.send_batch(documents, max_documents=2)
+
+    # Then
+    mock_secure_socket = mock_context.wrap_socket.return_value
+    assert sent_data(mock_secure_socket) == b"".join(b'{"id": %d}\n' % index for index in range(5))
+    assert mock_secure_socket.sendall.call_count == 3
+    assert mock_context.wrap_socket.call_count == 1
+    assert [result.document for result in results] == documents
+    assert all(result.success and result.bytes_sent == 10 for result in results)
+
+
+@patch("select.select", return_value=([], [], []))
+@patch("socket.socket")
+def test_send_batch_flushes_by_size_and_reports_failures(_, __):
+    """Documents are flushed by size; failing documents are reported without stopping the batch."""
+    # Given
+    client, mock_context = create_client()
+    mock_secure_socket = mock_context.wrap_socket.return_value
+    mock_secure_socket.sendall.side_effect = [None, BrokenPipeError(), BrokenPipeError(), None]
+    documents = [MagicMock(**{"to_json.return_value": b"x" * 9}) for _ in range(4)]
+    documents[3].to_json.side_effect = TypeError("not serializable")
+
+    # When
+    results = client.send_batch(documents, max_bytes=20)
+
+    # Then
+    assert [result.success for result in results] == [True, True, False, False]
+    assert isinstance(results[2].error, BrokenPipeError)
+    assert isinstance(results[3].error, TypeError)
+
+
+def test_base_client_requires_send_encoded_and_close():
+    """Clients must implement sending encoded documents and closing their connections."""
+
+    class IncompleteClient(BaseClient):  # pylint: disable=abstract-method
+        def close(self):
+            pass
+
+    with pytest.raises(TypeError):
+        IncompleteClient()  # pylint: disable=abstract-class-instantiated
+
+
+@patch("select.select", return_value=([], [], []))
+@patch("socket.socket")
+def test_send_encodes_documents_with_client_backend(_, __):
+    """Documents are encoded with the JSON backend of the client, the fastest available one by default."""
+    # Given
+    client, _ = create_client()
+    json_client, _ = create_client(backend="json")
+    document = MagicMock(**{"iter_json_chunks.return_value": [b"{}"], "to_json.return_value": b"{}"})
+
+    # When
+    client.send(document)
+    json_client.send_batch([document])
+
+    # Then
+    document.iter_json_chunks.assert_called_once_with("auto")
+    document.to_json.assert_called_once_with("json")
@@ -0,0 +1,76 @@
+"""
+Tests for the compression of data sent to LogCollector instances.
+"""
+
+import gzip
+import json
+from unittest.mock import patch
+import pytest
+
+from ebr_connector.logcollector.client import LogCollectorClient
+from ebr_connector.logcollector.compression import compress_chunks
+from tests import create_build_results
+from . import PlainSocketContext, StandInLogCollector
+
+
+def decompress(data, method):
+    """Decompresses data of the given method, supports concatenated gzip members."""
+    if method == "gzip":
+        return gzip.decompress(data)
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+@pytest.mark.parametrize("method", ["gzip", "zstd"])
+def test_compress_chunks_roundtrip(method):
+    """Compressed chunks form a single stream which decompresses to the original data."""
+    if method == "zstd":
+        pytest.importorskip("zstandard")
+    chunks = [b'{"br_suite": "MySuite"}' * 100] * 50
+
+    compressed = b"".join(compress_chunks(chunks, method))
+
+    assert decompress(compressed, method) == b"".join(chunks)
+    assert len(compressed) < len(b"".join(chunks)) / 10
+
+
+def test_compress_chunks_without_method():
+    """Without a method the chunks are passed through."""
+    assert list(compress_chunks([b"a", b"b"])) == [b"a", b"b"]
+
+
+def test_unknown_compression_raises():
+    """Unknown methods are rejected."""
+    with pytest.raises(ValueError):
+        list(compress_chunks([b"a"], "lzma"))
+
+
+@patch("ssl.create_default_context", return_value=PlainSocketContext())
+def test_save_logcollect_with_compression(_):
+    """The stand-in LogCollector receives the compressed document."""
+    build_results = create_build_results()
+
+    with StandInLogCollector() as collector:
+        stats = build_results.save_logcollect(
+            "127.0.0.1", collector.port, compression="gzip", chunk_size=256, backend="json"
+        )
+        [received] = collector.wait_for_connections(1)
+
+    assert stats.bytes_sent == len(received)
+    assert decompress(received, "gzip") == build_results.to_json()
+
+
+def test_client_batch_with_compression():
+    """Compressed batches decompress to newline-delimited documents."""
+    documents = [create_build_results(str(build_id)) for build_id in range(3)]
+
+    with StandInLogCollector() as collector:
+        with LogCollectorClient(
+            "127.0.0.1", collector.port, ssl_context=PlainSocketContext(), compression="gzip"
+        ) as client:
+            results = client.send_batch(documents, max_documents=2)
+        [received] = collector.wait_for_connections(1)
+
+    lines = decompress(received, "gzip").splitlines()
+    assert all(result.success for result in results)
+    assert [json.loads(line)["br_build_id_key"] for line in lines] == ["0", "1", "2"]
@@ -0,0 +1,125 @@
+"""
+Tests for the LogCollector client failing over between several endpoints.
+"""
+
+import socket
+from unittest.mock import MagicMock
+import pytest
+
+from ebr_connector.logcollector.failover import EndpointHealth, FailoverClient, parse_endpoints
+from ebr_connector.logcollector.writer import TransferStats
+from . import PlainSocketContext, StandInLogCollector
+
+
+def create_client(endpoint_count, **kwargs):
+    """Creates a failover client whose endpoint clients are mocked."""
+    client = FailoverClient(
+        [("collector%d" % index, 10000) for index in range(endpoint_count)], ssl_context=MagicMock(), **kwargs
+    )
+    for index, endpoint_client in enumerate(client.clients):
+        endpoint_client.send_encoded = MagicMock(name="send_encoded%d" % index, return_value=TransferStats(10, 1))
+    return client
+
+
+def test_parse_endpoints():
+    """Addresses without port use the default port."""
+    assert parse_endpoints(["a", "b:20000"], 10000) == [("a", 10000), ("b", 20000)]
+    with pytest.raises(ValueError):
+        parse_endpoints(["a"])
+
+
+def test_endpoint_health_holds_failed_endpoint():
+    """Failures put an endpoint on hold for exponentially growing periods, a success clears the hold."""
+    health = EndpointHealth(cooldown=5, max_cooldown=15)
+
+    health.record_failure(OSError(), now=100)
+    assert not health.available(now=104)
+    assert health.available(now=105)
+    health.record_failure(OSError(), now=200)
+    health.record_failure(OSError(), now=200)
+    assert health.down_until == 215
+
+    health.record_success(0.5)
+    assert health.available(now=0)
+    assert health.consecutive_failures == 0
+    assert health.failures == 3
+
+
+def test_send_fails_over_to_next_endpoint():
+    """A failing endpoint is put on hold and the document is sent to the next one."""
+    # Given
+    client = create_client(2)
+    client.clients[0].send_encoded.side_effect = ConnectionResetError()
+
+    # When
+    client.send_encoded(lambda: [b"{}"])
+    client.send_encoded(lambda: [b"{}"])
+
+    # Then
+    assert client.clients[0].send_encoded.call_count == 1
+    assert client.clients[1].send_encoded.call_count == 2
+    assert client.health[0].failures == 1
+    assert not client.health[0].available()
+    assert client.stats.bytes_sent == 20
+
+
+def test_send_prefers_faster_endpoint():
+    """Endpoints with lower latency are preferred."""
+    # Given
+    client = create_client(2)
+    client.health[0].record_success(2.0)
+    client.health[1].record_success(0.1)
+
+    # When
+    client.send_encoded(lambda: [b"{}"])
+
+    # Then
+    client.clients[0].send_encoded.assert_not_called()
+    client.clients[1].send_encoded.assert_called_once()
+
+
+def test_send_raises_if_all_endpoints_fail():
+    """All endpoints, including those on hold, are tried before the last error is raised."""
+    # Given
+    client = create_client(2)
+    client.health[1].record_failure(OSError())
+    client.clients[0].send_encoded.side_effect = ConnectionRefusedError()
+    client.clients[1].send_encoded.side_effect = TimeoutError()
+
+    # When & Then
+    with pytest.raises(TimeoutError) as error_info:
+        client.send_encoded(lambda: [b"{}"])
+    assert error_info.value.__suppress_context__
+    assert client.clients[0].send_encoded.call_count == 1
+    assert client.clients[1].send_encoded.call_count == 1
+
+
+def test_send_fans_out_to_several_endpoints():
+    """With fanout each document is sent to several endpoints, failing ones are replaced."""
+    # Given
+    client = create_client(3, fanout=2)
+    client.clients[0].send_encoded.side_effect = BrokenPipeError()
+
+    # When
+    stats = client.send_encoded(lambda: [b"{}"])
+    client.close()
+
+    # Then
+    assert client.clients[1].send_encoded.call_count == 1
+    assert client.clients[2].send_encoded.call_count == 1
+    assert stats.bytes_sent == 20
+
+
+def test_send_fails_over_from_closed_collector():
+    """Documents reach a running LogCollector if another one is not reachable."""
+    with StandInLogCollector() as collector, socket.socket() as not_listening:
+        not_listening.bind(("127.0.0.1", 0))
+        client = FailoverClient(
+            [("127.0.0.1", not_listening.getsockname()[1]), ("127.0.0.1", collector.port)],
+            ssl_context=PlainSocketContext(),
+        )
+        client.send_encoded(lambda: [b'{"id": 1}'])
+        client.close()
+
+        assert collector.wait_for_connections(1) == [b'{"id": 1}\n']
+        assert client.health[0].failures == 1
@@ -0,0 +1,85 @@
+"""
+Tests for the disk-backed spool of documents.
+"""
+
+import os
+from unittest.mock import MagicMock
+
+from ebr_connector.logcollector.client import LogCollectorClient
+from ebr_connector.logcollector.spool import Spool
+from . import PlainSocketContext, StandInLogCollector
+
+
+def create_spool(path, documents):
+    """Creates a spool with the given encoded documents."""
+    spool = Spool(str(path))
+    for document in documents:
+        spool.put_chunks([document])
+    return spool
+
+
+def test_put_keeps_complete_documents_in_order(tmp_path):
+    """Spooled documents are kept in the order they were added."""
+    spool = create_spool(tmp_path / "spool", [b'{"id": 1}', b'{"id": 2}'])
+
+    assert len(spool) == 2
+    files = sorted(os.listdir(spool.directory))
+    assert all(name.endswith(".json") for name in files)
+    assert [(tmp_path / "spool" / name).read_bytes() for name in files] == [b'{"id": 1}', b'{"id": 2}']
+
+
+def test_flush_sends_and_removes_documents(tmp_path):
+    """Delivered documents are removed from the spool."""
+    spool = create_spool(tmp_path, [b'{"id": 1}', b'{"id": 2}'])
+    sent = []
+    mock_client = MagicMock()
+    mock_client.send_encoded.side_effect = lambda make_chunks: sent.append(b"".join(make_chunks()))
+
+    result = spool.flush(mock_client)
+
+    assert sent == [b'{"id": 1}', b'{"id": 2}']
+    assert result.sent == 2
+    assert result.remaining == 0
+    assert not os.listdir(str(tmp_path))
+
+
+def test_flush_retries_with_exponential_backoff(tmp_path):
+    """Failing documents are retried with growing delays, the flush stops after the last attempt."""
+    spool = create_spool(tmp_path, [b'{"id": 1}', b'{"id": 2}'])
+    mock_client = MagicMock()
+    mock_client.send_encoded.side_effect = ConnectionRefusedError()
+    mock_sleep = MagicMock()
+
+    result = spool.flush(mock_client, max_attempts=4, initial_delay=1, max_delay=3, sleep=mock_sleep)
+
+    assert [args[0] for args, _ in mock_sleep.call_args_list] == [1, 2, 3]
+    assert mock_client.send_encoded.call_count == 4
+    assert result.sent == 0
+    assert result.remaining == 2
+    assert isinstance(result.error, ConnectionRefusedError)
+    assert all(name.endswith(".json") for name in os.listdir(str(tmp_path)))
+
+
+def test_flush_recovers_after_failure(tmp_path):
+    """A document is sent once the LogCollector is reachable again."""
+    spool = create_spool(tmp_path, [b'{"id": 1}'])
+    mock_client = MagicMock()
+    mock_client.send_encoded.side_effect = [ConnectionResetError(), None]
+
+    result = spool.flush(mock_client, sleep=MagicMock())
+
+    assert result.sent == 1
+    assert result.error is None
+    assert len(spool) == 0
+
+
+def test_flush_to_stand_in_log_collector(tmp_path):
+    """Spooled documents arrive newline-delimited at the LogCollector."""
+    spool = create_spool(tmp_path, [b'{"id": 1}', b'{"id": 2}'])
+
+    with StandInLogCollector() as collector:
+        with LogCollectorClient("127.0.0.1", collector.port, ssl_context=PlainSocketContext()) as client:
+            spool.flush(client)
+        [received] = collector.wait_for_connections(1)
+
+    assert received == b'{"id": 1}\n{"id": 2}\n'
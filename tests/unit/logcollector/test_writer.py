@@ -0,0 +1,45 @@
+"""
+Tests for the chunked LogCollector writer.
+"""
+
+from unittest.mock import MagicMock
+import pytest
+
+from ebr_connector.logcollector.writer import bounded_chunks, write_chunks, TransferStats
+
+
+@pytest.mark.parametrize(
+    "chunks,chunk_size,expected",
+    [
+        ([b"abc", b"defgh", b"i"], 4, [b"abcd", b"efgh", b"i"]),
+        ([b"abcdefghij"], 3, [b"abc", b"def", b"ghi", b"j"]),
+        ([b"ab", b"cd"], 4, [b"abcd"]),
+        ([], 4, []),
+    ],
+)
+def test_bounded_chunks(chunks, chunk_size, expected):
+    """Chunks are regrouped into chunks of the requested size."""
+    assert list(bounded_chunks(chunks, chunk_size)) == expected
+
+
+def test_bounded_chunks_rejects_invalid_size():
+    """The chunk size must be positive."""
+    with pytest.raises(ValueError):
+        list(bounded_chunks([b"abc"], 0))
+
+
+def test_write_chunks_uses_sendall():
+    """All data is written with `sendall` and counted."""
+    mock_socket = MagicMock()
+
+    stats = write_chunks(mock_socket, [b"abc", b"defgh"], chunk_size=4)
+
+    assert [args[0] for args, _ in mock_socket.sendall.call_args_list] == [b"abcd", b"efgh"]
+    assert stats.bytes_sent == 8
+    assert stats.chunks_sent == 2
+
+
+def test_throughput():
+    """Throughput is computed from the bytes sent and the elapsed time."""
+    assert TransferStats(bytes_sent=1000, chunks_sent=1, seconds=2.0).throughput == 500.0
+    assert TransferStats().throughput == 0.0
@@ -0,0 +1,98 @@
+"""
+Tests for the asyncio variants of the prepacked queries.
+"""
+
+import asyncio
+import inspect
+import sys
+
+import pytest
+
+from ebr_connector.prepacked_queries import aio, multi_jobs, single_jobs
+from ebr_connector.prepacked_queries.cache import QueryCache
+from ebr_connector.prepacked_queries.multi_jobs import failed_tests_query
+from ebr_connector.prepacked_queries.query import set_query_cache
+
+
+class StandInAsyncClient:
+    """Async client answering every search after a short delay, recording the searches."""
+
+    def __init__(self):
+        self.bodies = []
+        self.concurrent = 0
+        self.max_concurrent = 0
+
+    async def search(self, index, body):
+        """Returns one hit and one aggregation bucket."""
+        self.bodies.append((index, body))
+        self.concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        await asyncio.sleep(0.01)
+        self.concurrent -= 1
+        return {
+            "hits": {"hits": [{"_source": {"br_job_name": "job", "br_build_id_key": "1"}}]},
+            "aggregations": {"fail_count": {"buckets": [{"key": "a.test", "doc_count": 3}]}},
+        }
+
+
+def test_async_queries_run_concurrently_with_the_bodies_of_the_sync_queries():
+    """The async variants send the bodies built for the sync queries, concurrently on one event loop."""
+    client = StandInAsyncClient()
+
+    async def run():
+        return await asyncio.gather(
+            aio.failed_tests(client, "index", "job", agg=True),
+            aio.get_job(client, "index", "job"),
+            aio.get_build(client, "index", "job", "1"),
+        )
+
+    buckets, builds, build = asyncio.run(run())
+
+    assert buckets[0]["key"] == "a.test"
+    assert builds == [{"br_job_name": "job", "br_build_id_key": "1"}]
+    assert build == {"br_job_name": "job", "br_build_id_key": "1"}
+    assert client.max_concurrent == 3
+    assert client.bodies[0] == ("index", failed_tests_query("index", "job", agg=True).search.to_dict())
+
+
+def test_async_queries_use_the_query_cache():
+    """Identical async queries are answered from the cache."""
+    client = StandInAsyncClient()
+    set_query_cache(QueryCache())
+    try:
+        asyncio.run(aio.get_job(client, "index", "job"))
+        asyncio.run(aio.get_job(client, "index", "job"))
+    finally:
+        set_query_cache(None)
+
+    assert len(client.bodies) == 1
+    assert client.bodies[0][1]["query"]["bool"]["filter"][0]["bool"]["must"][1]["range"] == {
+        "br_build_date_time": {"gte": "now-7d/m", "lt": "now+1m/m"}
+    }
+
+
+def test_create_async_client_reports_missing_client(monkeypatch):
+    """A helpful error is raised if no async client is installed."""
+    monkeypatch.setitem(sys.modules, "elasticsearch_async", None)
+
+    with pytest.raises(ImportError, match=r"ebr-connector\[async\]"):
+        aio.create_async_client(["localhost"])
+
+
+@pytest.mark.parametrize(
+    "module,name",
+    [
+        (multi_jobs, "successful_jobs"),
+        (multi_jobs, "failed_tests"),
+        (multi_jobs, "job_matching_test"),
+        (multi_jobs, "get_job"),
+        (single_jobs, "get_build"),
+    ],
+)
+def test_async_queries_take_the_arguments_of_the_sync_queries(module, name):
+    """Every async variant takes the client followed by the arguments of its synchronous query."""
+    parameters = list(inspect.signature(getattr(aio, name)).parameters.values())
+
+    assert inspect.iscoroutinefunction(getattr(aio, name))
+    assert parameters[0].name == "client"
+    assert parameters[1:] == list(inspect.signature(getattr(module, name)).parameters.values())
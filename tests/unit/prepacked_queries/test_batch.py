@@ -0,0 +1,75 @@
+"""
+Tests for the execution of several prepacked queries with one multi search request.
+"""
+
+from unittest.mock import MagicMock
+
+from elasticsearch import TransportError
+
+from ebr_connector.prepacked_queries.batch import QueryBatch
+from ebr_connector.prepacked_queries.cache import QueryCache
+from ebr_connector.prepacked_queries.multi_jobs import failed_tests_query, get_job_query
+from ebr_connector.prepacked_queries.query import set_query_cache
+from ebr_connector.prepacked_queries.single_jobs import get_build_query
+
+HIT = {"_source": {"br_job_name": "job", "br_build_id_key": "1"}}
+
+
+def test_batch_sends_queries_at_once_and_returns_results_in_order():
+    """All queries are sent in one request, errors of single queries are reported by their results."""
+    client = MagicMock()
+    client.msearch.return_value = {
+        "responses": [
+            {"hits": {"hits": [HIT]}, "aggregations": {"fail_count": {"buckets": [{"key": "a.test"}]}}},
+            {"error": {"type": "index_not_found_exception", "reason": "no such index"}, "status": 404},
+            {"hits": {"hits": []}},
+        ]
+    }
+    batch = QueryBatch(client=client)
+    assert batch.add(failed_tests_query("index", "job", agg=True)) == 0
+    batch.add(get_job_query("missing", "job"))
+    batch.add(get_build_query("index", "job", "2"))
+
+    failed, missing, build = batch.execute()
+
+    client.msearch.assert_called_once()
+    body = client.msearch.call_args[1]["body"]
+    assert body[::2] == [{"index": "index"}, {"index": "missing"}, {"index": "index"}]
+    assert body[3] == get_job_query("missing", "job").search.to_dict()
+    assert failed.success and failed.results[0]["key"] == "a.test"
+    assert isinstance(missing.error, TransportError) and missing.error.status_code == 404
+    assert isinstance(build.error, IndexError)
+
+
+def test_batch_reports_failed_request_for_every_query():
+    """If the request fails, every query sent with it fails."""
+    client = MagicMock()
+    client.msearch.side_effect = ConnectionError("unreachable")
+    batch = QueryBatch(client=client)
+    batch.add(get_job_query("index", "a"))
+    batch.add(get_job_query("index", "b"))
+
+    results = batch.execute()
+
+    assert [type(result.error) for result in results] == [ConnectionError, ConnectionError]
+
+
+def test_batch_sends_only_uncached_queries():
+    """Queries answered by the cache are left out of the request."""
+    client = MagicMock()
+    client.msearch.return_value = {"responses": [{"hits": {"hits": [HIT]}}]}
+    set_query_cache(QueryCache())
+    try:
+        first = QueryBatch(client=client)
+        first.add(get_job_query("index", "job"))
+        first.execute()
+
+        second = QueryBatch(client=client)
+        second.add(get_job_query("index", "other"))
+        second.add(get_job_query("index", "job"))
+        other, job = second.execute()
+    finally:
+        set_query_cache(None)
+
+    assert len(client.msearch.call_args[1]["body"]) == 2
+    assert other.results == job.results == [HIT["_source"]]
@@ -0,0 +1,140 @@
+"""
+Tests for the cache of the prepacked queries.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from elasticsearch_dsl import Q, Search
+from elasticsearch_dsl.response import Response
+
+from ebr_connector.prepacked_queries.cache import QueryCache, normalize_query
+from ebr_connector.prepacked_queries.query import lookup_cached, make_query, set_query_cache
+
+RANGE_QUERY = {
+    "query": {
+        "bool": {
+            "filter": [
+                {"range": {"br_build_date_time": {"gte": "now-7d", "lt": "now/d"}}},
+                {"range": {"br_tests_object.br_summary_object.br_total_failed_count": {"gte": 5}}},
+                {"term": {"br_job_name.raw": "now"}},
+            ]
+        }
+    }
+}
+
+
+def test_normalize_query_rounds_relative_dates():
+    """Relative dates of range clauses are rounded unless they are rounded already, other values are kept."""
+    body, relative = normalize_query(RANGE_QUERY, "h")
+
+    filters = body["query"]["bool"]["filter"]
+    assert relative
+    assert filters[0] == {"range": {"br_build_date_time": {"gte": "now-7d/h", "lt": "now/d"}}}
+    assert filters[1:] == RANGE_QUERY["query"]["bool"]["filter"][1:]
+    assert normalize_query({"query": {"term": {"br_job_name.raw": "now"}}}) == (
+        {"query": {"term": {"br_job_name.raw": "now"}}},
+        False,
+    )
+
+
+@pytest.mark.parametrize(
+    "bounds,expected",
+    [
+        ({"lt": "now"}, {"lt": "now+1d/d"}),
+        ({"lt": "now-1h"}, {"lt": "now-1h+1d/d"}),
+        ({"lte": "now"}, {"lte": "now/d"}),
+        ({"gt": "now-7d", "to": "now"}, {"gt": "now-7d/d", "to": "now/d"}),
+    ],
+)
+def test_normalize_query_keeps_current_bucket_in_upper_bounds(bounds, expected):
+    """Upper bounds are rounded so that the current bucket is included, Elasticsearch rounds `lt` bounds down."""
+    body, _ = normalize_query({"query": {"range": {"br_build_date_time": bounds}}}, "d")
+
+    assert body == {"query": {"range": {"br_build_date_time": expected}}}
+
+
+def test_prepare_keys_relative_queries_by_bucket():
+    """Queries with relative dates share their key within a bucket only, they are not cached without rounding."""
+    cache = QueryCache(date_rounding="m")
+
+    _, key = cache.prepare("index", RANGE_QUERY, now=120)
+
+    assert cache.prepare("index", RANGE_QUERY, now=179)[1] == key
+    assert cache.prepare("index", RANGE_QUERY, now=180)[1] != key
+    assert cache.prepare("other", RANGE_QUERY, now=120)[1] != key
+    assert QueryCache(date_rounding=None).prepare("index", RANGE_QUERY)[1] is None
+    with pytest.raises(ValueError):
+        QueryCache(date_rounding="x")
+
+
+def test_cache_expires_and_evicts_by_size():
+    """Responses expire after their time to live, the least recently used ones are dropped to stay in size."""
+    cache = QueryCache(ttl=10, max_bytes=25)
+    cache.put("a", {"hits": 1}, now=0)
+    cache.put("b", {"hits": 2}, now=0)
+    assert cache.get("a", now=5) == {"hits": 1}
+
+    cache.put("c", {"hits": 3}, now=5)
+    cache.put("big", {"hits": "x" * 30}, now=5)
+
+    assert cache.get("b", now=5) is None
+    assert cache.get("a", now=5) == {"hits": 1}
+    assert cache.get("c", now=15) is None
+    assert cache.get("big", now=5) is None
+    assert (cache.hits, cache.misses) == (2, 3)
+    assert cache.size <= 25
+
+
+def test_cache_returns_copies_and_shares_disk_store(tmp_path):
+    """Changes of returned responses do not affect the cache, other caches on the same directory find them."""
+    cache = QueryCache(ttl=10, directory=str(tmp_path))
+    cache.put("a", {"hits": [1]}, now=0)
+    cache.get("a", now=1)["hits"].append(2)
+
+    assert cache.get("a", now=1) == {"hits": [1]}
+    assert QueryCache(directory=str(tmp_path)).get("a", now=9) == {"hits": [1]}
+    assert QueryCache(directory=str(tmp_path)).get("a", now=10) is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_make_query_answers_identical_queries_from_cache():
+    """Identical queries are executed once with the rounded dates, results are decoded from the cached response."""
+    executed = []
+
+    def execute(search):
+        executed.append(search.to_dict())
+        return Response(search, {"hits": {"hits": [{"_source": {"br_job_name": "job"}}]}})
+
+    combined_filter = Q("range", br_build_date_time={"gte": "now-7d", "lt": "now"})
+    set_query_cache(QueryCache())
+    try:
+        with patch("elasticsearch_dsl.Search.execute", autospec=True, side_effect=execute):
+            first = make_query("index", combined_filter, ["br_job_name"], [], size=5)
+            second = make_query("index", combined_filter, ["br_job_name"], [], size=5)
+            make_query("index", combined_filter, ["br_job_name"], [], size=6)
+    finally:
+        set_query_cache(None)
+
+    assert first == second == [{"br_job_name": "job"}]
+    assert len(executed) == 2
+    assert executed[0]["query"]["bool"]["filter"][0]["range"]["br_build_date_time"] == {
+        "gte": "now-7d/m",
+        "lt": "now+1m/m",
+    }
+
+
+def test_lookup_cached_leaves_search_unchanged():
+    """The normalized search is a copy, the search of the caller keeps its relative dates."""
+    search = Search(index="index").filter("range", br_build_date_time={"gte": "now-7d", "lt": "now"})
+    body = search.to_dict()
+    set_query_cache(QueryCache())
+    try:
+        normalized, key, raw_response = lookup_cached(search, "index")
+    finally:
+        set_query_cache(None)
+
+    assert search.to_dict() == body
+    assert normalized.to_dict()["query"]["bool"]["filter"][0]["range"]["br_build_date_time"]["lt"] == "now+1m/m"
+    assert key is not None
+    assert raw_response is None
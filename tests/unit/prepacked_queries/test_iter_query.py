@@ -0,0 +1,62 @@
+"""
+Tests for the iteration over all results of a query.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from elasticsearch_dsl import Q
+from elasticsearch_dsl.response import Response
+
+from ebr_connector.prepacked_queries.multi_jobs import iter_builds
+from ebr_connector.prepacked_queries.query import iter_query
+
+BUILDS = [{"br_build_id_key": str(number), "br_build_date_time": "2019-02-%02d" % number} for number in range(1, 8)]
+
+
+def test_iter_builds_pages_with_search_after():
+    """All builds are fetched page by page, each page continues after the sort values of the last hit."""
+    requests = []
+
+    def execute(search):
+        body = search.to_dict()
+        requests.append(body)
+        first = int(body.get("search_after", [0])[0])
+        hits = [{"_source": build, "sort": [number + 1, "id"]} for number, build in enumerate(BUILDS)][first:]
+        return Response(search, {"hits": {"hits": hits[: body["size"]]}})
+
+    with patch("elasticsearch_dsl.Search.execute", autospec=True, side_effect=execute):
+        builds = list(iter_builds("index", job_name="job", page_size=3))
+
+    assert builds == BUILDS
+    assert [request.get("search_after") for request in requests] == [None, [3, "id"], [6, "id"]]
+    assert requests[0]["sort"] == [{"br_build_date_time": "asc"}, {"_id": "asc"}]
+
+
+@patch("ebr_connector.prepacked_queries.query.connections")
+@patch("ebr_connector.prepacked_queries.query.scan")
+def test_iter_query_fetches_slices_in_parallel(mock_scan, mock_connections):
+    """Every slice is scrolled once, the hits of all slices are returned."""
+
+    def scan(client, query, index, scroll, size):  # pylint: disable=unused-argument
+        assert index == "index" and size == 2
+        slice_id = query["slice"]["id"]
+        return ({"_source": build} for build in BUILDS[slice_id::3])
+
+    mock_scan.side_effect = scan
+    mock_connections.get_connection.return_value = MagicMock()
+
+    builds = list(iter_query("index", Q("match_all"), ["a"], [], page_size=2, slices=3))
+
+    assert sorted(builds, key=lambda build: build["br_build_id_key"]) == BUILDS
+    assert mock_scan.call_count == 3
+
+
+@patch("ebr_connector.prepacked_queries.query.connections")
+@patch("ebr_connector.prepacked_queries.query.scan")
+def test_iter_query_raises_errors_of_slices(mock_scan, mock_connections):  # pylint: disable=unused-argument
+    """An error while fetching a slice ends the iteration with that error."""
+    mock_scan.side_effect = ConnectionError("boom")
+
+    with pytest.raises(ConnectionError):
+        list(iter_query("index", Q("match_all"), ["a"], [], slices=2))
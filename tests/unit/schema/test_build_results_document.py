@@ -10,7 +10,7 @@ import ssl
 import pytest
 
 import ebr_connector
-from ebr_connector.schema.build_results import BuildResults
+from ebr_connector.schema.build_results import BuildResults, TEST_RECORD, SUITE_RECORD
 from tests import get_test_data_for_failed_build
 
 
@@ -156,7 +156,7 @@ def test_save_logcollect(mock_ssl_create_default_context, mock_socket_class, caf
     build_results.store_tests(get_test_data_for_failed_build)
 
     # When
-    build_results.save_logcollect(dest="localhost", port="10000", cafile=cafile_input)
+    build_results.save_logcollect(dest="localhost", port="10000", cafile=cafile_input, backend="json")
 
     # Then
     ## Constructor call
@@ -169,11 +169,56 @@ def test_save_logcollect(mock_ssl_create_default_context, mock_socket_class, caf
         call.wrap_socket(mock_socket, server_hostname="localhost"),
         call.wrap_socket().__enter__(),
         call.wrap_socket().__enter__().connect(("localhost", "10000")),
-        call.wrap_socket().__enter__().send(str.encode(json.dumps(build_results.to_dict()))),
+        call.wrap_socket().__enter__().sendall(str.encode(json.dumps(build_results.to_dict()))),
     ]
     mock_context.assert_has_calls(expected_calls)
 
 
+@patch("socket.socket")
+@patch("ssl.create_default_context")
+def test_save_logcollect_sends_document_in_chunks(mock_ssl_create_default_context, _):
+    """Test that large documents are written completely in chunks of bounded size."""
+    # Given
+    mock_context = MagicMock()
+    mock_ssl_create_default_context.return_value = mock_context
+    mock_secure_socket = mock_context.wrap_socket.return_value.__enter__.return_value
+
+    build_results = create_dummy_build_result()
+    build_results.store_tests(get_test_data_for_failed_build)
+    expected = str.encode(json.dumps(build_results.to_dict()))
+
+    # When
+    stats = build_results.save_logcollect(dest="localhost", port="10000", chunk_size=100, backend="json")
+
+    # Then
+    chunks = [args[0] for args, _ in mock_secure_socket.sendall.call_args_list]
+    assert b"".join(chunks) == expected
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert stats.bytes_sent == len(expected)
+    assert stats.chunks_sent == len(chunks)
+    mock_secure_socket.send.assert_not_called()
+
+
+def test_save_logcollect_with_client():
+    """Test that documents are sent with the given LogCollector client."""
+    # Given
+    mock_client = MagicMock()
+    build_results = create_dummy_build_result()
+
+    # When
+    stats = build_results.save_logcollect(client=mock_client)
+
+    # Then
+    mock_client.send.assert_called_once_with(build_results)
+    assert stats == mock_client.send.return_value
+
+
+def test_save_logcollect_without_destination_raises():
+    """Test that either a destination or a client is required."""
+    with pytest.raises(ValueError):
+        create_dummy_build_result().save_logcollect()
+
+
 # @patch("socket.socket")
 @patch("ssl.create_default_context")
 def test_save_logcollect_should_use_client_authentication(mock_ssl_create_default_context):
@@ -221,6 +266,72 @@ def test_store_tests_returns_a_properly_translated_document():
         assert suite.br_total_count == 3
 
 
+def test_store_tests_accepts_record_generator():
+    """`store_tests` consumes a generator of test and suite records and counts the summary along the way."""
+    # Given
+    build_results = create_dummy_build_result()
+    expected = create_dummy_build_result()
+    expected.store_tests(get_test_data_for_failed_build)
+
+    def generate_records():
+        test_data = get_test_data_for_failed_build()
+        for test in test_data["tests"]:
+            yield TEST_RECORD, test
+        for suite in test_data["suites"]:
+            yield SUITE_RECORD, suite
+
+    # When
+    build_results.store_tests(generate_records)
+
+    # Then
+    assert build_results.br_tests_object.br_summary_object.br_total_failed_count == 5
+    assert build_results.br_tests_object.br_summary_object.br_total_count == 15
+    assert json.dumps(build_results.br_tests_object.to_dict()) == json.dumps(expected.br_tests_object.to_dict())
+
+
+def test_store_tests_documents_compare_equal():
+    """Two documents with the same tests compare equal, also before their tests were accessed."""
+    # Given
+    first = create_dummy_build_result()
+    second = create_dummy_build_result()
+
+    # When
+    first.store_tests(get_test_data_for_failed_build)
+    second.store_tests(get_test_data_for_failed_build)
+
+    # Then
+    assert first.br_tests_object == second.br_tests_object
+    assert second.br_tests_object == first.br_tests_object
+
+
+def test_store_tests_keeps_document_on_record_error():
+    """A failing record generator leaves the tests of the document unchanged and its error is raised."""
+    # Given
+    build_results = create_dummy_build_result()
+
+    def generate_records():
+        yield TEST_RECORD, get_test_data_for_failed_build()["tests"][0]
+        raise ValueError("broken test report")
+
+    # When & Then
+    with pytest.raises(ValueError):
+        build_results.store_tests(generate_records)
+    assert build_results.br_tests_object == {}
+
+
+def test_store_tests_rejects_unknown_test_result():
+    """Records with an unknown test result are rejected without adding a partial summary to the document."""
+    # Given
+    build_results = create_dummy_build_result()
+    test = dict(get_test_data_for_failed_build()["tests"][0], result="BROKEN")
+
+    # When
+    build_results.store_tests(lambda: iter([(TEST_RECORD, test)]))
+
+    # Then
+    assert build_results.br_tests_object == {}
+
+
 @pytest.mark.parametrize("exception", [KeyError("dummy key error"), TypeError("dummy type error")])
 def test_store_status_should_not_throw(exception):
     """`store_status` should not throw the above mentioned exceptions
@@ -0,0 +1,59 @@
+"""
+Tests for the serializer module.
+"""
+
+import json
+import pytest
+
+from ebr_connector.schema.build_results import BuildResults
+from ebr_connector.schema.serializer import DocumentSerializer
+from tests import create_build_results
+
+
+def test_output_matches_json_dumps_of_to_dict():
+    """The default backend produces exactly the output of `json.dumps(to_dict())`."""
+    build_results = create_build_results(product="Prödüct")
+
+    assert build_results.to_json() == json.dumps(build_results.to_dict()).encode()
+
+
+def test_output_matches_json_dumps_of_to_dict_with_accessed_tests():
+    """Test fields which have been turned into `Test` objects are serialized the same way."""
+    build_results = create_build_results(product="Prödüct")
+    build_results.br_tests_object.br_tests_skipped_object[0].br_message = None
+
+    assert build_results.to_json() == json.dumps(build_results.to_dict()).encode()
+
+
+@pytest.mark.parametrize("tests_object", [{}, {"br_summary_object": {"br_total_count": 0}}])
+def test_output_matches_json_dumps_of_to_dict_without_tests(tests_object):
+    """Plain dictionaries are serialized as they are and empty objects are left out."""
+    build_results = create_build_results(product="Prödüct")
+    build_results.br_tests_object = tests_object
+
+    assert build_results.to_json() == json.dumps(build_results.to_dict()).encode()
+
+
+def test_iter_chunks_yields_complete_document():
+    """The chunks joined together form the complete document."""
+    build_results = create_build_results(product="Prödüct")
+    serializer = DocumentSerializer(BuildResults)
+
+    chunks = list(serializer.iter_chunks(build_results))
+
+    assert len(chunks) > 1
+    assert b"".join(chunks) == serializer.dumps(build_results)
+
+
+def test_orjson_backend_produces_same_document():
+    """The orjson backend produces the same document in compact form."""
+    pytest.importorskip("orjson")
+    build_results = create_build_results(product="Prödüct")
+
+    assert json.loads(build_results.to_json("orjson")) == json.loads(build_results.to_json())
+
+
+def test_unknown_backend_raises():
+    """Unknown backends are rejected."""
+    with pytest.raises(ValueError):
+        DocumentSerializer(BuildResults, backend="unknown")
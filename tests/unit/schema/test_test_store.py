@@ -0,0 +1,79 @@
+"""
+Tests for the TestStore class.
+"""
+
+import pickle
+
+import pytest
+
+from ebr_connector.schema.build_results import Test, Tests
+from ebr_connector.schema.test_store import TestStore
+
+
+def create_test_store():
+    """Creates a store with some passed and failed test cases."""
+    test_store = TestStore()
+    test_store.append("MySuite", "org.acme.MyTest", "test_a", "FAILED", "boom", 1.5)
+    test_store.append("MySuite", "org.acme.MyTest", "test_b", "PASSED", "", 2.0, reportset="set", context="ctx")
+    test_store.append("MySuite", "org.acme.MyTest", "test_c", "PASSED", None, None)
+    return test_store
+
+
+def test_count():
+    """Test counting of test cases per result."""
+    test_store = create_test_store()
+
+    assert len(test_store) == 3
+    assert test_store.count("PASSED") == 2
+    assert test_store.count("FAILED") == 1
+    assert test_store.count("SKIPPED") == 0
+    assert test_store.result_names() == ["FAILED", "PASSED"]
+
+
+def test_records_match_test_to_dict():
+    """Records have the same shape as `Test.to_dict` of the equivalent `Test` objects."""
+    test_store = create_test_store()
+    expected = [
+        Test.create("MySuite", "org.acme.MyTest", "test_b", "PASSED", "", 2.0, reportset="set", context="ctx"),
+        Test.create("MySuite", "org.acme.MyTest", "test_c", "PASSED", None, None),
+    ]
+
+    assert list(test_store.records("PASSED")) == [test.to_dict() for test in expected]
+    assert not list(test_store.records("SKIPPED"))
+
+
+def test_extend_appends_test_cases_of_other_store():
+    """Test cases of another store are appended in order with their strings and results mapped."""
+    test_store = TestStore()
+    test_store.append("OtherSuite", "org.acme.Other", "test_z", "SKIPPED", None, 0.5)
+    other = pickle.loads(pickle.dumps(create_test_store()))
+
+    test_store.extend(other)
+
+    assert len(test_store) == 4
+    assert test_store.result_names() == ["SKIPPED", "FAILED", "PASSED"]
+    assert test_store.count("PASSED") == 2
+    assert list(test_store.records("PASSED")) == list(create_test_store().records("PASSED"))
+    assert [record["br_test"] for record in test_store.records("SKIPPED")] == ["test_z"]
+
+
+def test_append_rejects_non_string_names():
+    """Suite and test names are required to build the full name of a test."""
+    with pytest.raises(TypeError):
+        TestStore().append(None, "org.acme.MyTest", "test_a", "FAILED", "boom", 1.5)
+
+
+def test_tests_materializes_fields_on_access():
+    """`Tests` backed by a store creates `Test` objects only for the accessed fields."""
+    tests = Tests()
+    tests.attach_test_store(create_test_store())
+    assert tests.to_dict()["br_tests_failed_object"][0]["br_test"] == "test_a"
+    assert "br_tests_skipped_object" not in tests.to_dict()
+    assert not tests._d_  # pylint: disable=protected-access
+
+    passed = tests.br_tests_passed_object
+
+    assert [test.br_test for test in passed] == ["test_b", "test_c"]
+    assert isinstance(passed[0], Test)
+    assert "br_tests_passed_object" in tests._d_  # pylint: disable=protected-access
+    assert "br_tests_failed_object" not in tests._d_  # pylint: disable=protected-access